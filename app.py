@@ -2,12 +2,14 @@
 
 # Run this app with `python app.py` and
 # visit http://127.0.0.1:8050/ in your web browser.
-import csv
-import re
-import base64
+import binascii
+import json
+import math
+import os
+import tempfile
 from functools import partial
-from io import StringIO
-from typing import List
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode
 
 import dash
 from dash.dependencies import Input, Output, State
@@ -17,28 +19,35 @@ from dash_table.Format import Format, Scheme
 import dash_bootstrap_components as dbc
 import dash_core_components as dcc
 import dash_html_components as html
-import pandas as pd
-from dash_extensions import Download
-from dash_extensions.snippets import send_data_frame
+from flask import Response, abort, request, stream_with_context
 from sqlalchemy import create_engine
 
 from src import Config
+from src.api import create_api
 from src.text_index import IndexReader
 from src.app_utils import (
     format_colors_based_on_similarity,
     format_suggestions_based_on_search_sidebar,
     row_col, format_points_tooltip_based_on_search, format_suggestions_based_on_search,
 )
-from src.orm import Cursor
+from src.points import PointsStore
+from src.search import BatchSearch, ResultStore, SearchJobs, TableImport, UploadStore, decode_upload, read_table
+from src.search.export import EXPORT_COLUMNS, csv_chunks, file_chunks, write_xlsx
 
 config = Config()
 ir = IndexReader(config)
 engine = create_engine(f"sqlite:///{config['db_file']}")
+store = PointsStore.from_engine(engine)
+batch_search = BatchSearch(ir, store)
+search_jobs = SearchJobs(config['search'].get('jobs_file', './db/jobs.db'))
+result_store = ResultStore(config['search'].get('results_file', './db/results.db'),
+                           config['search'].get('results_ttl', 86400))
+upload_store = UploadStore(config['search'].get('uploads_file', './db/uploads.db'))
+page_size = config['search'].get('page_size', 100)
 
 
 def get_domain_form_group() -> dbc.FormGroup:
-    with Cursor(engine) as cursor:
-        domains = cursor.get_domains()
+    domains = store.get_domains()
 
     return dbc.FormGroup(
         [
@@ -148,7 +157,8 @@ def get_search_table() -> html.Div:
             ],
             editable=True,
             row_deletable=True,
-            page_action='none',
+            page_action='native',
+            page_size=page_size,
         ),
     ]
     )
@@ -176,11 +186,22 @@ def get_results_wrapper() -> html.Div:
         children=[
             html.H4('Wyniki wyszukiwania'),
             html.P('', id='searched-for-label'),
-            dcc.Input(id='searched-for-type', type='hidden'),
-            dcc.Input(id='searched-for-domains', type='hidden'),
+            dcc.Store(id='result-id'),
+            # Number of rows searched so far, the visible page is refreshed when it changes
+            dcc.Store(id='result-rows'),
             dash_table.DataTable(
                 id='results-table',
                 columns=get_results_table_columns(publication_type_to_column_title()),
+                data=[],
+                # Results are kept on the server, only the visible page is sent
+                page_action='custom',
+                page_current=0,
+                page_size=page_size,
+                page_count=1,
+                sort_action='custom',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
                 style_cell={
                     'padding': '0.2rem 0.3rem',
                 },
@@ -232,17 +253,31 @@ def get_results_wrapper() -> html.Div:
                     'Points': 'Punkty ustalone na podstawie wybranych dziedzin i daty',
                     'Similarity': 'W jakim stopniu wynik wyszukiwania jest podobny do zapytania',
                 },
+                # Same for every row, so not repeated in tooltip_data
+                tooltip={
+                    'Date': {'value': 'Kliknij, by zobaczyć szczegóły', 'type': 'text'},
+                    'Similarity': {'value': 'Kliknij, by zobaczyć szczegóły', 'type': 'text'},
+                },
                 tooltip_duration=None,
                 tooltip_delay=0,
             ),
             html.Div(
+                # Links to the export routes, files are generated and streamed by the server
                 [dbc.Button(
                     'Eksportuj do .csv',
                     id='button-export',
                     color='info',
                     outline=True,
-                    className='mt-2'
-                ), Download(id='download')],
+                    className='mt-2',
+                    external_link=True,
+                ), dbc.Button(
+                    'Eksportuj do .xlsx',
+                    id='button-export-xlsx',
+                    color='info',
+                    outline=True,
+                    className='mt-2 ml-2',
+                    external_link=True,
+                )],
                 style={'text-align': 'right'}
             ),
         ],
@@ -257,6 +292,37 @@ def get_results_wrapper() -> html.Div:
     return wrapper
 
 
+def get_search_progress() -> html.Div:
+    return html.Div(
+        id='search-progress-wrapper',
+        style={'display': 'none'},
+        children=[
+            html.Div(
+                className='d-flex align-items-center',
+                children=[
+                    dbc.Progress(
+                        id='search-progress',
+                        value=0,
+                        striped=True,
+                        animated=True,
+                        style={'flex': '1', 'height': '1.5rem'},
+                    ),
+                    dbc.Button(
+                        'Przerwij',
+                        id='button-cancel-search',
+                        color='danger',
+                        outline=True,
+                        size='sm',
+                        className='ml-2',
+                    ),
+                ],
+            ),
+            dcc.Interval(id='search-interval', interval=1000, disabled=True),
+            dcc.Store(id='search-job'),
+        ],
+    )
+
+
 def get_extra_buttons() -> dbc.ButtonGroup:
     return dbc.ButtonGroup([
         dbc.Button(
@@ -292,6 +358,7 @@ def get_import_modal() -> dbc.Modal:
                         html.A('wybierz plik', className='text-info', style={'cursor': 'pointer'})
                     ]),
                     id='upload-query',
+                    max_size=config['search'].get('import_max_size', 20_000_000),
                     style={
                         'width': '100%',
                         'height': '2.5rem',
@@ -312,6 +379,9 @@ def get_import_modal() -> dbc.Modal:
                     className='text-monospace',
                     debounce=True,
                 ),
+                # Uploaded files are parsed on the server, the text area shows only their beginning
+                dcc.Store(id='import-upload'),
+                html.Div(id='import-info', className='mt-2 small'),
                 dbc.FormGroup(
                     id='group-cb-import-headers',
                     className='mt-2',
@@ -371,7 +441,6 @@ def get_sidebar():
                     id='starting-info'
                 ),
             ),
-            html.Div(id='sidebar-suggestions', hidden=True)
         ],
         className='bg-light col-3',
         id='sidebar',
@@ -395,6 +464,7 @@ def get_content_column():
                     row_extra_classes='mt-2',
                 ),
                 row_col([get_search_button()], [12], row_extra_classes='mt-3'),
+                row_col([get_search_progress()], [12], row_extra_classes='mt-3'),
                 row_col([get_results_wrapper()], [12], row_extra_classes='mt-5'),
                 row_col([], [], row_extra_classes='content-spacer'),
             ],
@@ -422,6 +492,8 @@ app = dash.Dash(
     title='Punkty ministerialne',
     update_title='⌛ Punkty ministerialne',
 )
+server = app.server
+server.register_blueprint(create_api(batch_search, config['search'].get('api_chunk_size', 1000)))
 app.layout = html.Div(
     children=[
         html.Div(
@@ -449,8 +521,40 @@ def toggle_modal(n1, n2, n3, is_open: bool) -> bool:
     return is_open
 
 
+def get_import_table(import_text: str, upload: Optional[dict]) -> Optional[TableImport]:
+    """
+    :param import_text: content of the import text area
+    :param upload: id and preview of the uploaded file
+    :return: the uploaded table if the text area shows its unchanged preview, otherwise the parsed text area
+    """
+    if upload is not None and import_text == upload['preview']:
+        table = upload_store.get(upload['id'])
+        if table is not None:
+            return table
+    if not import_text:
+        return None
+    return read_table([import_text], config['search'].get('import_max_rows', 200_000))
+
+
+def format_import_info(table: TableImport, header: bool, preview_only: bool) -> list:
+    errors = table.row_errors(header)
+    info = [html.P(f'Liczba wierszy do zaimportowania: {len(table.rows(header))}.', className='mb-1')]
+    if preview_only:
+        info.append(html.P('Powyżej widoczny jest tylko początek pliku. Po zmianie tekstu zaimportowany '
+                           'zostanie sam tekst.', className='mb-1'))
+    if errors:
+        shown = 10
+        info.append(html.Ul(
+            [html.Li(f'Wiersz {line}: {message}') for line, message in errors[:shown]]
+            + ([html.Li(f'… i {len(errors) - shown} innych błędów.')] if len(errors) > shown else []),
+            className='text-danger mb-0',
+        ))
+    return info
+
+
 @app.callback(
     Output('textarea-import', 'value'),
+    Output('import-upload', 'data'),
     Input('upload-query', 'contents'),
 )
 def upload_file(content):
@@ -458,42 +562,30 @@ def upload_file(content):
         raise PreventUpdate
 
     try:
-        _, text = content.split(',')
-        return base64.b64decode(text).decode()
-    except Exception:
+        table = read_table(decode_upload(content), config['search'].get('import_max_rows', 200_000))
+    except (ValueError, binascii.Error):
         raise PreventUpdate
+    return table.preview, {'id': upload_store.add(table), 'preview': table.preview}
 
 
 @app.callback(
     Output('checkbox-import-headers', 'checked'),
+    Output('import-info', 'children'),
     Input('textarea-import', 'value'),
+    Input('checkbox-import-headers', 'checked'),
+    State('import-upload', 'data'),
 )
-def guess_headers(content: str) -> bool:
-    lines = (content or '').strip().split('\n')
-    if len(lines) < 2:
-        return False
-
-    h_line = lines[0]
-    if len(h_line) < 3:
-        return False
-
-    # all of these have the same length
-    known_variants = ['Title;Points', 'Title,Points', 'Title\tPoints']
-    if lines[0][:len(known_variants[0])] in known_variants:
-        # Probably a reimport of exported data
-        return True
+def update_import_info(import_text, header, upload):
+    table = get_import_table(import_text, upload)
+    if table is None:
+        return False, []
 
-    try:
-        dialect = csv.Sniffer().sniff(content.strip())
-    except csv.Error:
-        return False
-
-    header = lines[0].split(str(dialect.delimiter))
-    if len(header) >= 2 and not re.search(r'\d\d', header[1]):
-        # The second column name doesn't look like a date, assume it's a header
-        return True
-
-    return False
+    preview_only = upload is not None and import_text == upload['preview'] and not table.preview_complete
+    triggers = {t['prop_id'] for t in dash.callback_context.triggered}
+    if 'checkbox-import-headers.checked' in triggers:
+        return dash.no_update, format_import_info(table, bool(header), preview_only)
+    # The header is guessed whenever the text changes, the user can override the guess
+    return table.header, format_import_info(table, table.header, preview_only)
 
 
 @app.callback(
@@ -504,8 +596,9 @@ def guess_headers(content: str) -> bool:
     State('search-table', 'columns'),
     State('textarea-import', 'value'),
     State('checkbox-import-headers', 'checked'),
+    State('import-upload', 'data'),
 )
-def update_search_table(add_row_clicks, import_clicks, data, columns, import_text, import_header: bool):
+def update_search_table(add_row_clicks, import_clicks, data, columns, import_text, import_header: bool, upload):
     ctx = dash.callback_context
     if not ctx.triggered:
         button_id = 'No clicks yet'
@@ -519,132 +612,184 @@ def update_search_table(add_row_clicks, import_clicks, data, columns, import_tex
     if button_id != 'button-do-import' or not import_text:
         return data
 
-    try:
-        df = pd.read_csv(
-            StringIO(import_text),
-            names=('Title', 'Date'),
-            header=0 if import_header else None,
-            parse_dates=False,
-            quotechar='"',
-            sep=None,
-            dtype='str',
-            skip_blank_lines=True,
-            usecols=[0, 1],
-            engine='python',
-        ).fillna('')
-    except Exception:
-        # This should properly report the error, but meh, we can live without it
+    table = get_import_table(import_text, upload)
+    if table is None:
         raise PreventUpdate
-    
-    data = df.to_dict('records')
-    return data
+    return table.rows(bool(import_header))
+
+
+def store_search_results(rows: List[dict], start: int, result_id: str, publication_type: str,
+                         domains: List[str]) -> int:
+    """
+    Searches for the rows and saves the results, with their tooltips, in the result store.
+    :param start: number of the first row in the whole search table
+    :return: number of stored rows
+    """
+    stored = []
+    for result in batch_search.search(rows, publication_type, domains):
+        date = result.date
+        if publication_type == 'czasopisma' and result.last_date < '2019-12-18':
+            date = date + ' '
+        stored.append({
+            'Title': result.name,
+            'Date': date,
+            'Points': result.points,
+            'Similarity': round(result.similarity, 2),
+            'PointsHistory': result.points_history,
+            'QueryTitle': result.query_title,
+            'Suggestions': result.suggestions,
+            'TitleTooltip': format_suggestions_based_on_search(result.query_title, result.hits),
+            'PointsTooltip': format_points_tooltip_based_on_search(
+                result.domains_match, result.name, result.last_date, publication_type
+            ),
+        })
+    result_store.add_rows(result_id, start, stored)
+    return len(stored)
+
+
+def get_results_page(result_id: str, page_current: int, sort_by: List[dict],
+                     filter_query: str) -> Tuple[List[dict], List[dict], int, int]:
+    """
+    :param page_current: number of the requested page, the last page is returned if there are fewer pages
+    :param sort_by: sort_by of the results table
+    :param filter_query: filter_query of the results table, ignored if it's not valid like in the DataTable
+    :return: rows of the page, their tooltips, the number of pages and the number of the returned page
+    """
+    try:
+        rows, count = result_store.query_rows(result_id, sort_by, filter_query, page_current * page_size, page_size)
+    except ValueError:
+        filter_query = ''
+        rows, count = result_store.query_rows(result_id, sort_by, filter_query, page_current * page_size, page_size)
+    page_count = max(math.ceil(count / page_size), 1)
+    if page_current >= page_count:
+        page_current = page_count - 1
+        rows, count = result_store.query_rows(result_id, sort_by, filter_query, page_current * page_size, page_size)
+
+    data = [
+        {'id': r['id'], 'Title': r['Title'], 'Date': r['Date'], 'Points': [r['Points']], 'Similarity': r['Similarity']}
+        for r in rows
+    ]
+    tooltip_data = [
+        {
+            'Title': {'value': r['TitleTooltip'], 'type': 'markdown'},
+            'Points': {'value': r['PointsTooltip'], 'type': 'markdown'},
+        }
+        for r in rows
+    ]
+    return data, tooltip_data, page_count, page_current
 
 
 @app.callback(
     Output('results-table', 'columns'),
-    Output('results-table', 'data'),
-    Output('results-table', 'tooltip_data'),
     Output('searched-for-label', 'children'),
-    Output('searched-for-type', 'value'),
-    Output('searched-for-domains', 'value'),
-    Output('sidebar-suggestions', 'value'),
+    Output('result-id', 'data'),
+    Output('result-rows', 'data'),
+    Output('search-job', 'data'),
+    Output('search-interval', 'disabled'),
+    Output('search-progress-wrapper', 'style'),
+    Output('search-progress', 'value'),
+    Output('search-progress', 'children'),
     Input('button-search', 'n_clicks'),
+    Input('search-interval', 'n_intervals'),
+    Input('button-cancel-search', 'n_clicks'),
     State('domain-input', 'value'),
     State('publication-type-input', 'value'),
     State('search-table', 'data'),
+    State('search-job', 'data'),
 )
-def search(n_clicks, domains, publication_type, search_table_data):
-    if n_clicks is None:
+def search(n_clicks, n_intervals, cancel_clicks, domains, publication_type, search_table_data, job):
+    ctx = dash.callback_context
+    trigger = ctx.triggered[0]['prop_id'].split('.')[0] if ctx.triggered else None
+
+    if trigger == 'button-search':
+        if n_clicks is None:
+            raise PreventUpdate
+        result_id = result_store.create(publication_type, domains)
+        job = {'id': None, 'result': result_id, 'type': publication_type, 'domains': domains}
+        total = len(search_table_data)
+        if total <= config['search'].get('background_threshold', 500):
+            store_search_results(search_table_data, 0, result_id, publication_type, domains)
+            return search_outputs(job, done=True, progress=(total, total), new_result=True)
+
+        # Large tables are searched in the background, the results are polled by the interval
+        job['id'] = search_jobs.start(
+            search_table_data,
+            partial(store_search_results, result_id=result_id, publication_type=publication_type, domains=domains),
+            config['search'].get('chunk_size', 250),
+        )
+        return search_outputs(job, done=False, progress=(0, total), new_result=True)
+
+    if job is None or job['id'] is None:
         raise PreventUpdate
+    if trigger == 'button-cancel-search':
+        search_jobs.cancel(job['id'])
 
-    with Cursor(engine) as db_cursor:
-        if publication_type == 'czasopisma':
-            query_function = partial(ir.query_journals, domains=domains)
-
-        elif publication_type == 'konferencje':
-            query_function = ir.query_conferences
-
-        elif publication_type == 'monografie':
-            query_function = ir.query_monographs
-
-        else:
-            raise RuntimeError("Unknown publication type!")
-
-        data = []
-        tooltip_data = []
-        suggestions = []
-        for row in search_table_data:
-            if not re.match(r'^\d{4}(-\d\d-\d\d)?$', row['Date']):
-                row['Date'] = pd.to_datetime('today').strftime('%Y-%m-%d')
-            elif re.match(r'^\d{4}$', row['Date']):
-                row['Date'] = row['Date'] + '-01-01'
-            df = query_function(row["Title"])
-            try:
-                domains_match = True
-                name = df.name.iloc[0]
-                sim = df.score.iloc[0]
-                if publication_type == 'czasopisma':
-                    domains_for_selected_row = set(db_cursor.get_journal_domains(name))
-                elif publication_type == 'konferencje':
-                    domains_for_selected_row = set(db_cursor.get_conference_domains(name))
-                date_points = db_cursor.get_date_points(name, publication_type)
-                points_for_selected_date = None
-                for _, date, points in date_points:
-                    if points_for_selected_date is None:
-                        last_date = date
-                        points_for_selected_date = points
-                    if date > row['Date']:
-                        if publication_type != 'monografie' and len(domains_for_selected_row & set(domains)) == 0:
-                            domains_match = False
-                            points_for_selected_date = 0
-                        break
-                    else:
-                        last_date = date
-                        points_for_selected_date = points
-            except AttributeError as e:
-                if 'name' in str(e):  # No matches have been found for this title
-                    sim = 0.
-                    name = ''
-                    date_points = []
-                    points_for_selected_date = 0
-                else:
-                    raise e
-
-            try:
-                elems = df[['name', 'score']].values.tolist()[1:]
-            except:
-                elems = []
-
-            suggestions.append((row["Title"], elems))
-            date_points.reverse()
-            if publication_type == 'czasopisma' and last_date < '2019-12-18':
-                row['Date'] = row['Date'] + ' '
-            data.append({
-                'Title': name,
-                'Date': row["Date"],
-                'Points': [points_for_selected_date],
-                'PointsHistory': date_points,
-                'Similarity': round(float(sim), 2)
-            })
-            tooltip_data.append({
-                'Title': {
-                    'value': format_suggestions_based_on_search(row['Title'], df),
-                    'type': 'markdown',
-                },
-                'Points': {
-                    'value': format_points_tooltip_based_on_search(domains_match, name, last_date, publication_type),
-                    'type': 'markdown'
-                },
-                'Date': {'value': 'Kliknij, by zobaczyć szczegóły', 'type': 'text'},
-                'Similarity': {'value': 'Kliknij, by zobaczyć szczegóły', 'type': 'text'},
-            })
+    state = search_jobs.get(job['id'])
+    if state is None:
+        raise PreventUpdate
+    if state.status == 'cancelled':
+        status = 'Wyszukiwanie przerwane.'
+    elif state.status == 'failed':
+        status = 'Wyszukiwanie nie powiodło się.'
+    else:
+        status = None
+    return search_outputs(job, state.finished, (state.done, state.total), status)
+
+
+def search_outputs(job: dict, done: bool, progress=(0, 0), status: str = None, new_result: bool = False) -> tuple:
+    """
+    :param job: result id, publication type and domains of the search, and id of the background job
+    :param done: whether the search has finished
+    :param progress: number of rows searched so far and of all rows
+    :param status: message shown if the search didn't finish successfully
+    :param new_result: whether the search has just started, the results table goes back to the first page then
+    :return: outputs of the search callback
+    """
+    publication_type, domains = job['type'], job['domains']
 
     searched_for_label = f'Szukany rodzaj publikacji: {publication_type}.'
     if publication_type != 'monografie' and domains:
         searched_for_label += f" Dziedziny: {', '.join(domains)}."
+    if status is not None:
+        searched_for_label += f' {status}'
 
     columns = get_results_table_columns(publication_type_to_column_title(publication_type))
-    return columns, data, tooltip_data, searched_for_label, publication_type, domains, suggestions
+    searched, total = progress
+    progress_style = {'display': 'none'} if done else {'display': 'block'}
+    return (
+        columns, searched_for_label, job['result'] if new_result else dash.no_update, searched,
+        job, done, progress_style, 100 * searched / total if total > 0 else 0, f'{searched} / {total}',
+    )
+
+
+@app.callback(
+    Output('results-table', 'data'),
+    Output('results-table', 'tooltip_data'),
+    Output('results-table', 'page_count'),
+    Output('results-table', 'page_current'),
+    Input('result-id', 'data'),
+    Input('result-rows', 'data'),
+    Input('results-table', 'page_current'),
+    Input('results-table', 'sort_by'),
+    Input('results-table', 'filter_query'),
+    Input('results-table', 'data_timestamp'),
+    State('results-table', 'data'),
+    State('results-table', 'data_previous'),
+)
+def update_results_page(result_id, result_rows, page_current, sort_by, filter_query, data_timestamp, data,
+                        data_previous):
+    if result_id is None:
+        raise PreventUpdate
+
+    triggers = {t['prop_id'] for t in dash.callback_context.triggered}
+    if 'results-table.data_timestamp' in triggers and data_previous is not None:
+        # Rows deleted from the visible page are deleted from the stored results
+        remaining = {row['id'] for row in data}
+        result_store.delete_rows(result_id, [row['id'] for row in data_previous if row['id'] not in remaining])
+    if 'result-id.data' in triggers or 'results-table.filter_query' in triggers:
+        page_current = 0
+
+    return get_results_page(result_id, page_current or 0, sort_by, filter_query)
 
 
 @app.callback(
@@ -681,24 +826,17 @@ def hide_results_table_before_search_click(n_clicks):
 @app.callback(
     Output('sidebar-content', 'children'),
     Input('results-table', 'selected_cells'),
-    State('searched-for-type', 'value'),
-    State('searched-for-domains', 'value'),
-    State('results-table', 'data'),
-    State('sidebar-content', 'children'),
-    State('sidebar-suggestions', 'value')
+    State('result-id', 'data'),
 )
-def update_sidebar_on_row_click(
-        selected_cells,
-        publication_type,
-        searched_domains,
-        data,
-        current_children,
-        suggestions
-):
-    if selected_cells is None or len(selected_cells) == 0:
-        return current_children
-
-    selected_row = data[selected_cells[0]['row']]
+def update_sidebar_on_row_click(selected_cells, result_id):
+    if selected_cells is None or len(selected_cells) == 0 or result_id is None:
+        raise PreventUpdate
+
+    info = result_store.get_info(result_id)
+    selected_row = result_store.get_row(result_id, selected_cells[0]['row_id'])
+    if info is None or selected_row is None:
+        raise PreventUpdate
+    publication_type, searched_domains = info['type'], info['domains']
 
     table_tooltips = [
         'Data opublikowania rozporządzenia',
@@ -711,6 +849,7 @@ def update_sidebar_on_row_click(
         ]))
     ]
 
+    history = [(store.statement_date_strings[s], points) for s, points in selected_row['PointsHistory']]
     past_points = [
         html.Tr([
             html.Td(date, title=table_tooltips[0]),
@@ -723,18 +862,16 @@ def update_sidebar_on_row_click(
             html.Td(date, title=table_tooltips[0]),
             html.Td(points, title=table_tooltips[1]),
         ])
-        for _, date, points in selected_row['PointsHistory']
+        for date, points in history
     ]
 
     table_body = [html.Tbody(past_points)]
     title = selected_row['Title']
 
     domains = []
-    with Cursor(engine) as cursor:
-        if publication_type == 'czasopisma':
-            domains = cursor.get_journal_domains(selected_row['Title'])
-        elif publication_type == 'konferencje':
-            domains = cursor.get_conference_domains(selected_row['Title'])
+    entry_id = store.get_id(selected_row['Title'], publication_type)
+    if entry_id is not None:
+        domains = store.get_entry_domains(entry_id, publication_type)
 
     result = [
         html.H5(title),
@@ -752,27 +889,69 @@ def update_sidebar_on_row_click(
             ),
         ])
 
-    original_name, additional_list = suggestions[selected_cells[0]['row']]
     suggestion_list = [
-        dcc.Markdown(format_suggestions_based_on_search_sidebar(original_name, additional_list))
+        dcc.Markdown(format_suggestions_based_on_search_sidebar(
+            selected_row['QueryTitle'], selected_row['Suggestions']
+        ))
     ]
     result.extend(suggestion_list)
     return result
 
 
 @app.callback(
-    Output('download', 'data'),
-    Input('button-export', 'n_clicks'),
-    State('results-table', 'data')
+    Output('button-export', 'href'),
+    Output('button-export-xlsx', 'href'),
+    Input('result-id', 'data'),
+    Input('results-table', 'sort_by'),
+    Input('results-table', 'filter_query'),
 )
-def export_button_click(n_clicks, data):
-    if n_clicks is None:
-        return None
+def update_export_links(result_id, sort_by, filter_query):
+    if result_id is None:
+        raise PreventUpdate
+
+    # All pages are exported, sorted and filtered like the results table, without deleted rows
+    query = urlencode({'sort_by': json.dumps(sort_by or []), 'filter_query': filter_query or ''})
+    return f'/export/{result_id}.csv?{query}', f'/export/{result_id}.xlsx?{query}'
+
 
-    df = pd.DataFrame(data)
-    df.drop(columns=['PointsHistory', 'Similarity'], inplace=True)
-    df['Points'] = df['Points'].apply(lambda x: x[0])
-    return send_data_frame(df.to_csv, 'points.csv', sep=';', index=False)
+@server.route('/export/<result_id>.<file_format>')
+def export_results(result_id: str, file_format: str):
+    if file_format not in ('csv', 'xlsx') or result_store.get_info(result_id) is None:
+        abort(404)
+    try:
+        sort_by = json.loads(request.args.get('sort_by', '[]'))
+        try:
+            rows = result_store.iter_rows(result_id, EXPORT_COLUMNS, sort_by, request.args.get('filter_query', ''))
+        except ValueError:
+            # Like in the results table, an invalid filter is ignored
+            rows = result_store.iter_rows(result_id, EXPORT_COLUMNS, sort_by)
+    except (ValueError, TypeError, KeyError):
+        abort(400)
+
+    if file_format == 'csv':
+        return Response(
+            stream_with_context(csv_chunks(rows, EXPORT_COLUMNS)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=points.csv'},
+        )
+
+    # A zip archive can't be streamed while it's written, so the whole workbook
+    # is written to disk before the first byte is sent, only reading it is streamed
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    try:
+        write_xlsx(rows, EXPORT_COLUMNS, path)
+    except Exception:
+        os.remove(path)
+        raise
+    response = Response(
+        file_chunks(path),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers={'Content-Disposition': 'attachment; filename=points.xlsx'},
+    )
+    # Unlike the end of the generator, this also runs for HEAD requests and early disconnects
+    response.call_on_close(lambda: os.remove(path))
+    return response
 
 
 if __name__ == "__main__":
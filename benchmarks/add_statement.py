@@ -0,0 +1,89 @@
+"""
+Measures adding the last journal statement in the config to a built
+database with add_journal_statement, versus building the journal and
+conference tables again, and exits with an error if they give different
+tables. The same is checked for a spreadsheet without a conference sheet.
+Spreadsheets are parsed beforehand, with the cache of parsed sheets.
+
+Run from the repository root, with the spreadsheets in data_path/journals:
+    python -m benchmarks.add_statement
+"""
+import copy
+import os
+import time
+
+from sqlalchemy import create_engine
+
+from build_db import add_journal_statement, conference_to_db, journal_to_db
+from src import Config
+from src.data_preprocessing.journals import read_journal_files
+from src.orm import Base
+
+
+def build(config: Config, files: list):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    journal_to_db(engine, config, files)
+    conference_to_db(engine, config, files)
+    return engine
+
+
+def read_tables(engine) -> dict:
+    """
+    :return: rows of every table by name, in any order
+    """
+    with engine.connect() as connection:
+        tables = [t for t, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+        return {t: sorted(connection.execute(f'SELECT * FROM "{t}"').fetchall(), key=repr) for t in tables}
+
+
+def compare(config: Config, files: list, last) -> list:
+    """
+    Adds the last statement to a database of the previous ones and prints
+    both timings and the tables.
+    :return: names of tables which differ from a full build
+    """
+    dates = [entry['date'] for entry in config['journals']]
+    # The config of the database before the last statement was published
+    previous = copy.copy(config)
+    previous._config = dict(config._config, journals=config['journals'][:-1])
+
+    start = time.perf_counter()
+    expected = read_tables(build(config, files))
+    print(f"{f'full build of {len(dates)} statements':<40} {time.perf_counter() - start:7.2f}s")
+
+    engine = build(previous, [f for f in files if f is not last])
+    start = time.perf_counter()
+    changed = add_journal_statement(engine, config, last)
+    print(f"{f'add statement {last.date}':<40} {time.perf_counter() - start:7.2f}s "
+          f"({', '.join(f'{len(ids)} {t}' for t, ids in changed.items())} changed)")
+
+    tables = read_tables(engine)
+    failed = [table for table in expected if tables[table] != expected[table]]
+    for table in expected:
+        print(f"{table:<22} {len(expected[table]):>7} rows {'DIFFERENT' if table in failed else 'same'}")
+    return failed
+
+
+def main():
+    config = Config()
+    data_path = os.path.join(config['data_path'], 'journals')
+    dates = [entry['date'] for entry in config['journals']]
+    files = read_journal_files(data_path, config.get('cache_path'), dates=dates)
+    last = next(f for f in files if f.date == dates[-1])
+
+    failed = [f'{table} ({last.date})' for table in compare(config, files, last)]
+
+    # A spreadsheet without a conference sheet
+    print(f'\nWithout the conference sheet of {last.date}')
+    no_conferences = copy.copy(last)
+    no_conferences.conferences = None
+    files = [no_conferences if f is last else f for f in files]
+    failed += [f'{table} ({last.date} without conferences)' for table in compare(config, files, no_conferences)]
+
+    if failed:
+        raise SystemExit(f"Adding the statement gives other tables than a full build: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
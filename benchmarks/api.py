@@ -0,0 +1,59 @@
+"""
+Measures the throughput of the scoring API: 10k journals posted as NDJSON
+and as a JSON list, resolved in chunks of 100 and 1000 items, and 1k of
+them resolved one by one, through the Flask test client. The query cache
+is disabled, so every distinct title is searched for.
+
+Run from the repository root, with the database and the text index built:
+    python -m benchmarks.api
+"""
+import json
+import time
+
+from flask import Flask
+from sqlalchemy import create_engine
+
+from benchmarks.search import sample_rows
+from src import Config
+from src.api import create_api
+from src.points import PointsStore
+from src.search import BatchSearch
+from src.text_index import IndexReader
+from src.text_index.cache import LRUCache
+
+ROWS = 10_000
+# Chunk sizes with the number of items posted
+CHUNK_SIZES = [(1, 1000), (100, ROWS), (1000, ROWS)]
+
+
+def main():
+    config = Config()
+    engine = create_engine(f"sqlite:///{config['db_file']}")
+    reader = IndexReader(config)
+    batch_search = BatchSearch(reader, PointsStore.from_engine(engine))
+    items = [
+        {'title': r['Title'], 'date': r['Date'], 'type': 'czasopisma', 'domains': ['matematyka', 'informatyka']}
+        for r in sample_rows(engine, ROWS)
+    ]
+
+    for chunk_size, count in CHUNK_SIZES:
+        server = Flask(__name__)
+        server.register_blueprint(create_api(batch_search, chunk_size))
+        client = server.test_client()
+        ndjson = ''.join(json.dumps(item) + '\n' for item in items[:count])
+        for label, kwargs in [
+            ('NDJSON', {'data': ndjson, 'content_type': 'application/x-ndjson'}),
+            ('JSON', {'json': items[:count]}),
+        ]:
+            reader.cache = LRUCache(0)
+            start = time.perf_counter()
+            response = client.post('/api/v1/score', **kwargs)
+            body = response.get_data()
+            elapsed = time.perf_counter() - start
+            results = body.count(b'\n') if label == 'NDJSON' else len(json.loads(body))
+            print(f'{label:<7} chunks of {chunk_size:>5} {results:>6} results {elapsed:7.2f}s '
+                  f'{results / elapsed:8.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
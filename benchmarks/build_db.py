@@ -0,0 +1,92 @@
+"""
+Measures the journal and conference stage of build_db.py: reading every
+sheet with pd.read_excel, as before, versus reading each spreadsheet once
+with an empty (cold) and a filled (warm) cache of parsed sheets, the
+whole stage, parsing and loading into an in-memory database, cold and warm,
+and the cold stage by number of worker processes. Exits with an error if
+the database depends on the cache or on the number of workers.
+
+Run from the repository root, with the spreadsheets in data_path/journals:
+    python -m benchmarks.build_db
+"""
+import os
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from build_db import conference_to_db, journal_to_db
+from src import Config
+from src.data_preprocessing.journals import read_journal_files
+from src.orm import Base
+
+
+def read_excel_sheets(data_path: str) -> int:
+    # Like the loaders did before, the journal sheet of every file and the conference sheet of recent ones
+    sheets = 0
+    for filename in os.listdir(data_path):
+        pd.read_excel(os.path.join(data_path, filename), 0, header=0)
+        sheets += 1
+        if int(filename[-9:-5]) > 2017:
+            pd.read_excel(os.path.join(data_path, filename), 1, header=0)
+            sheets += 1
+    return sheets
+
+
+def build(config: Config, data_path: str, cache_path: str, workers: int = 1) -> list:
+    """
+    :return: contents of all tables
+    """
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    files = read_journal_files(data_path, cache_path, workers)
+    journal_to_db(engine, config, files)
+    conference_to_db(engine, config, files)
+    with engine.connect() as connection:
+        tables = [t for t, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+        return [connection.execute(f'SELECT * FROM "{t}"').fetchall() for t in tables]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    config = Config()
+    data_path = os.path.join(config['data_path'], 'journals')
+    print(f'{len(os.listdir(data_path))} spreadsheets')
+    _, elapsed = timed(read_excel_sheets, data_path)
+    print(f"{'pd.read_excel per sheet (before)':<50} {elapsed:7.2f}s")
+    with tempfile.TemporaryDirectory() as cache_path:
+        for label in ['cold', 'warm']:
+            _, elapsed = timed(read_journal_files, data_path, cache_path)
+            print(f"{f'parse once, {label} cache':<50} {elapsed:7.2f}s")
+    failed = []
+    expected = None
+    with tempfile.TemporaryDirectory() as cache_path:
+        for label in ['cold', 'warm']:
+            tables, elapsed = timed(build, config, data_path, cache_path)
+            expected = expected or tables
+            print(f"{f'journals and conferences, {label} cache':<50} {elapsed:7.2f}s"
+                  f"{'' if tables == expected else ' DIFFERENT DATABASE'}")
+            if tables != expected:
+                failed.append(f'{label} cache')
+
+    print(f'\n{os.cpu_count()} CPUs')
+    for workers in sorted({1, 2, 4, os.cpu_count()}):
+        with tempfile.TemporaryDirectory() as cache_path:
+            tables, elapsed = timed(build, config, data_path, cache_path, workers)
+        print(f"{f'journals and conferences, cold cache, {workers} workers':<50} {elapsed:7.2f}s"
+              f"{'' if tables == expected else ' DIFFERENT DATABASE'}")
+        if tables != expected:
+            failed.append(f'{workers} workers')
+
+    if failed:
+        raise SystemExit(f"The database differs from a cold build with 1 worker: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures the peak memory and time of exporting a 100k-row result: loading
+all rows into a DataFrame and writing it with pandas, as the export did
+before, versus streaming rows from the result store into CSV chunks and
+into a write-only .xlsx workbook. Uses synthetic rows, so neither the
+database nor the text index is needed.
+
+Run from the repository root:
+    python -m benchmarks.export
+"""
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.result_store import synthetic_rows
+from src.search import ResultStore
+from src.search.export import EXPORT_COLUMNS, csv_chunks, write_xlsx
+
+ROWS = 100_000
+
+
+def pandas_csv(store: ResultStore, result_id: str, directory: str) -> int:
+    rows, _ = store.query_rows(result_id)
+    return len(pd.DataFrame(rows, columns=EXPORT_COLUMNS).to_csv(sep=';', index=False))
+
+
+def pandas_xlsx(store: ResultStore, result_id: str, directory: str) -> int:
+    rows, _ = store.query_rows(result_id)
+    path = os.path.join(directory, 'pandas.xlsx')
+    pd.DataFrame(rows, columns=EXPORT_COLUMNS).to_excel(path, index=False)
+    return os.path.getsize(path)
+
+
+def streamed_csv(store: ResultStore, result_id: str, directory: str) -> int:
+    # Like a streamed response, chunks are sent and dropped one by one
+    return sum(len(chunk) for chunk in csv_chunks(store.iter_rows(result_id, EXPORT_COLUMNS), EXPORT_COLUMNS))
+
+
+def streamed_xlsx(store: ResultStore, result_id: str, directory: str) -> int:
+    path = os.path.join(directory, 'streamed.xlsx')
+    write_xlsx(store.iter_rows(result_id, EXPORT_COLUMNS), EXPORT_COLUMNS, path)
+    return os.path.getsize(path)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(os.path.join(directory, 'results.db'))
+        result_id = store.create('czasopisma', ['matematyka'])
+        rows = synthetic_rows(ROWS, random.Random(0))
+        for i in range(0, ROWS, 1000):
+            store.add_rows(result_id, i, rows[i:i + 1000])
+        del rows
+
+        print(f'{ROWS} rows')
+        for label, export in [
+            ('pandas .csv (before)', pandas_csv),
+            ('streamed .csv', streamed_csv),
+            ('pandas .xlsx', pandas_xlsx),
+            ('write-only .xlsx', streamed_xlsx),
+        ]:
+            start = time.perf_counter()
+            size = export(store, result_id, directory)
+            elapsed = time.perf_counter() - start
+            # Measured separately, tracing allocations slows everything down
+            tracemalloc.start()
+            export(store, result_id, directory)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'{label:<22} {size / 2 ** 20:6.1f} MiB file {elapsed:7.2f}s {peak / 2 ** 20:8.1f} MiB peak')
+
+
+if __name__ == '__main__':
+    main()
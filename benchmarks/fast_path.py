@@ -0,0 +1,75 @@
+"""
+Reports how many searched journal titles are resolved by their normalized
+key, without the full-text search, and how much faster those batches are.
+Uses the titles of misc/import_test_cases and titles from the database with
+their case, diacritics or punctuation changed, or with a suffix in
+parentheses added.
+
+Run from the repository root, with the database and the text index built:
+    python -m benchmarks.fast_path
+"""
+import glob
+import random
+import time
+import unicodedata
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from src import Config
+from src.text_index import IndexReader
+from src.text_index.cache import LRUCache
+
+SAMPLE_SIZE = 2000
+
+
+def test_case_titles() -> list:
+    titles = []
+    for path in sorted(glob.glob('misc/import_test_cases/*')):
+        df = pd.read_csv(path, sep=None, engine='python', header=None, dtype=str)
+        titles.extend(df[0].dropna())
+    return titles
+
+
+def variant(title: str, rnd: random.Random) -> str:
+    change = rnd.randrange(5)
+    if change == 0:
+        return title.upper()
+    elif change == 1:
+        return ''.join(c for c in unicodedata.normalize('NFKD', title) if not unicodedata.combining(c))
+    elif change == 2:
+        return title.replace(' ', ', ', 1) + '.'
+    elif change == 3:
+        return title + ' (Online)'
+    # Misspelled, needs the full-text search
+    return title[:-2]
+
+
+def run(reader: IndexReader, label: str, titles: list):
+    reader.cache = LRUCache(0)
+    before = reader.fast_path_stats()
+    start = time.perf_counter()
+    reader.search_many('czasopisma', titles)
+    elapsed = time.perf_counter() - start
+    after = reader.fast_path_stats()
+    hits, misses = after['hits'] - before['hits'], after['misses'] - before['misses']
+    print(f'{label:<20} {len(titles):>6} titles {hits / max(hits + misses, 1):7.1%} by key {elapsed:8.2f}s')
+
+
+def main():
+    config = Config()
+    engine = create_engine(f"sqlite:///{config['db_file']}")
+    with engine.connect() as con:
+        titles = [r[0] for r in con.execute(text('SELECT title FROM Journals'))]
+    rnd = random.Random(0)
+    variants = [variant(t, rnd) for t in rnd.sample(titles, min(len(titles), SAMPLE_SIZE))]
+
+    reader = IndexReader(config)
+    run(reader, 'import test cases', test_case_titles())
+    run(reader, 'title variants', variants)
+    stats = reader.fast_path_stats()
+    print(f"Total: {stats['hits']} by key, {stats['misses']} full-text, hit rate {stats['hit_rate']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
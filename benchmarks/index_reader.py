@@ -0,0 +1,58 @@
+"""
+Micro-benchmark of IndexReader queries: opening a searcher and parsing the
+query for every call versus the long-lived searchers and the parsed query
+cache, and single queries versus one search_many call that rescores all
+candidates together. The result cache is disabled for the measurement.
+
+Run from the repository root, with the text index built:
+    python -m benchmarks.index_reader
+"""
+import os
+import random
+import timeit
+
+import jellyfish
+import whoosh.index
+
+from src import Config
+from src.text_index import IndexReader
+from src.text_index.cache import LRUCache
+
+REPEAT = 3
+SAMPLE_SIZE = 100
+
+
+def main():
+    config = Config()
+    ir = IndexReader(config)
+    ir.cache = LRUCache(0)
+
+    index = whoosh.index.open_dir(os.path.join(config['search']['index_path'], 'journals'))
+    with index.searcher() as s:
+        names = [fields['name'] for fields in s.all_stored_fields()]
+    texts = random.Random(0).sample(names, min(len(names), SAMPLE_SIZE))
+
+    def per_query_searcher():
+        # The previous implementation: a new searcher and a new parsed query every time
+        for text in texts:
+            with index.searcher() as s:
+                for hit in s.search(ir.name_parser.parse(text), limit=6):
+                    jellyfish.jaro_winkler_similarity(hit['name'].lower(), text.lower())
+
+    def long_lived_searcher():
+        for text in texts:
+            ir.query_journals(text, [])
+
+    def batched():
+        ir.search_many('czasopisma', texts, [])
+
+    # Fill the parsed query cache, texts repeat in real traffic
+    long_lived_searcher()
+    for label, f in [('searcher per query', per_query_searcher), ('long-lived searcher', long_lived_searcher),
+                     ('batched rescoring', batched)]:
+        best = min(timeit.repeat(f, number=1, repeat=REPEAT))
+        print(f'{label:<22} {best / len(texts) * 1e3:8.3f} ms/query')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compares jaro_winkler_scores, which maps jellyfish's C implementation over
+distinct pairs, with a Jaro-Winkler vectorized with numpy over padded
+arrays of code points, one step per character of the longest candidate.
+Both give bit-identical scores, but the numpy version is slower: the
+matching of characters is sequential, so it still loops in Python over
+positions, and every step touches the whole padded batch.
+
+Run from the repository root:
+    python -m benchmarks.jaro_winkler
+"""
+import random
+import time
+
+import numpy as np
+
+from src.text_index.rescoring import jaro_winkler_scores
+
+PAIRS = 6000
+WORDS = ('journal of applied mathematics informatics studia intelligence zeszyty naukowe '
+         'łódzkie przegląd review international').split()
+
+
+def code_points(strings: list):
+    """
+    :return: code points padded with zeros, one row per string, and lengths of strings
+    """
+    lengths = np.array([len(s) for s in strings])
+    padded = np.zeros((len(strings), max(lengths.max(), 1)), dtype=np.int32)
+    for row, s in enumerate(strings):
+        padded[row, :len(s)] = np.frombuffer(s.encode('utf-32-le'), dtype=np.int32)
+    return padded, lengths
+
+
+def numpy_scores(pairs: list) -> list:
+    # Same steps as jellyfish, the candidate is its first string
+    a, len_a = code_points([candidate for _, candidate in pairs])
+    b, len_b = code_points([query for query, _ in pairs])
+    rows = np.arange(len(pairs))
+    columns = np.arange(b.shape[1])
+    search_range = np.maximum(np.maximum(len_a, len_b) // 2 - 1, 0)
+    flags_a = np.zeros(a.shape, dtype=bool)
+    flags_b = np.zeros(b.shape, dtype=bool)
+    for i in range(a.shape[1]):
+        # The first unmatched equal character of b within the search range
+        matches = (b == a[:, i:i + 1]) & ~flags_b & (i < len_a)[:, None] \
+            & (columns >= (i - search_range)[:, None]) & (columns <= np.minimum(i + search_range, len_b - 1)[:, None])
+        found = matches.any(axis=1)
+        flags_b[rows[found], matches.argmax(axis=1)[found]] = True
+        flags_a[found, i] = True
+
+    common = flags_a.sum(axis=1)
+    transpositions = np.array([
+        np.count_nonzero(a[r][flags_a[r]] != b[r][flags_b[r]]) // 2 for r in rows
+    ])
+    c = common.astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = (c / len_a + c / len_b + (c - transpositions) / c) / 3
+
+    prefix = np.zeros(len(pairs), dtype=int)
+    same = np.ones(len(pairs), dtype=bool)
+    for i in range(min(4, a.shape[1], b.shape[1])):
+        same &= (i < len_a) & (i < len_b) & (a[:, i] == b[:, i])
+        prefix += same
+    boost = (weight > 0.7) & (len_a > 3) & (len_b > 3) & (prefix > 0)
+    weight = np.where(boost, weight + prefix * 0.1 * (1.0 - weight), weight)
+    return np.where(common == 0, 0.0, weight).tolist()
+
+
+def main():
+    rnd = random.Random(0)
+    pairs = [
+        tuple(' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 8))) for _ in range(2))
+        for _ in range(PAIRS)
+    ]
+    results = {}
+    for label, score in [('jellyfish, distinct pairs', jaro_winkler_scores), ('numpy, padded arrays', numpy_scores)]:
+        start = time.perf_counter()
+        results[label] = score(pairs)
+        elapsed = time.perf_counter() - start
+        print(f'{label:<26} {PAIRS} pairs {elapsed * 1000:7.1f}ms {elapsed / PAIRS * 1e6:6.2f}us/pair')
+    expected, scores = results.values()
+    different = sum(x != y for x, y in zip(expected, scores))
+    if different > 0:
+        raise SystemExit(f'{different} scores differ from jellyfish')
+    print('Scores are identical')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+Compares the journal and conference loaders of build_db.py with the ones
+they replaced, which grew frames with DataFrame.append, cleaned titles with
+three str.extract passes and joined frames on titles. Checks that both give
+the same tables, then times both, with their peak memory, on the
+spreadsheets in data_path/journals (the 2019, 2021 and 2017 statements).
+Spreadsheets are parsed beforehand, with the cache of parsed sheets.
+
+Ids are now assigned in the order of statements, oldest first, so that
+adding a statement doesn't change them, so tables are compared with ids
+replaced by titles and domain names. Domains of a journal are now taken
+from its newest statement only, so JournalDomains may lack links set by
+older statements, but must not have any others. Exits with an error on
+any other difference.
+
+Run from the repository root, with the spreadsheets in data_path/journals:
+    python -m benchmarks.loaders
+"""
+import os
+import time
+import tracemalloc
+import warnings
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from build_db import conference_to_db, journal_to_db
+from src import Config
+from src.data_preprocessing.journals import JournalStatementFile, read_journal_files
+from src.orm import Base
+from src.text_index.normalization import BRACKETED_SUFFIX, PARENTHESIZED_SUFFIX, TRAILING_SPACES, normalize_issn, \
+    normalize_name
+
+# Rows of tables with ids replaced by titles and domain names
+TABLES = {
+    'GovernmentStatements': 'SELECT * FROM GovernmentStatements',
+    'Domains': 'SELECT name FROM Domains',
+    'Journals': 'SELECT title, name_key FROM Journals',
+    'JournalDatePoints': 'SELECT j.title, d.government_statement_id, d.points FROM JournalDatePoints d '
+                         'JOIN Journals j ON j.id = d.journal_id',
+    'JournalDomains': 'SELECT j.title, m.name FROM JournalDomains d '
+                      'JOIN Journals j ON j.id = d.journal_id JOIN Domains m ON m.id = d.domain_id',
+    'JournalIdentifiers': 'SELECT j.title, i.issn FROM JournalIdentifiers i JOIN Journals j ON j.id = i.journal_id',
+    'Conferences': 'SELECT title, name_key FROM Conferences',
+    'ConferenceDatePoints': 'SELECT c.title, d.government_statement_id, d.points FROM ConferenceDatePoints d '
+                            'JOIN Conferences c ON c.id = d.conference_id',
+    'ConferenceDomains': 'SELECT c.title, m.name FROM ConferenceDomains d '
+                         'JOIN Conferences c ON c.id = d.conference_id JOIN Domains m ON m.id = d.domain_id',
+}
+
+
+def old_conference_to_db(engine, config: Config, files: List[JournalStatementFile]):
+    conferences = pd.DataFrame(columns=['title', 'points', 'government_statement_id'])
+    gov = pd.DataFrame(config['journals']).reset_index()
+    government_statements = pd.DataFrame(columns=['id', 'url', 'title', 'starting_date'])
+    government_statements['id'] = gov['index'] + len(config['monographs'])
+    government_statements['url'] = gov['url']
+    government_statements['title'] = gov['title']
+    government_statements['starting_date'] = pd.to_datetime(gov['date'])
+    government_statements.to_sql(name='GovernmentStatements', con=engine, if_exists='append', index=False, index_label='id')
+    for file in files:
+        if file.year > 2017:
+            c = file.conferences.copy()
+            c['title'] = c['title'].str.extract(BRACKETED_SUFFIX)[0]  # remove more additional data in titles (present in 2021 data)
+            c['title'] = c['title'].str.extract(PARENTHESIZED_SUFFIX)[0]  # remove additional data in titles
+            c['title'] = c['title'].str.extract(TRAILING_SPACES)[0]  # remove trailing spaces
+            c['government_statement_id'] = government_statements[government_statements['starting_date'] == file.date]['id'].values[0]
+            conferences = conferences.append(c)
+    titles = pd.DataFrame(columns=['id', 'title'])
+    titles['title'] = conferences['title'].unique()
+    titles['id'] = titles.index
+    dates = titles.join(conferences.set_index('title'), on='title', how='outer')[['id', 'government_statement_id', 'points']]
+    dates.columns = ['conference_id', 'government_statement_id', 'points']
+    dates = dates.sort_values('points').drop_duplicates(subset=['conference_id', 'government_statement_id'], keep='last')
+    titles['name_key'] = titles['title'].map(normalize_name, na_action='ignore')
+    titles.to_sql(name='Conferences', con=engine, if_exists='append', index=False, index_label='id')
+    dates.drop_duplicates(inplace=True)
+    dates.to_sql(name='ConferenceDatePoints', con=engine, if_exists='append', index=False, index_label=None)
+    c_domains = pd.DataFrame(columns=['conference_id', 'domain_id'])
+    c_domains['conference_id'] = np.tile(titles['id'], 2)
+    c_domains['domain_id'] = np.repeat([9,37], len(titles['id']))
+    c_domains.to_sql(name='ConferenceDomains', con=engine, if_exists='append', index=False, index_label=None)
+
+def old_journal_to_db(engine, config: Config, files: List[JournalStatementFile]):
+    journals = None
+    gov = pd.DataFrame(config['journals']).reset_index()
+    government_statements = pd.DataFrame(columns=['id', 'url', 'title', 'starting_date'])
+    government_statements['id'] = gov['index'] + len(config['monographs'])
+    government_statements['url'] = gov['url']
+    government_statements['title'] = gov['title']
+    government_statements['starting_date'] = pd.to_datetime(gov['date'])
+    for file in files:
+        if file.year > 2017:
+            j = file.journals.copy()
+
+            # removing 2nd issn/title/e-issn if same
+            j.loc[(j['issn'] == j['issn 2']), 'issn 2'] = np.nan
+            j.loc[(j['Tytuł 1'] == j['Tytuł 2']), 'Tytuł 2'] = np.nan
+            j.loc[(j['e-issn'] == j['e-issn 2']), 'e-issn 2'] = np.nan
+
+            # fill 1st title/issn/e-issn with 2nd if 1st not present
+            j.loc[j['Tytuł 1'].isna(), 'Tytuł 1'] = j[j['Tytuł 1'].isna()]['Tytuł 2']
+            j.loc[j['issn'].isna(), 'issn'] = j[j['issn'].isna()]['issn 2']
+            j.loc[j['e-issn'].isna(), 'e-issn'] = j[j['e-issn'].isna()]['e-issn 2']
+
+            j['government_statement_id'] = government_statements[government_statements['starting_date'] == file.date]['id'].values[0]
+            if journals is None:
+                journals = j
+            else:
+                journals = journals.append(j)
+    for file in files:
+        if file.year < 2018:
+            j = file.journals.copy()
+            j['government_statement_id'] = government_statements[government_statements['starting_date'] == file.date]['id'].values[0]
+            journals = journals.append(j)
+
+    
+    titles = pd.DataFrame(columns=['id', 'title'])
+    journals['Tytuł 1'] = journals['Tytuł 1'].replace('\n', ' ', regex=True).replace('\r', '', regex=True)
+    titles['title'] = journals['Tytuł 1'].unique()
+    titles['id'] = titles.index
+    joined = titles.join(journals.set_index('Tytuł 1'), on='title', how='outer')
+    dates = joined[['id', 'government_statement_id', 'points']]
+    dates.columns = ['journal_id', 'government_statement_id', 'points']
+    dates = dates.sort_values('points').drop_duplicates(subset=['journal_id', 'government_statement_id'], keep='last')
+    titles['name_key'] = titles['title'].map(normalize_name, na_action='ignore')
+    titles.to_sql(name='Journals', con=engine, if_exists='append', index=False, index_label='id')
+    # drop duplicates
+    dates = dates.groupby(['journal_id', 'government_statement_id'])['points'].max().reset_index()
+    dates.to_sql(name='JournalDatePoints', con=engine, if_exists='append', index=False, index_label=None)
+    domains = pd.DataFrame(columns=['id', 'name'])
+    domains['name'] = journals.columns[7:-2]
+    domains['id'] = domains.index
+    domains.to_sql(name='Domains', con=engine, if_exists='append', index=False, index_label=None)
+    domain_matrix = joined.drop_duplicates(['id']).sort_values(by=['id']).iloc[:, 8:-2].values
+    j_domains = pd.DataFrame(np.argwhere(domain_matrix), columns=['journal_id', 'domain_id'])
+    j_domains.to_sql(name='JournalDomains', con=engine, if_exists='append', index=False, index_label=None)
+    # ISSNs and e-ISSNs from all statements
+    identifiers = joined[['id', 'issn', 'e-issn', 'issn 2', 'e-issn 2']].melt(id_vars='id', value_name='identifier')
+    identifiers['identifier'] = identifiers['identifier'].map(normalize_issn, na_action='ignore')
+    identifiers = identifiers[['id', 'identifier']].dropna().drop_duplicates()
+    identifiers.columns = ['journal_id', 'issn']
+    identifiers['journal_id'] = identifiers['journal_id'].astype(int)
+    identifiers.to_sql(name='JournalIdentifiers', con=engine, if_exists='append', index=False, index_label=None)
+
+
+def load(config: Config, files: List[JournalStatementFile], journals, conferences):
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    journals(engine, config, files)
+    conferences(engine, config, files)
+    return engine
+
+
+def read_tables(engine) -> Dict[str, Counter]:
+    """
+    :return: rows of every table by name, counted, in any order
+    """
+    with engine.connect() as connection:
+        return {table: Counter(map(tuple, connection.execute(query))) for table, query in TABLES.items()}
+
+
+def main():
+    warnings.simplefilter('ignore', FutureWarning)
+    config = Config()
+    files = read_journal_files(os.path.join(config['data_path'], 'journals'), config['cache_path'])
+    print(f"{', '.join(os.path.basename(f.path) for f in files)}, {sum(len(f.journals) for f in files)} journal rows")
+
+    results = {}
+    for label, journals, conferences in [
+        ('append, str.extract, join (before)', old_journal_to_db, old_conference_to_db),
+        ('concat, factorize', journal_to_db, conference_to_db),
+    ]:
+        start = time.perf_counter()
+        engine = load(config, files, journals, conferences)
+        elapsed = time.perf_counter() - start
+        results[label] = read_tables(engine)
+        # Measured separately, tracing allocations slows everything down
+        tracemalloc.start()
+        load(config, files, journals, conferences)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'{label:<36} {elapsed:7.2f}s {peak / 2 ** 20:8.1f} MiB peak')
+
+    old, new = results.values()
+    failed = []
+    for table in TABLES:
+        added, removed = sum((new[table] - old[table]).values()), sum((old[table] - new[table]).values())
+        if table == 'JournalDomains':
+            # Only the newest statement sets domains now, so links can only be missing
+            status = f'{removed} from older statements only' if removed else 'same'
+            different = added > 0
+        else:
+            status = 'same'
+            different = added + removed > 0
+        if different:
+            status = f'{added} added, {removed} removed, DIFFERENT'
+            failed.append(table)
+        print(f'{table:<22} {sum(new[table].values()):>7} rows {status}')
+
+    if failed:
+        raise SystemExit(f"Tables differ from those of the previous loaders: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Measures the JSON size of the results of a 1k-row journal search: points
+histories with full statement titles versus (statement id, points) pairs,
+and the results table payload before and after keeping the results on the
+server, sending constant tooltips once per column and paging the table.
+
+Run from the repository root, with the database and the text index built:
+    python -m benchmarks.payload
+"""
+import json
+
+import app
+from benchmarks.search import sample_rows
+
+ROWS = 1000
+
+
+def size(value) -> int:
+    # Dash serializes props with plotly's JSON encoder, plain json is close enough for a comparison
+    return len(json.dumps(value, ensure_ascii=False).encode())
+
+
+def main():
+    rows = sample_rows(app.engine, ROWS)
+    domains = ['matematyka', 'informatyka']
+    results = app.batch_search.search(rows, 'czasopisma', domains)
+
+    titled_history = [
+        [(app.store.statement_titles[s], app.store.statement_date_strings[s], p) for s, p in r.points_history]
+        for r in results
+    ]
+    compact_history = [r.points_history for r in results]
+
+    # The results table as sent to the browser before, with histories and suggestions in component props
+    table = [
+        {'Title': r.name, 'Date': r.date, 'Points': [r.points], 'PointsHistory': h, 'Similarity': round(r.similarity, 2)}
+        for r, h in zip(results, titled_history)
+    ]
+    suggestions = [(r.query_title, r.suggestions) for r in results]
+
+    result_id = app.result_store.create('czasopisma', domains)
+    app.store_search_results(rows, 0, result_id, 'czasopisma', domains)
+    # The whole result on a single page, as sent before paging, and the first page
+    data, tooltips, _, _ = app.get_results_page(result_id, 0, [], '')
+    app.page_size = ROWS
+    all_data, all_tooltips, _, _ = app.get_results_page(result_id, 0, [], '')
+    # Tooltips of the date and similarity columns used to be repeated for every row
+    click = {'value': 'Kliknij, by zobaczyć szczegóły', 'type': 'text'}
+    tooltip_data = [dict(t, Date=click, Similarity=click) for t in all_tooltips]
+
+    print(f'{ROWS} rows')
+    print(f"{'points histories with statement titles':<50} {size(titled_history):>10} B")
+    print(f"{'points histories as (statement id, points)':<50} {size(compact_history):>10} B")
+    print(f"{'results table data with titled histories':<50} {size(table):>10} B")
+    print(f"{'  + tooltips and suggestions (before)':<50} {size([table, tooltip_data, suggestions]):>10} B")
+    print(f"{'results table data with a result id':<50} {size(all_data):>10} B")
+    print(f"{'  + tooltips':<50} {size([all_data, all_tooltips, result_id]):>10} B")
+    print(f"{'first page with tooltips (now)':<50} {size([data, tooltips, result_id]):>10} B")
+
+
+if __name__ == '__main__':
+    main()
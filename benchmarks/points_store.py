@@ -0,0 +1,67 @@
+"""
+Reports the memory footprint of PointsStore and compares its lookup
+latency with the Cursor queries it replaces.
+
+Run from the repository root, with the database built:
+    python -m benchmarks.points_store
+"""
+import random
+import timeit
+import tracemalloc
+
+from sqlalchemy import create_engine
+
+from src import Config
+from src.orm import Cursor
+from src.points import PointsStore
+
+SAMPLE_SIZE = 1000
+
+
+def per_call(timer: timeit.Timer, n: int) -> str:
+    return f'{timer.timeit(1) / n * 1e6:>10.1f} us'
+
+
+def main():
+    config = Config()
+    engine = create_engine(f"sqlite:///{config['db_file']}")
+
+    tracemalloc.start()
+    store = PointsStore.from_engine(engine)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'PointsStore: {current / 2 ** 20:.1f} MiB resident, {peak / 2 ** 20:.1f} MiB peak while loading')
+    for publication_type, table in store.tables.items():
+        arrays = sum(a.nbytes for a in (table.timeline_offsets, table.statement_ids, table.dates, table.points,
+                                        table.domain_offsets, table.domain_ids))
+        print(f'  {publication_type}: {len(table)} entries, {arrays / 2 ** 10:.0f} KiB of arrays')
+
+    rnd = random.Random(0)
+    print(f"\n{'lookup':<36} {'Cursor':>13} {'PointsStore':>13}")
+    with Cursor(engine) as cursor:
+        for publication_type in ['czasopisma', 'konferencje', 'monografie']:
+            names = rnd.choices(cursor.get_names(publication_type), k=SAMPLE_SIZE)
+            titles = [name for _, name in names]
+            ids = [i for i, _ in names]
+
+            # Cursor has no lookup of ids, its queries take names
+            store_ids = timeit.Timer(lambda: [store.get_id(t, publication_type) for t in titles])
+            print(f'{publication_type + " name -> id":<36} {"-":>13} {per_call(store_ids, len(titles))}')
+
+            cursor_points = timeit.Timer(lambda: [cursor.get_date_points(t, publication_type) for t in titles])
+            store_points = timeit.Timer(lambda: [store.get_date_points(i, publication_type) for i in ids])
+            print(f'{publication_type + " points timeline":<36} {per_call(cursor_points, len(titles))} '
+                  f'{per_call(store_points, len(ids))}')
+
+            if publication_type == 'monografie':
+                continue
+            get_domains = cursor.get_journal_domains if publication_type == 'czasopisma' \
+                else cursor.get_conference_domains
+            cursor_domains = timeit.Timer(lambda: [get_domains(t) for t in titles])
+            store_domains = timeit.Timer(lambda: [store.get_entry_domains(i, publication_type) for i in ids])
+            print(f'{publication_type + " domains":<36} {per_call(cursor_domains, len(titles))} '
+                  f'{per_call(store_domains, len(ids))}')
+
+
+if __name__ == '__main__':
+    main()
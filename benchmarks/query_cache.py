@@ -0,0 +1,64 @@
+"""
+Measures the query cache of IndexReader on journal titles that repeat like
+in real traffic: query_many with the cache filled by an earlier pass versus
+querying the titles one by one with the cache disabled. Exits with an error
+if the cached results differ from the uncached ones, or if cache_stats
+doesn't count every repeated title as a hit.
+
+Run from the repository root, with the database and the text index built:
+    python -m benchmarks.query_cache
+"""
+import random
+import time
+
+from sqlalchemy import create_engine, text
+
+from src import Config
+from src.text_index import IndexReader
+from src.text_index.cache import LRUCache
+
+DISTINCT_TITLES = 500
+QUERIES = 5000
+DOMAINS = ['matematyka', 'informatyka']
+
+
+def main():
+    config = Config()
+    engine = create_engine(f"sqlite:///{config['db_file']}")
+    with engine.connect() as con:
+        titles = [r[0] for r in con.execute(text('SELECT title FROM Journals')) if r[0] is not None]
+    rnd = random.Random(0)
+    # Half of them misspelled, so that they need the full-text search
+    titles = [t if rnd.random() < 0.5 else t[:-2] for t in rnd.sample(titles, min(len(titles), DISTINCT_TITLES))]
+    # A few titles are searched far more often than the rest
+    texts = rnd.choices(titles, weights=[1 / (rank + 1) for rank in range(len(titles))], k=QUERIES)
+
+    uncached = IndexReader(config)
+    uncached.cache = LRUCache(0)
+    start = time.perf_counter()
+    expected = [uncached.query_journals(t, DOMAINS) for t in texts]
+    t_uncached = time.perf_counter() - start
+
+    reader = IndexReader(config)
+    reader.cache = LRUCache(QUERIES)
+    reader.query_many('czasopisma', titles, DOMAINS)
+    before = reader.cache_stats()
+    start = time.perf_counter()
+    results = reader.query_many('czasopisma', texts, DOMAINS)
+    t_cached = time.perf_counter() - start
+    after = reader.cache_stats()
+    hits, misses = after['hits'] - before['hits'], after['misses'] - before['misses']
+
+    print(f"{'one by one, no cache':<24} {t_uncached / len(texts) * 1e3:8.3f} ms/query")
+    print(f"{'query_many, cached':<24} {t_cached / len(texts) * 1e3:8.3f} ms/query")
+    print(f"cache: {hits} hits, {misses} misses, {after['evictions']} evictions, {after['size']} entries")
+
+    different = sum(not r.equals(e) for r, e in zip(results, expected))
+    if different > 0:
+        raise SystemExit(f'{different} cached results differ from the uncached ones')
+    if hits != len(texts) or misses != 0:
+        raise SystemExit(f'Expected {len(texts)} cache hits and no misses, got {hits} hits and {misses} misses')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Checks with EXPLAIN QUERY PLAN that every lookup done by Cursor is answered
+through an index and never scans a whole table.
+
+Run from the repository root, with the database built:
+    python -m benchmarks.query_plans
+"""
+import re
+
+from sqlalchemy import create_engine, event
+
+from src import Config
+from src.orm import Cursor
+
+PUBLICATION_TYPES = ['czasopisma', 'konferencje', 'monografie']
+
+
+def lookups(cursor: Cursor):
+    """
+    :return: (description, callable) pairs for all Cursor lookups by name
+    """
+    calls = [
+        (f'get_date_points {publication_type}', lambda p=publication_type: cursor.get_date_points('x', p))
+        for publication_type in PUBLICATION_TYPES
+    ]
+    calls += [
+        ('get_journal_domains', lambda: cursor.get_journal_domains('x')),
+        ('get_conference_domains', lambda: cursor.get_conference_domains('x')),
+    ]
+    return calls
+
+
+def main():
+    config = Config()
+    engine = create_engine(f"sqlite:///{config['db_file']}")
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith('EXPLAIN'):
+            statements.append((statement, parameters))
+
+    failed = False
+    with Cursor(engine) as cursor, engine.connect() as connection:
+        for description, call in lookups(cursor):
+            statements.clear()
+            call()
+            for statement, parameters in list(statements):
+                plan = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+                scans = [step for step in plan if re.match(r'SCAN (TABLE )?\w+$', step)]
+                status = 'FULL SCAN' if scans else 'ok'
+                failed = failed or bool(scans)
+                print(f'{status:>9}  {description}: {"; ".join(plan)}')
+
+    if failed:
+        raise SystemExit('Some Cursor queries do not use an index')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Measures how long it takes to read a page of the results table from the
+result store for a 50k-row search result: the first and the last page,
+sorted by points or similarity and filtered by title or points. Uses
+synthetic rows, so neither the database nor the text index is needed.
+
+Run from the repository root:
+    python -m benchmarks.result_store
+"""
+import os
+import random
+import tempfile
+import time
+
+from src.search import ResultStore
+
+ROWS = 50_000
+PAGE_SIZE = 100
+REPEAT = 5
+# Latency target of a page, in milliseconds
+TARGET_MS = 100
+
+WORDS = ['Journal', 'Transactions', 'Applied', 'Mathematics', 'Nauki', 'Łódź', 'Science', 'Letters', 'IEEE',
+         'Computer', 'Studia', 'Systems', 'Annals', 'Robotics', 'Analysis']
+
+
+def synthetic_rows(count: int, rnd: random.Random) -> list:
+    rows = []
+    for _ in range(count):
+        title = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 6)))
+        suggestions = [[' '.join(rnd.sample(WORDS, 3)), rnd.random()] for _ in range(3)]
+        rows.append({
+            'Title': title,
+            'Date': f'{rnd.randint(2015, 2021)}-{rnd.randint(1, 12):02}-{rnd.randint(1, 28):02}',
+            'Points': rnd.choice([0, 5, 20, 40, 70, 100, 140, 200]),
+            'Similarity': round(rnd.random(), 2),
+            'PointsHistory': [[s, rnd.choice([20, 40, 70])] for s in range(rnd.randint(1, 4))],
+            'QueryTitle': title.lower(),
+            'Suggestions': suggestions,
+            'TitleTooltip': f'Szukano: *{title.lower()}*.',
+            'PointsTooltip': 'Kliknij, by zobaczyć szczegóły',
+        })
+    return rows
+
+
+def main():
+    rnd = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(os.path.join(directory, 'results.db'))
+        result_id = store.create('czasopisma', ['matematyka'])
+        start = time.perf_counter()
+        rows = synthetic_rows(ROWS, rnd)
+        for i in range(0, ROWS, 250):
+            store.add_rows(result_id, i, rows[i:i + 250])
+        print(f'Stored {ROWS} rows in {time.perf_counter() - start:.2f}s')
+
+        last_page = (ROWS - 1) // PAGE_SIZE
+        cases = [
+            ('first page', [], '', 0),
+            ('last page', [], '', last_page),
+            ('points descending', [{'column_id': 'Points', 'direction': 'desc'}], '', 0),
+            ('similarity ascending, page 100', [{'column_id': 'Similarity', 'direction': 'asc'}], '', 100),
+            ('title contains', [], '{Title} contains "łódź"', 0),
+            ('points >= 100, by similarity', [{'column_id': 'Similarity', 'direction': 'desc'}],
+             '{Points} >= 100', 0),
+            ('date and title, by title', [{'column_id': 'Title', 'direction': 'asc'}],
+             '{Date} datestartswith "2020" && {Title} contains "ieee"', 0),
+        ]
+        for label, sort_by, filter_query, page in cases:
+            times = []
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                page_rows, count = store.query_rows(result_id, sort_by, filter_query, page * PAGE_SIZE, PAGE_SIZE)
+                times.append(1000 * (time.perf_counter() - start))
+            best = min(times)
+            status = 'ok' if best <= TARGET_MS else f'over {TARGET_MS} ms'
+            print(f'{label:<35} {count:>6} matching {len(page_rows):>4} rows {best:8.1f} ms  {status}')
+
+
+if __name__ == '__main__':
+    main()
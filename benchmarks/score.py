@@ -0,0 +1,66 @@
+"""
+Measures the throughput of the offline scorer (src/score.py) by number of
+worker processes: 2k journals sampled from the database are written to a
+CSV file and scored with 1, 2, 4 and os.cpu_count() workers, checking that
+the output doesn't depend on the number of workers. The query cache is
+disabled, so every distinct title is searched for.
+
+Run from the repository root, with the database and the text index built:
+    python -m benchmarks.score
+"""
+import csv
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+
+from benchmarks.search import sample_rows
+from src import Config
+from src.points import PointsStore
+from src.score import score_file
+from src.search import BatchSearch
+from src.text_index import IndexReader
+from src.text_index.cache import LRUCache
+
+ROWS = 2000
+CHUNK_SIZE = 100
+
+
+def main():
+    config = Config()
+    engine = create_engine(f"sqlite:///{config['db_file']}")
+    reader = IndexReader(config)
+    reader.cache = LRUCache(0)
+    batch_search = BatchSearch(reader, PointsStore.from_engine(engine))
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, 'input.csv')
+        with open(input_path, 'w', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(['Title', 'Date'])
+            writer.writerows((r['Title'], r['Date']) for r in sample_rows(engine, ROWS))
+
+        expected = None
+        different = []
+        print(f'{ROWS} rows, chunks of {CHUNK_SIZE}, {os.cpu_count()} CPUs')
+        for workers in sorted({1, 2, 4, os.cpu_count()}):
+            output_path = os.path.join(directory, f'output{workers}.csv')
+            start = time.perf_counter()
+            count = score_file(batch_search, input_path, output_path, 'czasopisma', ['matematyka', 'informatyka'],
+                               workers, CHUNK_SIZE)
+            elapsed = time.perf_counter() - start
+            output = open(output_path).read()
+            expected = expected or output
+            print(f'{workers:>3} workers {count:>6} rows {elapsed:7.2f}s {count / elapsed:8.0f} rows/s'
+                  f"{'' if output == expected else ' DIFFERENT OUTPUT'}")
+            if output != expected:
+                different.append(workers)
+
+    if different:
+        raise SystemExit(f"Output with {', '.join(map(str, different))} workers differs from the output "
+                         f"with 1 worker")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Compares the per-row search loop with BatchSearch for search tables of
+10, 1k and 10k rows, and points of one title at many dates from
+PointsResolver.resolve_name_at_dates with the per-row walk. Exits with an
+error if they differ.
+
+Run from the repository root, with the database and the text index built:
+    python -m benchmarks.search
+"""
+import random
+import time
+from datetime import date, timedelta
+from functools import partial
+
+from sqlalchemy import create_engine, text
+
+from src import Config
+from src.orm import Cursor
+from src.points import PointsResolver, PointsStore
+from src.search import BatchSearch, normalize_query_date
+from src.text_index import IndexReader
+
+SIZES = [10, 1000, 10000]
+# Titles of every type asked about at many dates, and number of dates per title
+NAME_SAMPLE_SIZE = 50
+DATES_PER_NAME = 200
+
+
+def sample_rows(engine, n: int, seed: int = 0) -> list:
+    """
+    Journal titles from the database, some of them misspelled, with dates
+    spread over all government statements. Titles repeat like in real imports.
+    """
+    rnd = random.Random(seed)
+    with engine.connect() as con:
+        titles = [r[0] for r in con.execute(text('SELECT title FROM Journals'))]
+    titles = rnd.sample(titles, min(len(titles), max(n // 3, 1)))
+    rows = []
+    for _ in range(n):
+        title = rnd.choice(titles)
+        if rnd.random() < 0.3:
+            title = title.upper()
+        elif rnd.random() < 0.3:
+            title = title[:-3]
+        rows.append({'Title': title, 'Date': rnd.choice(['2016', '2019-01-01', '2020', ''])})
+    return rows
+
+
+def resolve_points(date_points: list, date: str, domains_match: bool) -> int:
+    """The original linear walk over the statements of a single entry."""
+    points = None
+    for _, statement_date, statement_points in date_points:
+        if points is None:
+            points = statement_points
+        if statement_date > date:
+            if not domains_match:
+                return 0
+            break
+        points = statement_points
+    return points
+
+
+def per_row_search(ir: IndexReader, engine, rows: list, domains: list) -> list:
+    """The original loop: one index query and two DB round trips per row."""
+    query_function = partial(ir.query_journals, domains=domains)
+    results = []
+    with Cursor(engine) as db_cursor:
+        for row in rows:
+            date = normalize_query_date(row['Date'])
+            df = query_function(row['Title'])
+            if len(df) == 0:
+                results.append(0)
+                continue
+            name = df.name.iloc[0]
+            domains_match = len(set(db_cursor.get_journal_domains(name)) & set(domains)) > 0
+            date_points = db_cursor.get_date_points(name, 'czasopisma')
+            results.append(resolve_points(date_points, date, domains_match))
+    return results
+
+
+def sample_dates(statement_dates: list, n: int, rnd: random.Random) -> list:
+    """
+    Dates of statements, the days around them and random days from a year
+    before the first statement to a year after the last one, YYYY-MM-DD.
+    """
+    days = [date.fromisoformat(d[:10]) for d in statement_dates]
+    dates = [d + timedelta(days=shift) for d in days for shift in (-1, 0, 1)]
+    first, last = min(days) - timedelta(days=365), max(days) + timedelta(days=365)
+    dates += [first + timedelta(days=rnd.randint(0, (last - first).days)) for _ in range(n - len(dates))]
+    return [d.isoformat() for d in dates]
+
+
+def per_date_points(engine, name: str, publication_type: str, dates: list, domains: list) -> list:
+    """The original lookup of one title: two DB round trips and a linear walk per date."""
+    results = []
+    with Cursor(engine) as db_cursor:
+        for d in dates:
+            if publication_type == 'monografie':
+                domains_match = True
+            else:
+                get_domains = db_cursor.get_journal_domains if publication_type == 'czasopisma' \
+                    else db_cursor.get_conference_domains
+                domains_match = len(set(get_domains(name)) & set(domains)) > 0
+            results.append(resolve_points(db_cursor.get_date_points(name, publication_type), d, domains_match))
+    return results
+
+
+def check_name_at_dates(engine, resolver: PointsResolver, domains: list) -> list:
+    """
+    :return: (publication type, name) of titles whose points at some date differ from the per-row walk
+    """
+    store = resolver.store
+    rnd = random.Random(0)
+    dates = sample_dates([d for d in store.statement_date_strings if d is not None], DATES_PER_NAME, rnd)
+    failed = []
+    print(f"\n{'one title at many dates':<24} {'per-row [ms]':>12} {'resolver [ms]':>14}")
+    for publication_type, table in store.tables.items():
+        names = [name for name in table.names if name is not None]
+        names = rnd.sample(names, min(len(names), NAME_SAMPLE_SIZE))
+        t_loop = t_resolver = 0.0
+        for name in names:
+            start = time.perf_counter()
+            expected = per_date_points(engine, name, publication_type, dates, domains)
+            t_loop += time.perf_counter() - start
+
+            start = time.perf_counter()
+            resolution = resolver.resolve_name_at_dates(name, publication_type, dates, domains)
+            t_resolver += time.perf_counter() - start
+            if resolution.points.tolist() != expected:
+                failed.append((publication_type, name))
+        print(f'{publication_type:<24} {t_loop / len(names) * 1e3:>12.2f} {t_resolver / len(names) * 1e3:>14.3f}')
+    return failed
+
+
+def main():
+    config = Config()
+    engine = create_engine(f"sqlite:///{config['db_file']}")
+    ir = IndexReader(config)
+    batch_search = BatchSearch(ir, PointsStore.from_engine(engine))
+    domains = ['matematyka', 'informatyka']
+
+    print(f"{'rows':>6} {'per-row [s]':>12} {'batch [s]':>10} {'speedup':>8}")
+    for n in SIZES:
+        rows = sample_rows(engine, n)
+
+        start = time.perf_counter()
+        expected = per_row_search(ir, engine, rows, domains)
+        t_loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = [r.points for r in batch_search.search(rows, 'czasopisma', domains)]
+        t_batch = time.perf_counter() - start
+
+        assert expected == actual, 'Batch search results differ from the per-row loop'
+        print(f'{n:>6} {t_loop:>12.3f} {t_batch:>10.3f} {t_loop / t_batch:>7.1f}x')
+
+    failed = check_name_at_dates(engine, batch_search.resolver, domains)
+    if failed:
+        raise SystemExit(f"Points of {len(failed)} titles at some dates differ from the per-row walk, "
+                         f"e.g. {failed[0][1]} ({failed[0][0]})")
+
+
+if __name__ == '__main__':
+    main()
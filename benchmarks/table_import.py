@@ -0,0 +1,99 @@
+"""
+Compares the import of search tables before and after parsing uploads on
+the server: decoding the whole upload, sniffing the whole text and parsing
+it with pd.read_csv(sep=None, engine='python'), versus decoding, sniffing
+a bounded sample and parsing incrementally with the csv module. Checks
+that both give the same rows for misc/import_test_cases, then times both,
+with their peak memory, on a generated 100k-row file.
+
+Run from the repository root:
+    python -m benchmarks.table_import
+"""
+import base64
+import csv
+import glob
+import random
+import re
+import time
+import tracemalloc
+from io import StringIO
+
+import pandas as pd
+
+from src.search import decode_upload, read_table
+
+ROWS = 100_000
+
+
+def old_import(contents: str) -> list:
+    _, text = contents.split(',')
+    text = base64.b64decode(text).decode()
+
+    header = False
+    lines = text.strip().split('\n')
+    if len(lines) >= 2 and len(lines[0]) >= 3:
+        if lines[0][:12] in ['Title;Points', 'Title,Points', 'Title\tPoints']:
+            header = True
+        else:
+            try:
+                dialect = csv.Sniffer().sniff(text.strip())
+                columns = lines[0].split(str(dialect.delimiter))
+                header = len(columns) >= 2 and not re.search(r'\d\d', columns[1])
+            except csv.Error:
+                pass
+
+    df = pd.read_csv(StringIO(text), names=('Title', 'Date'), header=0 if header else None, parse_dates=False,
+                     quotechar='"', sep=None, dtype='str', skip_blank_lines=True, usecols=[0, 1],
+                     engine='python').fillna('')
+    return df.to_dict('records')
+
+
+def new_import(contents: str) -> list:
+    table = read_table(decode_upload(contents))
+    return table.rows(table.header)
+
+
+def upload(raw: bytes) -> str:
+    return 'data:text/csv;base64,' + base64.b64encode(raw).decode()
+
+
+def measure(function, contents: str):
+    start = time.perf_counter()
+    rows = function(contents)
+    elapsed = time.perf_counter() - start
+    # Timed separately, tracing allocations slows everything down
+    tracemalloc.start()
+    function(contents)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def main():
+    failed = []
+    for path in sorted(glob.glob('misc/import_test_cases/*')):
+        contents = upload(open(path, 'rb').read())
+        old = [{'Title': r['Title'], 'Date': r['Date'].strip()} for r in old_import(contents)]
+        new = new_import(contents)
+        print(f"{path.split('/')[-1]:<30} {len(new):>3} rows {'same' if old == new else 'DIFFERENT'}")
+        if old != new:
+            failed.append(path)
+
+    rnd = random.Random(0)
+    lines = ['Tytuł;Data'] + [
+        f'{rnd.choice(["Journal of", "Annals of", "Studia"])} {rnd.randint(0, 10 ** 6)} Studies;'
+        f'{rnd.choice(["2020", "2019-05-01", ""])}'
+        for _ in range(ROWS)
+    ]
+    contents = upload('\n'.join(lines).encode())
+    print(f'\n{ROWS} rows, {len(contents)} B uploaded')
+    for label, function in [('whole text, pandas python engine', old_import), ('streamed, csv module', new_import)]:
+        rows, elapsed, peak = measure(function, contents)
+        print(f'{label:<35} {len(rows):>7} rows {elapsed:7.2f}s {peak / 2 ** 20:8.1f} MiB peak')
+
+    if failed:
+        raise SystemExit(f"Imported rows differ from the previous import: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Compares the TF-IDF search engine with Whoosh: how often both find the same
+best journal for the titles of misc/import_test_cases and for misspelled
+titles from the database, and the throughput of search_many for batches of
+1k and 5k titles. Builds the TF-IDF index from the Whoosh index first, in a
+temporary directory.
+
+Titles whose best Whoosh match is close (CONFIDENT_SIMILARITY) must get the
+same journal from TF-IDF for at least MIN_AGREEMENT of them, otherwise the
+script exits with an error. The engines disagree mostly on titles with no
+close entry, where they return different weak candidates, TF-IDF's often
+scoring higher once rescored. Disagreeing titles are listed.
+
+Run from the repository root, with the text index built:
+    python -m benchmarks.tfidf
+"""
+import copy
+import glob
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+import whoosh.index
+
+from src import Config
+from src.text_index import IndexReader
+from src.text_index.cache import LRUCache
+from src.text_index.rescoring import jaro_winkler_scores
+from src.text_index.text_index import INDEX_TYPES
+from src.text_index.tfidf import TfidfIndex
+
+BATCH_SIZES = [1000, 5000]
+PARITY_SAMPLE_SIZE = 1000
+# Jaro-Winkler similarity to the best Whoosh match above which both engines should agree
+CONFIDENT_SIMILARITY = 0.9
+# Minimum share of such titles for which TF-IDF finds the same best journal
+MIN_AGREEMENT = 0.95
+# Number of disagreeing titles listed
+LISTED = 10
+
+
+def build_tfidf(index_path: str, tfidf_path: str):
+    """
+    Builds TF-IDF indexes from the Whoosh index in index_path, like the index
+    in tfidf_path/tfidf would be built, without touching the index in use.
+    """
+    for i_type in INDEX_TYPES.values():
+        with whoosh.index.open_dir(os.path.join(index_path, i_type)).searcher() as s:
+            docs = list(s.all_stored_fields())
+        TfidfIndex.build(docs).save(os.path.join(tfidf_path, 'tfidf', i_type))
+
+
+def test_case_titles() -> list:
+    titles = []
+    for path in sorted(glob.glob('misc/import_test_cases/*')):
+        df = pd.read_csv(path, sep=None, engine='python', header=None, dtype=str)
+        titles.extend(df[0].dropna())
+    return titles
+
+
+def misspelled_titles(names: list, n: int, seed: int = 0) -> list:
+    rnd = random.Random(seed)
+    titles = []
+    for name in rnd.sample(names, min(len(names), n)):
+        if rnd.random() < 0.5 and len(name) > 5:
+            i = rnd.randrange(len(name))
+            name = name[:i] + name[i + 1:]
+        titles.append(name.upper() if rnd.random() < 0.3 else name)
+    return titles
+
+
+def agreement(whoosh_reader: IndexReader, tfidf_reader: IndexReader, titles: list) -> float:
+    """
+    Prints how often both engines find the same best journal and lists titles they disagree on.
+    :return: share of titles with a close Whoosh match for which TF-IDF finds the same journal
+    """
+    results = list(zip(whoosh_reader.search_many('czasopisma', titles),
+                       tfidf_reader.search_many('czasopisma', titles)))
+    similarities = jaro_winkler_scores([
+        (title.lower(), w[0].name.lower() if w else '') for title, (w, _) in zip(titles, results)
+    ])
+    same = confident = confident_same = 0
+    disagreeing = []
+    for title, similarity, (w, t) in zip(titles, similarities, results):
+        agree = (w[0].id if w else None) == (t[0].id if t else None)
+        same += agree
+        if similarity >= CONFIDENT_SIMILARITY:
+            confident += 1
+            confident_same += agree
+        if not agree:
+            disagreeing.append((similarity, title, w[0] if w else None, t[0] if t else None))
+
+    share = confident_same / max(confident, 1)
+    print(f'    all titles {same / max(len(titles), 1):7.1%} of {len(titles)}, '
+          f'close matches {share:7.1%} of {confident}')
+    for similarity, title, w, t in sorted(disagreeing, key=lambda d: d[0], reverse=True)[:LISTED]:
+        print(f'      {title[:40]!r:<42} {similarity:.2f} whoosh: {w.name[:30] if w else None!r} '
+              f'{w.score if w else 0:.2f}, tfidf: {t.name[:30] if t else None!r} {t.score if t else 0:.2f}')
+    if len(disagreeing) > LISTED:
+        print(f'      ... {len(disagreeing) - LISTED} more')
+    return share
+
+
+def main():
+    config = Config()
+    index_path = config['search']['index_path']
+    with whoosh.index.open_dir(os.path.join(index_path, 'journals')).searcher() as s:
+        names = [fields['name'] for fields in s.all_stored_fields()]
+
+    with tempfile.TemporaryDirectory() as tfidf_path:
+        build_tfidf(index_path, tfidf_path)
+        tfidf_config = copy.deepcopy(config)
+        tfidf_config['search']['engine'] = 'tfidf'
+        tfidf_config['search']['index_path'] = tfidf_path
+        readers = {'whoosh': IndexReader(config), 'tfidf': IndexReader(tfidf_config)}
+        for reader in readers.values():
+            reader.cache = LRUCache(0)
+
+        print('Same best journal as Whoosh')
+        failed = []
+        for label, titles in [('import test cases', test_case_titles()),
+                              ('misspelled titles', misspelled_titles(names, PARITY_SAMPLE_SIZE))]:
+            print(f'  {label}')
+            if agreement(readers['whoosh'], readers['tfidf'], titles) < MIN_AGREEMENT:
+                failed.append(label)
+
+        print('Throughput of search_many')
+        for size in BATCH_SIZES:
+            titles = misspelled_titles(names * (size // max(len(names), 1) + 1), size, seed=size)
+            for engine, reader in readers.items():
+                start = time.perf_counter()
+                reader.search_many('czasopisma', titles)
+                elapsed = time.perf_counter() - start
+                print(f'  {size:>6} titles {engine:<7} {elapsed:8.2f}s {len(titles) / elapsed:10.0f} titles/s')
+
+    if failed:
+        raise SystemExit(f"TF-IDF agrees with Whoosh on fewer than {MIN_AGREEMENT:.0%} of close matches: "
+                         f"{', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures updating documents of 100, 1000 and all journals in a copy of the
+built text index with IndexBuilder.update_index, by merge policy, versus
+building the whole index again. Exits with an error if the updated index
+doesn't have the same documents. The database doesn't change, so every
+document is replaced by an equal one.
+
+Run from the repository root, with the database and the text index built:
+    python -m benchmarks.update_index
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import whoosh.index
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src import Config
+from src.text_index import IndexBuilder
+from src.text_index.text_index import MERGE_POLICIES
+
+SIZES = [100, 1000, None]
+
+
+def documents(index_dir: str) -> list:
+    """
+    :return: stored fields of all journals, in any order
+    """
+    with whoosh.index.open_dir(os.path.join(index_dir, 'journals')).searcher() as searcher:
+        return sorted(sorted(fields.items()) for fields in searcher.all_stored_fields())
+
+
+def main():
+    config = Config()
+    engine = create_engine(f"sqlite:///{config['db_file']}")
+    session = sessionmaker(bind=engine)()
+    index_path = config['search']['index_path']
+    expected = documents(index_path)
+    ids = sorted(int(dict(fields)['id']) for fields in expected)
+    print(f'{len(ids)} journals')
+
+    with tempfile.TemporaryDirectory() as directory:
+        builder = IndexBuilder(config, session)
+        builder.index_dir = os.path.join(directory, 'index')
+        start = time.perf_counter()
+        builder.build_index()
+        print(f"{'full build (all types)':<40} {time.perf_counter() - start:7.2f}s")
+
+        failed = []
+        for policy in MERGE_POLICIES:
+            builder.merge_policy = policy
+            for size in SIZES:
+                shutil.rmtree(builder.index_dir)
+                shutil.copytree(index_path, builder.index_dir)
+                changed = ids if size is None else ids[::max(len(ids) // size, 1)][:size]
+                start = time.perf_counter()
+                generation = builder.update_index({'czasopisma': changed})['czasopisma']
+                elapsed = time.perf_counter() - start
+                index = whoosh.index.open_dir(os.path.join(builder.index_dir, 'journals'))
+                segments = len(index._segments())
+                same = documents(builder.index_dir) == expected
+                print(f"{f'update {len(changed)} journals, merge {policy}':<40} {elapsed:7.2f}s "
+                      f"{segments:>3} segments, generation {generation}{'' if same else ' DIFFERENT DOCUMENTS'}")
+                if not same:
+                    failed.append(f'{len(changed)} journals, merge {policy}')
+
+    if failed:
+        raise SystemExit(f"The updated index has other documents: {'; '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
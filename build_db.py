@@ -1,3 +1,4 @@
+import argparse
 import os
 import numpy as np
 import pandas as pd
@@ -6,18 +7,25 @@ from sqlalchemy import create_engine
 import sqlite3
 
 from sqlalchemy.orm import sessionmaker
+from typing import Dict, List, Tuple
 
+from src.data_preprocessing.journals import JournalStatementFile, read_journal_files
 from src.data_preprocessing.monographs import parse_monographs, scrape_monographs
 from src.orm import Base
 from src import Config
 from src.text_index import IndexBuilder
+from src.text_index.normalization import NEWLINES, clean_title, normalize_issn, normalize_name
 
+# Domains of all conferences, the statements list computer science conferences
+CONFERENCE_DOMAINS = ['informatyka techniczna i telekomunikacja', 'informatyka']
 
-def monograph_to_db(engine, config: Config):
+
+def monograph_to_db(engine, config: Config, workers: int = 1):
     monograph_config = config.get_monograph_config()
 
     scrape_monographs(monograph_config, Path(config['data_path']))
-    monographs, monograph_date_points, government_statements = parse_monographs(monograph_config)
+    monographs, monograph_date_points, government_statements = parse_monographs(monograph_config, workers)
+    monographs['name_key'] = monographs['publisher_name'].map(normalize_name, na_action='ignore')
     monographs.to_sql(name='monographs', con=engine, if_exists='append',
                       index=False, index_label='id')
     monograph_date_points.to_sql(name='MonographDatePoints', con=engine, if_exists='append',
@@ -26,125 +34,360 @@ def monograph_to_db(engine, config: Config):
                                  index=False, index_label='id')
 
 
-def conference_to_db(engine, config: Config):
-    data_path = config['data_path'] + '/journals'
-    conferences = pd.DataFrame(columns=['title', 'points', 'government_statement_id'])
+def journal_statements(config: Config) -> pd.DataFrame:
+    """
+    :return: GovernmentStatements of journals and conferences, ids follow the monograph statements
+    """
     gov = pd.DataFrame(config['journals']).reset_index()
     government_statements = pd.DataFrame(columns=['id', 'url', 'title', 'starting_date'])
     government_statements['id'] = gov['index'] + len(config['monographs'])
     government_statements['url'] = gov['url']
     government_statements['title'] = gov['title']
     government_statements['starting_date'] = pd.to_datetime(gov['date'])
+    return government_statements
+
+
+def statement_id(government_statements: pd.DataFrame, date: str) -> int:
+    return government_statements[government_statements['starting_date'] == date]['id'].values[0]
+
+
+def factorize(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Like pd.factorize, but a missing value gets a code as well, in the order
+    of first occurrence, so that codes are indexes of pd.unique(values).
+    :return: codes of values and unique values
+    """
+    codes, uniques = pd.factorize(values)
+    missing = codes == -1
+    if missing.any():
+        first = missing.argmax()
+        position = codes[:first].max() + 1 if first > 0 else 0
+        codes[codes >= position] += 1
+        codes[missing] = position
+        uniques = np.insert(np.asarray(uniques, dtype=object), position, np.nan)
+    return codes, uniques
+
+
+def executemany(table, connection, keys: List[str], rows):
+    """
+    Method of DataFrame.to_sql inserting all rows with one executemany of the
+    DBAPI cursor, without SQLAlchemy binding parameters of every row.
+    Values must be types the driver handles, i.e. not datetimes.
+    """
+    columns = ', '.join(f'"{k}"' for k in keys)
+    placeholders = ', '.join('?' for _ in keys)
+    connection.connection.cursor().executemany(f'INSERT INTO "{table.name}" ({columns}) VALUES ({placeholders})', rows)
+
+
+def max_points(dates: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    :return: the highest points for every key, NaN if points are missing in any of its rows, sorted by keys
+    """
+    points = dates.groupby(keys)['points'].max()
+    missing = dates['points'].isna()
+    if missing.any():
+        points = points.mask(missing.groupby([dates[k] for k in keys]).any())
+    return points.reset_index()
+
+
+def statement_journals(file: JournalStatementFile, government_statement_id: int) -> pd.DataFrame:
+    """
+    :return: journal sheet of the statement with cleaned titles and ISSNs, and the statement id
+    """
+    j = file.journals
+    if file.year > 2017:
+        j = j.copy()
+
+        # removing 2nd issn/title/e-issn if same
+        j.loc[(j['issn'] == j['issn 2']), 'issn 2'] = np.nan
+        j.loc[(j['Tytuł 1'] == j['Tytuł 2']), 'Tytuł 2'] = np.nan
+        j.loc[(j['e-issn'] == j['e-issn 2']), 'e-issn 2'] = np.nan
+
+        # fill 1st title/issn/e-issn with 2nd if 1st not present
+        j.loc[j['Tytuł 1'].isna(), 'Tytuł 1'] = j[j['Tytuł 1'].isna()]['Tytuł 2']
+        j.loc[j['issn'].isna(), 'issn'] = j[j['issn'].isna()]['issn 2']
+        j.loc[j['e-issn'].isna(), 'e-issn'] = j[j['e-issn'].isna()]['e-issn 2']
+    j = j.assign(government_statement_id=government_statement_id)
+    j['Tytuł 1'] = j['Tytuł 1'].map(lambda t: t.translate(NEWLINES) if isinstance(t, str) else t)
+    return j
+
+
+def has_conferences(file: JournalStatementFile) -> bool:
+    """
+    :return: whether the statement lists conferences, statements before 2018 and
+    spreadsheets without a conference sheet don't
+    """
+    return file.year > 2017 and file.conferences is not None
+
+
+def statement_conferences(file: JournalStatementFile, government_statement_id: int) -> pd.DataFrame:
+    """
+    :return: conference sheet of the statement with cleaned titles, and the statement id
+    """
+    c = file.conferences.assign(government_statement_id=government_statement_id)
+    # Additional data in brackets and trailing spaces are removed in one pass
+    cleaned = c['title'].map(clean_title, na_action='ignore')
+    c['title'] = cleaned.where(cleaned.notna(), np.nan)
+    return c
+
+
+def assign_ids(titles: np.ndarray, existing: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Titles which are not in the database yet get the next ids, in the order of first occurrence.
+    :param titles: titles of all rows
+    :param existing: titles in the database by id, ids are 0..n-1
+    :return: ids of rows and new titles, their ids follow the existing ones
+    """
+    codes, uniques = factorize(titles)
+    # Missing titles are read from the database as None
+    ids = pd.Index(existing.where(existing.notna(), np.nan).values).get_indexer(uniques)
+    new = ids == -1
+    ids[new] = np.arange(len(existing), len(existing) + new.sum())
+    return ids[codes], uniques[new]
+
+
+def newest_rows(ids: np.ndarray, statement_ids: np.ndarray) -> np.ndarray:
+    """
+    :return: positions of the first row of every id in its newest statement, by id
+    """
+    order = np.lexsort((np.arange(len(ids)), -statement_ids))
+    _, first = np.unique(ids[order], return_index=True)
+    return order[first]
+
+
+def domain_links(journals: pd.DataFrame, ids: np.ndarray, domain_ids: Dict[str, int]) -> pd.DataFrame:
+    """
+    :param journals: rows of journal sheets with domain flags, missing flags count as not set
+    :param ids: journal ids of rows
+    :param domain_ids: ids of domains by name
+    :return: JournalDomains of the rows
+    """
+    columns = [c for c in domain_ids if c in journals.columns]
+    flags = journals[columns].fillna(False).astype(bool).values
+    rows, domains = np.nonzero(flags)
+    return pd.DataFrame({'journal_id': ids[rows], 'domain_id': np.array([domain_ids[c] for c in columns])[domains]})
+
+
+def journal_identifiers(journals: pd.DataFrame, ids: np.ndarray) -> pd.DataFrame:
+    """
+    :return: JournalIdentifiers, distinct ISSNs and e-ISSNs of the rows
+    """
+    identifier_columns = ['issn', 'e-issn', 'issn 2', 'e-issn 2']
+    values, uniques = factorize(np.concatenate([journals[c].values for c in identifier_columns]))
+    normalized = np.array([normalize_issn(v) for v in uniques], dtype=object)
+    identifiers = pd.DataFrame({'journal_id': np.tile(ids, len(identifier_columns)), 'issn': normalized[values]})
+    return identifiers.dropna().drop_duplicates()
+
+
+def conference_to_db(engine, config: Config, files: List[JournalStatementFile]):
+    government_statements = journal_statements(config)
     government_statements.to_sql(name='GovernmentStatements', con=engine, if_exists='append', index=False, index_label='id')
-    for filename in os.listdir(data_path):
-        if int(filename[-9:-5]) > 2017:
-            c = pd.read_excel(os.path.join(data_path, filename), 1, header=0)
-            c = c.iloc[:, 1:3]
-            c.columns = ['title', 'points']
-            c['title'] = c['title'].str.extract(
-                '((^[^\[]*$)|(.*(?=\s\[)))')  # remove more additional data in titles (present in 2021 data)
-            c['title'] = c['title'].str.extract(
-                '((^.*[^\)\s]\s*$)|(.*(?=\([^\)]*\)\s?$)))')  # remove additional data in titles
-            c['title'] = c['title'].str.extract('(.*[^\s](?=\s*$))')  # remove trailing spaces
-            c['government_statement_id'] = government_statements[government_statements['starting_date'] == filename[-15:-5].replace('-','.')]['id'].values[0]
-            conferences = conferences.append(c)
-    titles = pd.DataFrame(columns=['id', 'title'])
-    titles['title'] = conferences['title'].unique()
-    titles['id'] = titles.index
-    dates = titles.join(conferences.set_index('title'), on='title', how='outer')[['id', 'government_statement_id', 'points']]
-    dates.columns = ['conference_id', 'government_statement_id', 'points']
-    dates = dates.sort_values('points').drop_duplicates(subset=['conference_id', 'government_statement_id'], keep='last')
-    titles.to_sql(name='Conferences', con=engine, if_exists='append', index=False, index_label='id')
-    dates.drop_duplicates(inplace=True)
-    dates.to_sql(name='ConferenceDatePoints', con=engine, if_exists='append', index=False, index_label=None)
+    # In the order of statements, so that conferences of a new statement get the next ids
+    frames = [
+        statement_conferences(file, statement_id(government_statements, file.date))
+        for file in sorted(files, key=lambda f: statement_id(government_statements, f.date)) if has_conferences(file)
+    ]
+    if len(frames) == 0:
+        return
+    conferences = pd.concat(frames, ignore_index=True)
+    codes, names = assign_ids(conferences['title'].values, pd.Series([], dtype=object))
+
+    titles = pd.DataFrame({'id': np.arange(len(names)), 'title': names})
+    titles['name_key'] = titles['title'].map(normalize_name, na_action='ignore')
+    titles.to_sql(name='Conferences', con=engine, if_exists='append', index=False, index_label='id', method=executemany)
+    dates = pd.DataFrame({
+        'conference_id': codes,
+        'government_statement_id': conferences['government_statement_id'].values,
+        'points': conferences['points'].values,
+    })
+    dates = max_points(dates, ['conference_id', 'government_statement_id'])
+    dates.to_sql(name='ConferenceDatePoints', con=engine, if_exists='append', index=False, index_label=None,
+                 method=executemany)
+    domains = pd.read_sql('SELECT id, name FROM Domains', engine)
+    conference_domains(titles['id'].values, domains).to_sql(name='ConferenceDomains', con=engine, if_exists='append',
+                                                             index=False, index_label=None, method=executemany)
+
+
+def conference_domains(ids: np.ndarray, domains: pd.DataFrame) -> pd.DataFrame:
+    """
+    :param ids: ids of conferences
+    :param domains: ids and names of all domains
+    :return: ConferenceDomains linking the conferences to CONFERENCE_DOMAINS
+    """
+    domain_ids = dict(zip(domains['name'], domains['id']))
+    missing = [name for name in CONFERENCE_DOMAINS if name not in domain_ids]
+    if missing:
+        raise RuntimeError(f"Domains of conferences missing in journal statements: {', '.join(missing)}")
     c_domains = pd.DataFrame(columns=['conference_id', 'domain_id'])
-    c_domains['conference_id'] = np.tile(titles['id'], 2)
-    c_domains['domain_id'] = np.repeat([9,37], len(titles['id']))
-    c_domains.to_sql(name='ConferenceDomains', con=engine, if_exists='append', index=False, index_label=None)
+    c_domains['conference_id'] = np.tile(ids, len(CONFERENCE_DOMAINS))
+    c_domains['domain_id'] = np.repeat([domain_ids[name] for name in CONFERENCE_DOMAINS], len(ids))
+    return c_domains
 
-def journal_to_db(engine, config: Config):
-    journals = None
-    data_path = config['data_path'] + '/journals'
-    gov = pd.DataFrame(config['journals']).reset_index()
-    government_statements = pd.DataFrame(columns=['id', 'url', 'title', 'starting_date'])
-    government_statements['id'] = gov['index'] + len(config['monographs'])
-    government_statements['url'] = gov['url']
-    government_statements['title'] = gov['title']
-    government_statements['starting_date'] = pd.to_datetime(gov['date'])
-    for filename in os.listdir(data_path):
-        if int(filename[-9:-5]) > 2017:
-            j = pd.read_excel(os.path.join(data_path, filename), 0, header=0)
-            j = j.iloc[:, 1:]
-            j.columns = list(j.iloc[0, :5].values) + ['issn 2', 'e-issn 2', 'points'] + list(j.columns[8:])
-            j = j.iloc[1:, 1:]
-            j[j.columns[7:]] = np.where(j[j.columns[7:]].notna(), True, False)
-
-            # removing 2nd issn/title/e-issn if same
-            j.loc[(j['issn'] == j['issn 2']), 'issn 2'] = np.nan
-            j.loc[(j['Tytuł 1'] == j['Tytuł 2']), 'Tytuł 2'] = np.nan
-            j.loc[(j['e-issn'] == j['e-issn 2']), 'e-issn 2'] = np.nan
-
-            # fill 1st title/issn/e-issn with 2nd if 1st not present
-            j.loc[j['Tytuł 1'].isna(), 'Tytuł 1'] = j[j['Tytuł 1'].isna()]['Tytuł 2']
-            j.loc[j['issn'].isna(), 'issn'] = j[j['issn'].isna()]['issn 2']
-            j.loc[j['e-issn'].isna(), 'e-issn'] = j[j['e-issn'].isna()]['e-issn 2']
-
-            j['government_statement_id'] = government_statements[government_statements['starting_date'] == filename[-15:-5].replace('-','.')]['id'].values[0]
-            if journals is None:
-                journals = j
-            else:
-                journals = journals.append(j)
-    for filename in os.listdir(data_path):
-        if int(filename[-9:-5]) < 2018:
-            j = pd.read_excel(os.path.join(data_path, filename), 0, header=0)
-            j = j.iloc[:, 1:]
-            j.columns = list(j.iloc[0, :5].values) + ['issn 2', 'e-issn 2', 'points'] + list(j.columns[8:])
-            j = j.iloc[1:, 1:]
-            j[j.columns[7:]] = np.where(j[j.columns[7:]].notna(), True, False)
-
-            j['government_statement_id'] = government_statements[government_statements['starting_date'] == filename[-15:-5].replace('-','.')]['id'].values[0]
-            journals = journals.append(j)
-
-    
-    titles = pd.DataFrame(columns=['id', 'title'])
-    journals['Tytuł 1'] = journals['Tytuł 1'].replace('\n', ' ', regex=True).replace('\r', '', regex=True)
-    titles['title'] = journals['Tytuł 1'].unique()
-    titles['id'] = titles.index
-    joined = titles.join(journals.set_index('Tytuł 1'), on='title', how='outer')
-    dates = joined[['id', 'government_statement_id', 'points']]
-    dates.columns = ['journal_id', 'government_statement_id', 'points']
-    dates = dates.sort_values('points').drop_duplicates(subset=['journal_id', 'government_statement_id'], keep='last')
-    titles.to_sql(name='Journals', con=engine, if_exists='append', index=False, index_label='id')
-    # drop duplicates
-    dates = dates.groupby(['journal_id', 'government_statement_id'])['points'].max().reset_index()
-    dates.to_sql(name='JournalDatePoints', con=engine, if_exists='append', index=False, index_label=None)
-    domains = pd.DataFrame(columns=['id', 'name'])
-    domains['name'] = journals.columns[7:-2]
-    domains['id'] = domains.index
-    domains.to_sql(name='Domains', con=engine, if_exists='append', index=False, index_label=None)
-    domain_matrix = joined.drop_duplicates(['id']).sort_values(by=['id']).iloc[:, 8:-2].values
-    j_domains = pd.DataFrame(np.argwhere(domain_matrix), columns=['journal_id', 'domain_id'])
-    j_domains.to_sql(name='JournalDomains', con=engine, if_exists='append', index=False, index_label=None)
+
+def journal_to_db(engine, config: Config, files: List[JournalStatementFile]):
+    government_statements = journal_statements(config)
+    # In the order of statements, so that journals and domains of a new statement get the next ids
+    files = sorted(files, key=lambda f: statement_id(government_statements, f.date))
+    journals = pd.concat([
+        statement_journals(file, statement_id(government_statements, file.date)) for file in files
+    ], ignore_index=True, sort=False)
+
+    ids, names = assign_ids(journals['Tytuł 1'].values, pd.Series([], dtype=object))
+    titles = pd.DataFrame({'id': np.arange(len(names)), 'title': names})
+    titles['name_key'] = titles['title'].map(normalize_name, na_action='ignore')
+    titles.to_sql(name='Journals', con=engine, if_exists='append', index=False, index_label='id', method=executemany)
+
+    dates = pd.DataFrame({
+        'journal_id': ids,
+        'government_statement_id': journals['government_statement_id'].values,
+        'points': journals['points'].values,
+    })
+    dates = max_points(dates, ['journal_id', 'government_statement_id'])
+    dates.to_sql(name='JournalDatePoints', con=engine, if_exists='append', index=False, index_label=None,
+                 method=executemany)
+
+    domain_names = list(dict.fromkeys(name for file in files for name in file.domains))
+    domains = pd.DataFrame({'id': np.arange(len(domain_names)), 'name': domain_names})
+    domains.to_sql(name='Domains', con=engine, if_exists='append', index=False, index_label=None, method=executemany)
+    # Domains of a journal are the flags of its first row in its newest statement. A domain
+    # missing in the sheet of that statement, e.g. a newer discipline for a journal only
+    # listed in 2017, is not set
+    rows = newest_rows(ids, journals['government_statement_id'].values)
+    j_domains = domain_links(journals.iloc[rows], ids[rows], dict(zip(domain_names, domains['id'])))
+    j_domains.to_sql(name='JournalDomains', con=engine, if_exists='append', index=False, index_label=None,
+                     method=executemany)
+
+    # ISSNs and e-ISSNs from all statements
+    identifiers = journal_identifiers(journals, ids)
+    identifiers.to_sql(name='JournalIdentifiers', con=engine, if_exists='append', index=False, index_label=None,
+                       method=executemany)
+
+
+def add_journal_statement(engine, config: Config, file: JournalStatementFile) -> Dict[str, List[int]]:
+    """
+    Adds a journal statement to a built database, with the same result as
+    building the database again. New journals, conferences and domains get
+    the next ids, points of the statement are added, and domains of journals
+    in the statement are replaced by those of the statement.
+    :param file: spreadsheet of the last journal statement in the config
+    :return: ids of added or changed journals and conferences, by publication type
+    """
+    government_statements = journal_statements(config)
+    new_id = statement_id(government_statements, file.date)
+    with engine.begin() as connection:
+        existing = set(pd.read_sql('SELECT id FROM GovernmentStatements', connection)['id'])
+        if new_id in existing:
+            raise RuntimeError(f'Statement {file.date} is already in the database')
+        if new_id != government_statements['id'].max() or not existing.issuperset(government_statements['id'][:-1]):
+            raise RuntimeError(f'Only the last statement in the config can be added, '
+                               f'build the database again to add statement {file.date}')
+        government_statements[government_statements['id'] == new_id].to_sql(
+            name='GovernmentStatements', con=connection, if_exists='append', index=False, index_label='id')
+
+        journals = statement_journals(file, new_id)
+        existing_titles = pd.read_sql('SELECT title FROM Journals ORDER BY id', connection)['title']
+        ids, names = assign_ids(journals['Tytuł 1'].values, existing_titles)
+        titles = pd.DataFrame({'id': np.arange(len(existing_titles), len(existing_titles) + len(names)), 'title': names})
+        titles['name_key'] = titles['title'].map(normalize_name, na_action='ignore')
+        titles.to_sql(name='Journals', con=connection, if_exists='append', index=False, index_label='id',
+                      method=executemany)
+
+        dates = pd.DataFrame({'journal_id': ids, 'government_statement_id': new_id, 'points': journals['points'].values})
+        max_points(dates, ['journal_id', 'government_statement_id']).to_sql(
+            name='JournalDatePoints', con=connection, if_exists='append', index=False, index_label=None,
+            method=executemany)
+
+        domain_ids = pd.read_sql('SELECT id, name FROM Domains ORDER BY id', connection)
+        new_domains = [d for d in file.domains if d not in set(domain_ids['name'])]
+        new_domains = pd.DataFrame({'id': np.arange(len(domain_ids), len(domain_ids) + len(new_domains)),
+                                    'name': new_domains})
+        new_domains.to_sql(name='Domains', con=connection, if_exists='append', index=False, index_label=None,
+                           method=executemany)
+        domain_ids = pd.concat([domain_ids, new_domains])
+        # The statement is the newest one of all its journals
+        rows = newest_rows(ids, np.full(len(ids), new_id))
+        changed = ids[rows]
+        cursor = connection.connection.cursor()
+        cursor.executemany('DELETE FROM JournalDomains WHERE journal_id = ?', ((int(i),) for i in changed))
+        j_domains = domain_links(journals.iloc[rows], changed, dict(zip(domain_ids['name'], domain_ids['id'])))
+        j_domains.to_sql(name='JournalDomains', con=connection, if_exists='append', index=False, index_label=None,
+                         method=executemany)
+
+        identifiers = journal_identifiers(journals, ids)
+        existing_identifiers = pd.read_sql('SELECT journal_id, issn FROM JournalIdentifiers', connection)
+        identifiers = identifiers.merge(existing_identifiers, how='left', indicator=True)
+        identifiers = identifiers[identifiers['_merge'] == 'left_only'].drop(columns='_merge')
+        identifiers.to_sql(name='JournalIdentifiers', con=connection, if_exists='append', index=False,
+                           index_label=None, method=executemany)
+
+        changed_conferences = np.array([], dtype=int)
+        if has_conferences(file):
+            conferences = statement_conferences(file, new_id)
+            existing_titles = pd.read_sql('SELECT title FROM Conferences ORDER BY id', connection)['title']
+            ids, names = assign_ids(conferences['title'].values, existing_titles)
+            titles = pd.DataFrame({'id': np.arange(len(existing_titles), len(existing_titles) + len(names)),
+                                   'title': names})
+            titles['name_key'] = titles['title'].map(normalize_name, na_action='ignore')
+            titles.to_sql(name='Conferences', con=connection, if_exists='append', index=False, index_label='id',
+                          method=executemany)
+            dates = pd.DataFrame({'conference_id': ids, 'government_statement_id': new_id,
+                                  'points': conferences['points'].values})
+            max_points(dates, ['conference_id', 'government_statement_id']).to_sql(
+                name='ConferenceDatePoints', con=connection, if_exists='append', index=False, index_label=None,
+                method=executemany)
+            conference_domains(titles['id'].values, domain_ids).to_sql(name='ConferenceDomains', con=connection,
+                                                                       if_exists='append', index=False,
+                                                                       index_label=None, method=executemany)
+            changed_conferences = np.unique(ids)
+    return {'czasopisma': changed.tolist(), 'konferencje': changed_conferences.tolist()}
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Builds the database and the text index.')
+    parser.add_argument('--add-statement', metavar='DD.MM.YYYY',
+                        help='only add the journal statement with this date, the last one in the config, '
+                             'to a built database')
+    args = parser.parse_args()
     config = Config()
 
     con = sqlite3.connect(config['db_file'])
     cur = con.cursor()
     engine = create_engine(f"sqlite:///{config['db_file']}")
+    # Files are parsed in parallel, ids don't depend on the number of workers
+    workers = config.get('build', {}).get('workers') or os.cpu_count()
+    journals_path = os.path.join(config['data_path'], 'journals')
+
+    if args.add_statement:
+        journal_files = read_journal_files(journals_path, config.get('cache_path'), dates=[args.add_statement])
+        if len(journal_files) == 0:
+            raise SystemExit(f'No spreadsheet of statement {args.add_statement} in {journals_path}')
+        changed = add_journal_statement(engine, config, journal_files[0])
+    else:
+        with open('src/data_preprocessing/drop_all_tables.sql') as query_file:
+            cur.executescript(query_file.read())
 
-    with open('src/data_preprocessing/drop_all_tables.sql') as query_file:
-        cur.executescript(query_file.read())
+        Base.metadata.create_all(engine)
 
-    Base.metadata.create_all(engine)
+        os.makedirs(config['data_path'], exist_ok=True)
+        monograph_to_db(engine, config, workers)
+        # Spreadsheets are parsed once, both loaders use the parsed sheets
+        journal_files = read_journal_files(journals_path, config.get('cache_path'), workers,
+                                           [entry['date'] for entry in config['journals']])
+        journal_to_db(engine, config, journal_files)
+        conference_to_db(engine, config, journal_files)
 
-    os.makedirs(config['data_path'], exist_ok=True)
-    monograph_to_db(engine, config)
-    journal_to_db(engine, config)
-    conference_to_db(engine, config)
+    # Collect statistics for the query planner, so that lookups use the indexes
+    cur.execute('ANALYZE')
 
-    # Build the text index
+    # Build the text index, or only update documents of changed entries
     Session = sessionmaker(bind=engine)
     index_builder = IndexBuilder(config, Session())
-    index_builder.build_index()
+    if args.add_statement:
+        generations = index_builder.update_index(changed)
+        for publication_type, generation in generations.items():
+            print(f'Updated {len(changed[publication_type])} {publication_type} in the text index, '
+                  f'generation {generation}')
+    else:
+        generations = index_builder.build_index()
+        for publication_type, generation in generations.items():
+            print(f'Built the text index of {publication_type}, generation {generation}')
@@ -0,0 +1,78 @@
+import json
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from .search import BatchSearch
+from .search.scoring import CHUNK_SIZE, score_items
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+def create_api(batch_search: BatchSearch, chunk_size: int = CHUNK_SIZE) -> Blueprint:
+    """
+    HTTP API for scoring publications without the UI, to be registered on the Flask server of the app.
+
+    POST /api/v1/score takes items with 'title', 'date', 'type' and 'domains',
+    see score_items. A JSON body is a list of items and the response is a
+    list of results. An NDJSON body has an item per line and the response has
+    a result per line, both are streamed, so clients can send any number of
+    items without buffering them. Results are in the order of items, invalid
+    items get a result with an 'error'.
+    :param chunk_size: number of items resolved at once
+    """
+    api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+    @api.route('/score', methods=['POST'])
+    def score():
+        if request.mimetype in NDJSON_MIMETYPES:
+            results = score_items(batch_search, _read_ndjson(request.stream), chunk_size)
+            return Response(stream_with_context(_ndjson_chunks(results, chunk_size)), mimetype='application/x-ndjson')
+
+        if request.mimetype != 'application/json':
+            return jsonify(error=f"Unsupported content type, use application/json or {NDJSON_MIMETYPES[0]}"), 415
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return jsonify(error='The body must be a JSON list of items'), 400
+        results = score_items(batch_search, items, chunk_size)
+        return Response(stream_with_context(_json_list_chunks(results, chunk_size)), mimetype='application/json')
+
+    return api
+
+
+def _read_ndjson(stream) -> Iterator:
+    """
+    :return: an item per non-empty line, None for lines which are not valid JSON
+    """
+    for line in iter(stream.readline, b''):
+        line = line.strip()
+        if len(line) == 0:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _encoded_chunks(results: Iterable[dict], chunk_size: int) -> Iterator[List[str]]:
+    results = iter(results)
+    while True:
+        chunk = list(islice(results, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield [json.dumps(r, ensure_ascii=False) for r in chunk]
+
+
+def _ndjson_chunks(results: Iterable[dict], chunk_size: int) -> Iterator[str]:
+    for chunk in _encoded_chunks(results, chunk_size):
+        yield ''.join(r + '\n' for r in chunk)
+
+
+def _json_list_chunks(results: Iterable[dict], chunk_size: int) -> Iterator[str]:
+    yield '['
+    separator = ''
+    for chunk in _encoded_chunks(results, chunk_size):
+        yield separator + ','.join(chunk)
+        separator = ','
+    yield ']'
@@ -1,8 +1,9 @@
-from typing import List
+from typing import List, Sequence
 
 import dash_html_components as html
 import colorlover as cl
-import pandas as pd
+
+from .text_index import SearchHit
 
 
 def format_points_tooltip_based_on_search(
@@ -19,7 +20,7 @@ def format_points_tooltip_based_on_search(
         return f"*{publication_name}* nie liczy się w wybranych dziedzinach naukowych."
 
 
-def format_suggestions_based_on_search(searched_term: str, search_result: pd.DataFrame) -> str:
+def format_suggestions_based_on_search(searched_term: str, search_result: Sequence[SearchHit]) -> str:
     if len(search_result) == 0:
         return f'Szukano: *{searched_term}*, nie znaleziono żadnych wyników.'
 
@@ -28,8 +29,8 @@ def format_suggestions_based_on_search(searched_term: str, search_result: pd.Dat
 
     markdown_value = f'Szukano: *{searched_term}*.\n\n Inne sugestie:'
 
-    for i, r in search_result.iloc[1:4].iterrows():
-        markdown_value += f"\n{i}. {r['name']} ({r['score']:.0%})"
+    for i, hit in enumerate(search_result[1:4], start=1):
+        markdown_value += f"\n{i}. {hit.name} ({hit.score:.0%})"
     return markdown_value
 
 
@@ -23,6 +23,15 @@ class Config:
         """
         return self._config[key]
 
+    def get(self, key: str, default=None):
+        """
+        Return a setting from the config, for settings missing in older configs
+        :param key: key for the setting
+        :param default: value returned if the setting is missing
+        :return: value of the setting
+        """
+        return self._config.get(key, default)
+
     def get_monograph_config(self) -> List[MonographConfigEntry]:
         """
         :return: List of monograph config entries
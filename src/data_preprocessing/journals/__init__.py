@@ -0,0 +1 @@
+from .journal_parser import JournalStatementFile, read_journal_files
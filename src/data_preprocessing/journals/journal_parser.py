@@ -0,0 +1,141 @@
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Bumped whenever parsing changes, so that frames cached by an older version are not used
+PARSER_VERSION = 1
+# Date of the statement in file names, e.g. wykaz_czasopism_09-02-2021.xlsx
+_FILE_DATE = re.compile(r'(\d\d)-(\d\d)-(\d{4})\.xlsx$')
+
+
+class JournalStatementFile:
+    def __init__(self, path: str, journals: pd.DataFrame, conferences: Optional[pd.DataFrame]):
+        self.path = path
+        day, month, year = _FILE_DATE.search(path).groups()
+        # Date of the statement as in the config, DD.MM.YYYY
+        self.date = f'{day}.{month}.{year}'
+        self.year = int(year)
+        # Journal sheet, with 'Tytuł 1', 'issn', 'e-issn', 'Tytuł 2', 'issn 2', 'e-issn 2' and 'points'
+        # followed by a boolean column per domain
+        self.journals = journals
+        # Conference sheet with 'title' and 'points', None if the file has no conference sheet
+        self.conferences = conferences
+
+    @property
+    def domains(self) -> List[str]:
+        """
+        :return: names of the domain columns of the journal sheet, the last column is not a domain
+        """
+        return list(self.journals.columns[7:-1])
+
+
+def read_journal_files(data_path: str, cache_path: Optional[str] = None, workers: int = 1,
+                       dates: Optional[List[str]] = None) -> List[JournalStatementFile]:
+    """
+    Reads both sheets of every spreadsheet with journals and conferences.
+    Parsing a spreadsheet is slow, so parsed sheets are cached as Feather
+    files, keyed by the hash of the spreadsheet, and reused by later builds.
+    Spreadsheets are independent, with several workers they are parsed in
+    parallel, the result doesn't depend on the number of workers.
+    :param data_path: directory with the spreadsheets
+    :param cache_path: directory with cached sheets, None to parse all spreadsheets
+    :param workers: number of processes parsing spreadsheets, 1 parses them in this process
+    :param dates: dates of statements to read, DD.MM.YYYY, None for all of them
+    :return: parsed files, the newest statement first
+    """
+    paths = [
+        os.path.join(data_path, f) for f in os.listdir(data_path)
+        if _FILE_DATE.search(f) and (dates is None or '.'.join(_FILE_DATE.search(f).groups()) in dates)
+    ]
+    paths.sort(key=lambda p: _FILE_DATE.search(p).group(3, 2, 1), reverse=True)
+    if cache_path is not None:
+        os.makedirs(cache_path, exist_ok=True)
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(min(workers, len(paths))) as executor:
+            # Results come in the order of paths
+            sheets = list(executor.map(_read_cached, paths, repeat(cache_path)))
+    else:
+        sheets = [_read_cached(path, cache_path) for path in paths]
+    return [JournalStatementFile(path, *s) for path, s in zip(paths, sheets)]
+
+
+def parse_workbook(path: str) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Opens the spreadsheet once and parses both sheets.
+    :return: journal and conference sheets, see JournalStatementFile
+    """
+    with pd.ExcelFile(path, engine='openpyxl') as workbook:
+        j = workbook.parse(0, header=0)
+        c = workbook.parse(1, header=0) if len(workbook.sheet_names) > 1 else None
+
+    # The header spans two rows, the second one names the first columns
+    j = j.iloc[:, 1:]
+    j.columns = list(j.iloc[0, :5].values) + ['issn 2', 'e-issn 2', 'points'] + list(j.columns[8:])
+    j = j.iloc[1:, 1:].reset_index(drop=True)
+    j[j.columns[7:]] = np.where(j[j.columns[7:]].notna(), True, False)
+    j = _typed(j)
+
+    if c is not None:
+        c = c.iloc[:, 1:3]
+        c.columns = ['title', 'points']
+        c = _typed(c)
+    return j, c
+
+
+def _read_cached(path: str, cache_path: Optional[str]) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    if cache_path is None:
+        return parse_workbook(path)
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    prefix = os.path.join(cache_path, f'{digest}-v{PARSER_VERSION}')
+    journals_path = prefix + '-journals.feather'
+    conferences_path = prefix + '-conferences.feather'
+    no_conferences_path = prefix + '-no-conferences'
+    if os.path.exists(journals_path) and (os.path.exists(conferences_path) or os.path.exists(no_conferences_path)):
+        journals = _from_feather(journals_path)
+        conferences = _from_feather(conferences_path) if os.path.exists(conferences_path) else None
+        return journals, conferences
+
+    journals, conferences = parse_workbook(path)
+    if conferences is not None:
+        _to_feather(conferences, conferences_path)
+    else:
+        open(no_conferences_path, 'w').close()
+    # Written last, its presence means the whole file is cached
+    _to_feather(journals, journals_path)
+    return journals, conferences
+
+
+def _typed(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Columns of sheets are read as objects, with the header rows in them.
+    :return: frame with numeric columns converted, and text columns holding only strings and NaN
+    """
+    frame = frame.infer_objects()
+    for column in frame.columns[frame.dtypes == object]:
+        values = frame[column]
+        mixed = values.notna() & ~values.map(lambda v: isinstance(v, str))
+        if mixed.any():
+            frame[column] = values.where(~mixed, values.astype(str))
+    return frame
+
+
+def _to_feather(frame: pd.DataFrame, path: str):
+    # Written under another name first, so that an interrupted build leaves no partial file
+    frame.to_feather(path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def _from_feather(path: str) -> pd.DataFrame:
+    frame = pd.read_feather(path)
+    # Missing text is read as None, NaN as before
+    objects = frame.columns[frame.dtypes == object]
+    frame[objects] = frame[objects].where(frame[objects].notna(), np.nan)
+    return frame
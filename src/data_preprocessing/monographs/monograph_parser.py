@@ -1,6 +1,7 @@
 import pandas as pd
 import re
 import tabula
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.preprocessing import LabelEncoder
 from typing import List
 
@@ -78,30 +79,46 @@ def monograph_parser_strategy_2(table):
     return table
 
 
-def parse_monographs(monograph_config: List[MonographConfigEntry]):
+def parse_monograph_pdf(path) -> pd.DataFrame:
+    """
+    :param path: path of a document with points for monographs
+    :return: pandas.DataFrame with columns 'publisher_name' and 'points'
+    """
+    table = tabula.read_pdf(path, pages='all',
+                            multiple_tables=True,
+                            pandas_options={'header': None},
+                            lattice=True)
+    table = pd.concat(table).reset_index(drop=True)
+    if len(table.columns) == 3:
+        return monograph_parser_strategy_1(table)
+    elif len(table.columns) == 2:
+        return monograph_parser_strategy_2(table)
+    else:
+        # Add different parser strategies
+        raise NotImplementedError()
+
+
+def parse_monographs(monograph_config: List[MonographConfigEntry], workers: int = 1):
     """
     Parse tables with monographs.
     At the moment we don't merge with publisher_info to get DOI (no common column - names are different).
     :param monograph_config:
+    :param workers: number of processes parsing documents, 1 parses them in this process,
+    the result doesn't depend on the number of workers
     :return: 3 tables ready for db insertion: monograph,
     MonographDatePoints, GovernmentStatements
     """
     results = []
     monograph_encoder = LabelEncoder()
     government_document_encoder = LabelEncoder()
-    for m in monograph_config:
-        table = tabula.read_pdf(m.path, pages='all',
-                                multiple_tables=True,
-                                pandas_options={'header': None},
-                                lattice=True)
-        table = pd.concat(table).reset_index(drop=True)
-        if len(table.columns) == 3:
-            result = monograph_parser_strategy_1(table)
-        elif len(table.columns) == 2:
-            result = monograph_parser_strategy_2(table)
-        else:
-            # Add different parser strategies
-            raise NotImplementedError()
+    paths = [m.path for m in monograph_config]
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(min(workers, len(paths))) as executor:
+            # Results come in the order of the config
+            tables = list(executor.map(parse_monograph_pdf, paths))
+    else:
+        tables = [parse_monograph_pdf(path) for path in paths]
+    for m, result in zip(monograph_config, tables):
         result['starting_date'] = m.date
         result['title'] = m.title
         result['url'] = m.url
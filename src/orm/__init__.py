@@ -2,6 +2,6 @@ from .base import Base
 from .conferences import Conferences, ConferenceDatePoints, ConferenceDomains
 from .domains import Domains
 from .government_statements import GovernmentStatements
-from .journals import Journals, JournalDomains, JournalDatePoints
+from .journals import Journals, JournalDomains, JournalDatePoints, JournalIdentifiers
 from .monographs import Monographs, MonographDatePoints
 from .cursor import Cursor
\ No newline at end of file
@@ -10,14 +10,16 @@ class Conferences(Base):
     __tablename__ = 'Conferences'
 
     id = Column(Integer, primary_key=True)
-    title = Column(String)
+    title = Column(String, index=True)
+    # Title normalized for exact matching, see text_index.normalize_name
+    name_key = Column(String, index=True)
 
 
 class ConferenceDatePoints(Base):
     __tablename__ = 'ConferenceDatePoints'
 
     conference_id = Column(Integer, ForeignKey('Conferences.id'), primary_key=True)
-    government_statement_id = Column(Integer, ForeignKey('GovernmentStatements.id'), primary_key=True)
+    government_statement_id = Column(Integer, ForeignKey('GovernmentStatements.id'), primary_key=True, index=True)
     points = Column(Integer)
 
 
@@ -25,7 +27,7 @@ class ConferenceDomains(Base):
     __tablename__ = 'ConferenceDomains'
 
     conference_id = Column(Integer, ForeignKey('Conferences.id'), primary_key=True)
-    domain_id = Column(Integer, ForeignKey('Domains.id'), primary_key=True)
+    domain_id = Column(Integer, ForeignKey('Domains.id'), primary_key=True, index=True)
 
 
 Conferences.conference_date_points = relationship("ConferenceDatePoints",
@@ -1,8 +1,8 @@
 from src.orm.conferences import ConferenceDomains
-from src.orm.journals import JournalDomains
-from typing import List
+from src.orm.journals import JournalDomains, JournalIdentifiers
+from typing import List, Tuple
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, select
 from sqlalchemy.orm import Session
 
 from src.orm import Conferences, Journals, Monographs, JournalDatePoints, ConferenceDatePoints, \
@@ -22,37 +22,13 @@ class Cursor:
         self.session.close()
 
     def get_conference_date_points(self, title):
-        conferences = self.session.query(Conferences) \
-            .where(Conferences.title == title) \
-            .join(ConferenceDatePoints) \
-            .join(GovernmentStatements).all()
-        conference = conferences[0]
-        point_dates = [(i.GovernmentStatements.title,
-                        str(i.GovernmentStatements.starting_date),
-                        i.points) for i in conference.conference_date_points]
-        return point_dates
+        return self.__get_date_points_by_name(Conferences.title == title, 'konferencje')
 
     def get_monograph_date_points(self, publisher_name):
-        monographs = self.session.query(Monographs) \
-            .where(Monographs.publisher_name == publisher_name) \
-            .join(MonographDatePoints) \
-            .join(GovernmentStatements).all()
-        monograph = monographs[0]
-        point_dates = [(i.GovernmentStatements.title,
-                        str(i.GovernmentStatements.starting_date),
-                        i.points) for i in monograph.monograph_date_points]
-        return point_dates
+        return self.__get_date_points_by_name(Monographs.publisher_name == publisher_name, 'monografie')
 
     def get_journal_date_points(self, title):
-        journals = self.session.query(Journals) \
-            .where(Journals.title == title) \
-            .join(JournalDatePoints) \
-            .join(GovernmentStatements).all()
-        journal = journals[0]
-        point_dates = [(i.GovernmentStatements.title,
-                        str(i.GovernmentStatements.starting_date),
-                        i.points) for i in journal.journal_date_points]
-        return point_dates
+        return self.__get_date_points_by_name(Journals.title == title, 'czasopisma')
 
     def get_date_points(self, title, publication_type):
         if publication_type == 'czasopisma':
@@ -70,18 +46,99 @@ class Cursor:
         return [d.name for d in self.session.query(Domains.name).order_by(Domains.name)]
 
     def get_journal_domains(self, title):
-        domains = self.session.query(Domains) \
-            .join(JournalDomains) \
-            .join(Journals) \
-            .where(Journals.title == title) \
-            .order_by(Domains.name).all()
+        domains = self.session.execute(
+            select(Domains.name)
+            .join(JournalDomains)
+            .join(Journals)
+            .where(Journals.title == title)
+            .order_by(Domains.name)
+        )
         return [d.name for d in domains]
 
     def get_conference_domains(self, title):
-        domains = self.session.query(Domains) \
-            .join(ConferenceDomains) \
-            .join(Conferences) \
-            .where(Conferences.title == title) \
-            .order_by(Domains.name).all()
+        domains = self.session.execute(
+            select(Domains.name)
+            .join(ConferenceDomains)
+            .join(Conferences)
+            .where(Conferences.title == title)
+            .order_by(Domains.name)
+        )
         return [d.name for d in domains]
 
+    def get_names(self, publication_type: str) -> List[Tuple[int, str]]:
+        """
+        :return: (id, name) of all journals/conferences/monographs
+        """
+        entity, name_column, _, _, _, _ = self.__get_tables(publication_type)
+        return [tuple(r) for r in self.session.execute(select(entity.id, name_column).order_by(entity.id))]
+
+    def get_government_statements(self) -> List[Tuple[int, str, str]]:
+        """
+        :return: (id, title, starting date) of all government statements
+        """
+        rows = self.session.execute(
+            select(GovernmentStatements.id, GovernmentStatements.title, GovernmentStatements.starting_date)
+            .order_by(GovernmentStatements.id)
+        )
+        return [(i, title, str(date)) for i, title, date in rows]
+
+    def get_domain_ids(self) -> List[Tuple[int, str]]:
+        """
+        :return: (id, name) of all domains
+        """
+        return [tuple(r) for r in self.session.execute(select(Domains.id, Domains.name).order_by(Domains.id))]
+
+    def get_journal_identifier_rows(self) -> List[Tuple[int, str]]:
+        """
+        :return: (journal id, ISSN) of all ISSNs and e-ISSNs of journals
+        """
+        return [tuple(r) for r in self.session.execute(
+            select(JournalIdentifiers.journal_id, JournalIdentifiers.issn)
+        )]
+
+    def get_date_point_rows(self, publication_type: str) -> List[Tuple[int, int, int]]:
+        """
+        :return: (entry id, government statement id, points) of all date points of the given type
+        """
+        _, _, date_points, entity_id, _, _ = self.__get_tables(publication_type)
+        return [tuple(r) for r in self.session.execute(
+            select(entity_id, date_points.government_statement_id, date_points.points)
+        )]
+
+    def get_domain_rows(self, publication_type: str) -> List[Tuple[int, int]]:
+        """
+        :return: (entry id, domain id) of all domain links of the given type, empty for monographs
+        """
+        _, _, _, _, entity_domains, entity_id = self.__get_tables(publication_type)
+        if entity_domains is None:
+            return []
+        return [tuple(r) for r in self.session.execute(select(entity_id, entity_domains.domain_id))]
+
+    def __get_date_points_by_name(self, condition, publication_type: str) -> List[Tuple[str, str, int]]:
+        entity, _, date_points, _, _, _ = self.__get_tables(publication_type)
+        rows = self.session.execute(
+            select(GovernmentStatements.title, GovernmentStatements.starting_date, date_points.points)
+            .select_from(entity)
+            .join(date_points)
+            .join(GovernmentStatements)
+            .where(condition)
+            .order_by(GovernmentStatements.id)
+        )
+        return [(title, str(date), points) for title, date, points in rows]
+
+    @staticmethod
+    def __get_tables(publication_type: str):
+        """
+        :return: entity table, its name column, date points table, its entity id column,
+        domains link table and its entity id column (None for monographs)
+        """
+        if publication_type == 'czasopisma':
+            return Journals, Journals.title, JournalDatePoints, JournalDatePoints.journal_id, \
+                   JournalDomains, JournalDomains.journal_id
+        elif publication_type == 'konferencje':
+            return Conferences, Conferences.title, ConferenceDatePoints, ConferenceDatePoints.conference_id, \
+                   ConferenceDomains, ConferenceDomains.conference_id
+        elif publication_type == 'monografie':
+            return Monographs, Monographs.publisher_name, MonographDatePoints, MonographDatePoints.monograph_id, \
+                   None, None
+        raise RuntimeError(f'Unknown publication type: {publication_type}')
@@ -10,14 +10,16 @@ class Journals(Base):
     __tablename__ = 'Journals'
 
     id = Column(Integer, primary_key=True)
-    title = Column(String)
+    title = Column(String, index=True)
+    # Title normalized for exact matching, see text_index.normalize_name
+    name_key = Column(String, index=True)
 
 
 class JournalDatePoints(Base):
     __tablename__ = 'JournalDatePoints'
 
     journal_id = Column(Integer, ForeignKey('Journals.id'), primary_key=True)
-    government_statement_id = Column(Integer, ForeignKey('GovernmentStatements.id'), primary_key=True)
+    government_statement_id = Column(Integer, ForeignKey('GovernmentStatements.id'), primary_key=True, index=True)
     points = Column(Integer)
 
 
@@ -25,7 +27,15 @@ class JournalDomains(Base):
     __tablename__ = 'JournalDomains'
 
     journal_id = Column(Integer, ForeignKey('Journals.id'), primary_key=True)
-    domain_id = Column(Integer, ForeignKey('Domains.id'), primary_key=True)
+    domain_id = Column(Integer, ForeignKey('Domains.id'), primary_key=True, index=True)
+
+
+class JournalIdentifiers(Base):
+    __tablename__ = 'JournalIdentifiers'
+
+    journal_id = Column(Integer, ForeignKey('Journals.id'), primary_key=True)
+    # ISSN or e-ISSN in the NNNN-NNNC format
+    issn = Column(String, primary_key=True, index=True)
 
 
 Journals.journal_date_points = relationship("JournalDatePoints",
@@ -9,7 +9,9 @@ class Monographs(Base):
     __tablename__ = 'Monographs'
 
     id = Column(Integer, primary_key=True)
-    publisher_name = Column(String)
+    publisher_name = Column(String, index=True)
+    # Publisher name normalized for exact matching, see text_index.normalize_name
+    name_key = Column(String, index=True)
 
     def __repr__(self):
         return f"Monographs(\"{self.id}\", \"{self.publisher_name}\")"
@@ -19,7 +21,7 @@ class MonographDatePoints(Base):
     __tablename__ = 'MonographDatePoints'
 
     monograph_id = Column(Integer, ForeignKey('Monographs.id'), primary_key=True)
-    government_statement_id = Column(Integer, ForeignKey('GovernmentStatements.id'), primary_key=True)
+    government_statement_id = Column(Integer, ForeignKey('GovernmentStatements.id'), primary_key=True, index=True)
     points = Column(Integer)
 
 
@@ -0,0 +1,2 @@
+from .store import PointsStore, EntryTable, PUBLICATION_TYPES
+from .resolver import PointsResolver, PointsResolution
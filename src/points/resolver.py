@@ -0,0 +1,120 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .store import EntryTable, PointsStore
+
+
+class PointsResolution:
+    """
+    Points in force for a batch of (entry, date) pairs. All fields are arrays
+    aligned with the queried pairs.
+    """
+
+    def __init__(self, points: np.ndarray, statement_ids: np.ndarray, domains_match: np.ndarray):
+        # Points, 0 if the entry doesn't count in the searched domains
+        self.points = points
+        # Government statement used for the date, -1 if the entry has no points at all
+        self.statement_ids = statement_ids
+        self.domains_match = domains_match
+
+    def __len__(self):
+        return len(self.points)
+
+
+class _Timelines:
+    """
+    All timelines of one publication type merged into one sorted array of
+    keys (entry id, day), so that a single searchsorted call resolves any
+    batch of (entry, date) pairs.
+    """
+
+    def __init__(self, table: EntryTable):
+        self.table = table
+        days = table.dates.astype('datetime64[D]').astype(np.int64)
+        self.first_day = int(days.min()) if len(days) else 0
+        # Every entry owns the key range [id * span, (id + 1) * span), the first slot is
+        # reserved for dates before any statement
+        self.span = (int(days.max()) - self.first_day + 2) if len(days) else 1
+        entries = np.repeat(np.arange(len(table), dtype=np.int64), np.diff(table.timeline_offsets))
+        self.keys = entries * self.span + (days - self.first_day + 1)
+        # Entry of every domain link, used to check domains of many entries at once
+        self.link_entries = np.repeat(np.arange(len(table), dtype=np.int64), np.diff(table.domain_offsets))
+
+    def positions(self, entry_ids: np.ndarray, dates: np.ndarray) -> np.ndarray:
+        """
+        :return: number of statements of each entry published on or before the given date
+        """
+        days = dates.astype('datetime64[D]').astype(np.int64) - self.first_day + 1
+        keys = entry_ids * self.span + np.clip(days, 0, self.span - 1)
+        return np.searchsorted(self.keys, keys, side='right') - self.table.timeline_offsets[entry_ids]
+
+    def domains_match(self, domain_ids: List[int]) -> np.ndarray:
+        """
+        :return: for every entry, whether it belongs to any of the given domains
+        """
+        matched = np.isin(self.table.domain_ids, domain_ids)
+        return np.bincount(self.link_entries[matched], minlength=len(self.table)) > 0
+
+
+class PointsResolver:
+    """
+    Finds the points in force at given dates, using binary search over the
+    sorted statement dates of every entry.
+    """
+
+    def __init__(self, store: PointsStore):
+        self.store = store
+        self.timelines: Dict[str, _Timelines] = {
+            publication_type: _Timelines(table) for publication_type, table in store.tables.items()
+        }
+
+    def resolve(self, publication_type: str, entry_ids: Sequence[int], dates: Sequence[str],
+                domains: Optional[List[str]] = None) -> PointsResolution:
+        """
+        The statement in force is the latest one published on or before the
+        date, or the first one for dates before any statement. When a later
+        statement exists and the entry doesn't belong to any of the domains,
+        it is worth 0 points (domains are not checked for monographs).
+        :param publication_type: one of 'czasopisma', 'konferencje', 'monografie'
+        :param entry_ids: ids of journals/conferences/monographs
+        :param dates: dates of publications, YYYY-MM-DD, aligned with entry_ids
+        :param domains: list of domains the user is interested in
+        :return: resolution aligned with entry_ids
+        """
+        if publication_type not in self.timelines:
+            raise RuntimeError(f'Unknown publication type: {publication_type}')
+        timelines = self.timelines[publication_type]
+        table = timelines.table
+
+        entry_ids = np.asarray(entry_ids, dtype=np.int64)
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        offsets = table.timeline_offsets[entry_ids]
+        counts = table.timeline_offsets[entry_ids + 1] - offsets
+        positions = timelines.positions(entry_ids, dates)
+
+        has_points = counts > 0
+        rows = offsets + np.maximum(positions - 1, 0)
+        rows = np.where(has_points, rows, 0)
+        points = np.where(has_points, table.points[rows] if len(table.points) else 0, 0)
+        statement_ids = np.where(has_points, table.statement_ids[rows] if len(table.statement_ids) else -1, -1)
+
+        if publication_type == 'monografie':
+            domains_match = np.ones(len(entry_ids), dtype=bool)
+        else:
+            domain_ids = [self.store.domain_name_to_id[d] for d in domains or [] if d in self.store.domain_name_to_id]
+            in_domains = timelines.domains_match(domain_ids)[entry_ids]
+            domains_match = in_domains | (positions >= counts)
+        points = np.where(domains_match, points, 0)
+        return PointsResolution(points, statement_ids, domains_match)
+
+    def resolve_name_at_dates(self, name: str, publication_type: str, dates: Sequence[str],
+                              domains: Optional[List[str]] = None) -> Optional[PointsResolution]:
+        """
+        :param name: exact title of a journal/conference or publisher name
+        :return: resolution for every date, None if there is no such entry
+        """
+        entry_id = self.store.get_id(name, publication_type)
+        if entry_id is None:
+            return None
+        return self.resolve(publication_type, np.full(len(dates), entry_id), dates, domains)
@@ -0,0 +1,183 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..orm import Cursor
+
+PUBLICATION_TYPES = ['czasopisma', 'konferencje', 'monografie']
+
+
+def _csr(keys: np.ndarray, size: int) -> np.ndarray:
+    """
+    :param keys: sorted entry ids
+    :param size: number of entries
+    :return: offsets such that rows of entry i are keys[offsets[i]:offsets[i + 1]]
+    """
+    return np.searchsorted(keys, np.arange(size + 1)).astype(np.int64)
+
+
+class EntryTable:
+    """
+    Read model of all journals, conferences or monographs. Entries are
+    addressed by their DB id; per-entry data lives in flat arrays sliced
+    by offset arrays.
+    """
+
+    def __init__(self, names: List[Tuple[int, str]], date_points: List[Tuple[int, int, int]],
+                 domains: List[Tuple[int, int]], statement_dates: np.ndarray, domain_ranks: np.ndarray):
+        size = max((i for i, _ in names), default=-1) + 1
+        self.names: List[Optional[str]] = [None] * size
+        for i, name in names:
+            self.names[i] = name
+        self.name_to_id: Dict[str, int] = {}
+        for i, name in names:
+            # The first entry wins if names repeat
+            self.name_to_id.setdefault(name, i)
+
+        dp = np.array(date_points, dtype=np.int64).reshape(-1, 3)
+        dates = statement_dates[dp[:, 1]]
+        order = np.lexsort((dp[:, 1], dates, dp[:, 0]))
+        dp = dp[order]
+        self.timeline_offsets = _csr(dp[:, 0], size)
+        self.statement_ids = dp[:, 1].astype(np.int32)
+        self.dates = dates[order]
+        self.points = dp[:, 2].astype(np.int32)
+
+        links = np.array(domains, dtype=np.int64).reshape(-1, 2)
+        # Domains of every entry are kept sorted by name
+        order = np.lexsort((domain_ranks[links[:, 1]], links[:, 0]))
+        links = links[order]
+        self.domain_offsets = _csr(links[:, 0], size)
+        self.domain_ids = links[:, 1].astype(np.int32)
+
+    def __len__(self):
+        return len(self.names)
+
+    def timeline(self, entry_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :return: statement ids, statement dates and points of the entry, sorted by date
+        """
+        start, end = self.timeline_offsets[entry_id], self.timeline_offsets[entry_id + 1]
+        return self.statement_ids[start:end], self.dates[start:end], self.points[start:end]
+
+    def domains(self, entry_id: int) -> np.ndarray:
+        """
+        :return: domain ids of the entry, sorted by domain name
+        """
+        return self.domain_ids[self.domain_offsets[entry_id]:self.domain_offsets[entry_id + 1]]
+
+
+class PointsStore:
+    """
+    In-memory, read-only copy of everything needed to compute points: entry
+    names, points timelines and domains of journals, conferences and monographs.
+    Built once at startup, after that no DB access is needed.
+    """
+
+    def __init__(self, cursor: Cursor):
+        statements = cursor.get_government_statements()
+        size = max((i for i, _, _ in statements), default=-1) + 1
+        self.statement_titles: List[Optional[str]] = [None] * size
+        self.statement_date_strings: List[Optional[str]] = [None] * size
+        self.statement_dates = np.full(size, np.datetime64('NaT'), dtype='datetime64[D]')
+        for i, title, date in statements:
+            self.statement_titles[i] = title
+            self.statement_date_strings[i] = date
+            self.statement_dates[i] = np.datetime64(date)
+
+        domains = cursor.get_domain_ids()
+        size = max((i for i, _ in domains), default=-1) + 1
+        self.domain_names: List[Optional[str]] = [None] * size
+        for i, name in domains:
+            self.domain_names[i] = name
+        self.domain_name_to_id = {name: i for i, name in domains}
+        domain_ranks = np.zeros(size, dtype=np.int64)
+        domain_ranks[[i for i, _ in sorted(domains, key=lambda d: d[1])]] = np.arange(len(domains))
+
+        self.tables = {
+            publication_type: EntryTable(
+                cursor.get_names(publication_type),
+                cursor.get_date_point_rows(publication_type),
+                cursor.get_domain_rows(publication_type),
+                self.statement_dates,
+                domain_ranks,
+            )
+            for publication_type in PUBLICATION_TYPES
+        }
+
+        # A journal renamed between statements has an entry per title, its
+        # ISSN leads to the entry with the most recent statement
+        journals = self.tables['czasopisma']
+        offsets = journals.timeline_offsets
+        last_days = np.full(len(journals), np.iinfo(np.int64).min)
+        has_points = offsets[1:] > offsets[:-1]
+        last_days[has_points] = journals.dates[offsets[1:][has_points] - 1].astype(np.int64)
+        self.issn_to_id: Dict[str, int] = {}
+        for journal_id, issn in cursor.get_journal_identifier_rows():
+            current = self.issn_to_id.get(issn)
+            if current is None or (last_days[journal_id], -journal_id) > (last_days[current], -current):
+                self.issn_to_id[issn] = journal_id
+
+    @classmethod
+    def from_engine(cls, engine) -> 'PointsStore':
+        with Cursor(engine) as cursor:
+            return cls(cursor)
+
+    def get_domains(self) -> List[str]:
+        """
+        :return: sorted names of all domains
+        """
+        return sorted(name for name in self.domain_names if name is not None)
+
+    def get_id(self, name: str, publication_type: str) -> Optional[int]:
+        """
+        :return: id of the entry with the given name, None if there is no such entry
+        """
+        return self.__get_table(publication_type).name_to_id.get(name)
+
+    def get_journal_id_by_issn(self, issn: str) -> Optional[int]:
+        """
+        :param issn: ISSN or e-ISSN in the NNNN-NNNC format
+        :return: id of the journal, None if no journal has this ISSN
+        """
+        return self.issn_to_id.get(issn)
+
+    def get_name(self, entry_id: int, publication_type: str) -> str:
+        return self.__get_table(publication_type).names[entry_id]
+
+    def get_date_points(self, entry_id: int, publication_type: str) -> List[Tuple[str, str, int]]:
+        """
+        :return: (statement title, statement date, points) sorted by date, like Cursor.get_date_points
+        """
+        return [
+            (self.statement_titles[s], self.statement_date_strings[s], p)
+            for s, p in self.get_statement_points(entry_id, publication_type)
+        ]
+
+    def get_statement_points(self, entry_id: int, publication_type: str) -> List[Tuple[int, int]]:
+        """
+        Compact version of get_date_points, titles and dates of statements are
+        available in statement_titles and statement_date_strings.
+        :return: (government statement id, points) sorted by statement date
+        """
+        statement_ids, _, points = self.__get_table(publication_type).timeline(entry_id)
+        return list(zip(statement_ids.tolist(), points.tolist()))
+
+    def get_entry_domains(self, entry_id: int, publication_type: str) -> List[str]:
+        """
+        :return: sorted names of domains of the entry, empty for monographs
+        """
+        return [self.domain_names[d] for d in self.__get_table(publication_type).domains(entry_id).tolist()]
+
+    def has_any_domain(self, entry_id: int, publication_type: str, domains: List[str]) -> bool:
+        """
+        :return: whether the entry belongs to any of the given domains
+        """
+        domain_ids = [self.domain_name_to_id[d] for d in domains if d in self.domain_name_to_id]
+        return bool(np.isin(self.__get_table(publication_type).domains(entry_id), domain_ids).any())
+
+    def __get_table(self, publication_type: str) -> EntryTable:
+        try:
+            return self.tables[publication_type]
+        except KeyError:
+            raise RuntimeError(f'Unknown publication type: {publication_type}')
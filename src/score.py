@@ -0,0 +1,168 @@
+"""
+Scores a table of publications offline, like the search of the app, using
+several processes. The input is read like an imported search table: the
+first column is the title, the second one the date, the delimiter and the
+header are guessed.
+
+Run from the repository root, with the database and the text index built:
+    python -m src.score input.csv output.csv --type czasopisma --domains matematyka informatyka
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine
+
+from . import Config
+from .points import PointsStore
+from .search import PUBLICATION_TYPES, BatchSearch, TableFormatError, open_table, score_chunk
+from .text_index import IndexReader
+
+OUTPUT_COLUMNS = ['Line', 'Title', 'Date', 'Name', 'Similarity', 'Points', 'Statement date']
+# Number of rows sent to a worker at once
+CHUNK_SIZE = 1000
+# Number of characters read from the input at once
+READ_SIZE = 64 * 1024
+
+# Set in the parent before the workers are forked, so that they share the
+# loaded index and points copy-on-write instead of loading their own
+_batch_search: Optional[BatchSearch] = None
+
+# (line number, title, date) of the rows of a chunk, with the publication type and domains
+Task = Tuple[str, List[str], List[Tuple[int, str, str]]]
+
+
+def score_file(batch_search: BatchSearch, input_path: str, output_path: str, publication_type: str,
+               domains: List[str], workers: int = 1, chunk_size: int = CHUNK_SIZE,
+               header: Optional[bool] = None) -> int:
+    """
+    Reads the input chunk by chunk and scores chunks in a pool of forked
+    workers, writing results in the order of the input as they come.
+    Rows which can't be scored are reported on stderr.
+    :param publication_type: one of PUBLICATION_TYPES
+    :param domains: domains the user is interested in, only used for journals
+    :param workers: number of processes, 1 scores in this process
+    :param chunk_size: number of rows sent to a worker at once
+    :param header: whether the first row is a header, None to guess
+    :return: number of rows written
+    """
+    global _batch_search
+    count = 0
+    with open(input_path, encoding='utf-8-sig', errors='replace', newline='') as f_in, \
+            open(output_path, 'w', encoding='utf-8', newline='') as f_out:
+        guessed_header, _, entries = open_table(iter(lambda: f_in.read(READ_SIZE), ''))
+        tasks = _tasks(entries, guessed_header if header is None else header, publication_type, domains, chunk_size)
+        writer = csv.writer(f_out, delimiter=';', lineterminator='\n')
+        writer.writerow(OUTPUT_COLUMNS)
+
+        _batch_search = batch_search
+        try:
+            if workers > 1:
+                with multiprocessing.get_context('fork').Pool(workers, initializer=_init_worker) as pool:
+                    chunks = _ordered(pool, tasks, 2 * workers)
+                    for rows in chunks:
+                        writer.writerows(rows)
+                        count += len(rows)
+            else:
+                for task in tasks:
+                    rows = _score(task)
+                    writer.writerows(rows)
+                    count += len(rows)
+        finally:
+            _batch_search = None
+    return count
+
+
+def _tasks(entries: Iterator[Tuple[int, Optional[str], str, Optional[str]]], header: bool, publication_type: str,
+           domains: List[str], chunk_size: int) -> Iterator[Task]:
+    """
+    :param entries: records of the input, see open_table
+    :param header: whether the first record is a header and is left out
+    :return: chunks of rows to score
+    """
+    def records():
+        skip_header = header
+        try:
+            for line, title, date, error in entries:
+                if skip_header and title is not None:
+                    skip_header = False
+                    continue
+                if error is not None:
+                    print(f'Line {line}: {error}', file=sys.stderr)
+                if title is not None:
+                    yield line, title, date
+        except TableFormatError as e:
+            print(f'Line {e.line}: {e}', file=sys.stderr)
+
+    records = records()
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield publication_type, domains, chunk
+
+
+def _ordered(pool, tasks: Iterator[Task], max_pending: int) -> Iterator[List[tuple]]:
+    """
+    Like pool.imap, which reads all tasks up front, but keeps at most
+    max_pending chunks in flight, so the input is read as the output is written.
+    :return: results of tasks, in order
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(_score, (task,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _init_worker():
+    # Open files of the parent must not be shared, everything else is
+    _batch_search.index_reader.reopen()
+
+
+def _score(task: Task) -> List[tuple]:
+    publication_type, domains, records = task
+    results = score_chunk(_batch_search, [
+        {'title': title, 'date': date, 'type': publication_type, 'domains': domains}
+        for _, title, date in records
+    ])
+    return [
+        (line, title, r['date'], r['name'] or '', round(r['similarity'], 2), r['points'], r['statement_date'] or '')
+        for (line, title, _), r in zip(records, results)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scores a table of publications (title, date) like the app.')
+    parser.add_argument('input', help='CSV or TSV file, the first column is the title, the second one the date')
+    parser.add_argument('output', help='CSV file with results, separated with semicolons')
+    parser.add_argument('--type', choices=PUBLICATION_TYPES, default='czasopisma', help='publication type')
+    parser.add_argument('--domains', nargs='*', default=[], help='domains used to boost matching journals')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of processes')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='number of rows sent to a worker at once')
+    parser.add_argument('--header', action=argparse.BooleanOptionalAction, default=None,
+                        help='whether the first row is a header, guessed by default')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    config = Config()
+    engine = create_engine(f"sqlite:///{config['db_file']}")
+    batch_search = BatchSearch(IndexReader(config), PointsStore.from_engine(engine))
+    loaded = time.perf_counter()
+    count = score_file(batch_search, args.input, args.output, args.type, args.domains, args.workers,
+                       args.chunk_size, args.header)
+    elapsed = time.perf_counter() - loaded
+    print(f'Loaded in {loaded - start:.1f}s, scored {count} rows in {elapsed:.1f}s with {args.workers} workers, '
+          f'{count / elapsed:.0f} rows/s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
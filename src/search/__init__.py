@@ -0,0 +1,7 @@
+from .batch_search import BatchSearch, RowResult, normalize_query_date, normalize_query_title
+from .jobs import JobState, SearchJobs
+from .filter_query import filter_query_to_sql
+from .result_store import ResultStore
+from .table_import import TableFormatError, TableImport, decode_upload, open_table, read_table
+from .upload_store import UploadStore
+from .scoring import PUBLICATION_TYPES, score_chunk, score_items
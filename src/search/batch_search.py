@@ -0,0 +1,131 @@
+import datetime
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+from ..points import PointsResolver, PointsStore
+from ..text_index import IndexReader, SearchHit
+from ..text_index.normalization import normalize_issn
+
+
+def normalize_query_date(date: str) -> str:
+    """
+    :param date: date entered by the user, YYYY or YYYY-MM-DD
+    :return: date in the YYYY-MM-DD format, today if the input is not a valid date
+    """
+    date = date or ''
+    if re.match(r'^\d{4}$', date):
+        date = date + '-01-01'
+    if re.match(r'^\d{4}-\d\d-\d\d$', date):
+        try:
+            datetime.date.fromisoformat(date)
+            return date
+        except ValueError:
+            pass
+    return pd.to_datetime('today').strftime('%Y-%m-%d')
+
+
+def normalize_query_title(title: str) -> str:
+    """
+    Titles differing only in case or whitespace give the same search results,
+    so they are searched for only once.
+    :param title: title entered by the user
+    :return: lowercased title with collapsed whitespace
+    """
+    return ' '.join((title or '').split()).lower()
+
+
+class RowResult:
+    def __init__(self, query_title: str, date: str, name: str, similarity: float, points: int,
+                 points_history: List[Tuple[int, int]], last_date: str, domains_match: bool,
+                 hits: Sequence[SearchHit]):
+        self.query_title = query_title
+        self.date = date
+        self.name = name
+        self.similarity = similarity
+        self.points = points
+        # (government statement id, points), newest first
+        self.points_history = points_history
+        self.last_date = last_date
+        self.domains_match = domains_match
+        self.hits = hits
+
+    @property
+    def suggestions(self) -> list:
+        """
+        :return: [name, score] pairs of the remaining search results
+        """
+        return [[hit.name, hit.score] for hit in self.hits[1:]]
+
+
+class BatchSearch:
+    def __init__(self, index_reader: IndexReader, store: PointsStore):
+        self.index_reader = index_reader
+        self.store = store
+        self.resolver = PointsResolver(store)
+
+    def search(self, rows: List[dict], publication_type: str, domains: List[str]) -> List[RowResult]:
+        """
+        Resolves a whole search table at once. Each distinct title is searched
+        for only once and the points of all rows are resolved in one vectorized step.
+        :param rows: rows of the search table, dicts with 'Title' and 'Date'
+        :param publication_type: one of 'czasopisma', 'konferencje', 'monografie'
+        :param domains: list of domains the user is interested in
+        :return: list of results, one per row
+        """
+        domains = list(domains or [])
+        titles = [normalize_query_title(row['Title']) for row in rows]
+        unique_titles = list(dict.fromkeys(titles))
+        hits = self.__search_issns(unique_titles, domains) if publication_type == 'czasopisma' else {}
+        unique_titles = [title for title in unique_titles if title not in hits]
+        hits.update(zip(
+            unique_titles,
+            self.index_reader.search_many(publication_type, unique_titles, domains),
+        ))
+
+        dates = [normalize_query_date(row['Date']) for row in rows]
+        matched = [i for i, title in enumerate(titles) if len(hits[title]) > 0]
+        entry_ids = [hits[titles[i]][0].id for i in matched]
+        resolution = self.resolver.resolve(publication_type, entry_ids, [dates[i] for i in matched], domains)
+        resolved = dict(zip(matched, zip(
+            entry_ids,
+            resolution.points.tolist(),
+            resolution.statement_ids.tolist(),
+            resolution.domains_match.tolist(),
+        )))
+
+        results = []
+        for i, (row, title, date) in enumerate(zip(rows, titles, dates)):
+            row_hits = hits[title]
+            if i not in resolved:
+                # No matches have been found for this title
+                results.append(RowResult(row['Title'], date, '', 0., 0, [], date, True, row_hits))
+                continue
+
+            entry_id, points, statement_id, domains_match = resolved[i]
+            last_date = self.store.statement_date_strings[statement_id] if statement_id >= 0 else date
+            results.append(RowResult(
+                row['Title'], date, row_hits[0].name, row_hits[0].score, points,
+                list(reversed(self.store.get_statement_points(entry_id, publication_type))),
+                last_date, domains_match, row_hits,
+            ))
+        return results
+
+    def __search_issns(self, titles: List[str], domains: List[str]) -> Dict[str, Tuple[SearchHit, ...]]:
+        """
+        Journals entered by ISSN are looked up directly instead of searching for them.
+        :param titles: normalized titles
+        :return: results of titles which are ISSNs of known journals, by title
+        """
+        hits = {}
+        for title in titles:
+            journal_id = self.store.get_journal_id_by_issn(normalize_issn(title))
+            if journal_id is None:
+                continue
+            ds = frozenset(self.store.get_entry_domains(journal_id, 'czasopisma'))
+            matching_boost = self.index_reader.matching_domains_boost
+            domains_boost = matching_boost if len(ds & set(domains)) > 0 else 1
+            hits[title] = (SearchHit(journal_id, self.store.get_name(journal_id, 'czasopisma'),
+                                     domains_boost / matching_boost, ds),)
+        return hits
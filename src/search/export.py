@@ -0,0 +1,60 @@
+import csv
+import io
+from typing import Iterable, Iterator, List
+
+from openpyxl import Workbook
+
+# Columns of exported results
+EXPORT_COLUMNS = ['Title', 'Date', 'Points']
+# Number of rows written to a CSV chunk
+CSV_CHUNK_ROWS = 1000
+# Number of bytes sent at once when streaming a file
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def csv_chunks(rows: Iterable[tuple], header: List[str], delimiter: str = ';') -> Iterator[str]:
+    """
+    Writes rows as CSV, a chunk at a time, so that a response can be streamed
+    without the whole file in memory.
+    :param rows: values of the columns
+    :param header: names of the columns
+    :return: chunks of the CSV file
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(header)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_xlsx(rows: Iterable[tuple], header: List[str], path: str):
+    """
+    Writes rows to an .xlsx file with a write-only workbook, which keeps
+    only the row being written in memory.
+    :param rows: values of the columns
+    :param header: names of the columns
+    :param path: path of the file
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def file_chunks(path: str) -> Iterator[bytes]:
+    """
+    :return: chunks of the file
+    """
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
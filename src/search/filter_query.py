@@ -0,0 +1,94 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Relational operators of the DataTable filter syntax, by their symbol or name
+_RELATIONAL = {
+    '=': '=', 'eq': '=',
+    '!=': '!=', 'ne': '!=',
+    '<': '<', 'lt': '<',
+    '<=': '<=', 'le': '<=',
+    '>': '>', 'gt': '>',
+    '>=': '>=', 'ge': '>=',
+}
+
+_EXPRESSION = re.compile(
+    r'''\s*\{(?P<column>[^{}]+)\}\s*(?:
+        (?P<unary>is\s+(?:blank|nil))
+        |(?P<operator>!=|<=|>=|=|<|>|(?:eq|ne|lt|le|gt|ge|contains|datestartswith)(?=\s))
+        \s*(?P<value>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|`(?:[^`\\]|\\.)*`|[^\s&]+)
+    )\s*''',
+    re.IGNORECASE | re.VERBOSE,
+)
+_AND = re.compile(r'\s*(?:&&|and\s)\s*', re.IGNORECASE)
+_ESCAPE = re.compile(r'\\(.)')
+
+
+def filter_query_to_sql(filter_query: str, columns: Dict[str, str],
+                        casefolded: Optional[Dict[str, str]] = None) -> Tuple[str, List]:
+    """
+    Translates the filter_query of a DataTable with filter_action='custom' into
+    an SQL condition. Expressions typed in column filters are joined with '&&',
+    other logical operators and parentheses are not supported. Unlike in the
+    DataTable, 'contains' ignores case, which is what users looking for a
+    title expect.
+    :param filter_query: e.g. '{Title} contains "ieee" && {Points} >= 100'
+    :param columns: SQL column names which can be filtered on, with their DataTable
+    types ('text', 'numeric' or 'datetime')
+    :param casefolded: SQL columns with casefolded values of some of the columns, used by 'contains',
+    other columns are casefolded by the casefold SQL function, which has to be registered by the caller
+    :return: SQL condition with ? placeholders, 1 for an empty query, and values of the placeholders
+    :raise ValueError: if the query is not valid or refers to an unknown column
+    """
+    conditions = []
+    params = []
+    position = 0
+    filter_query = (filter_query or '').strip()
+    while position < len(filter_query):
+        if len(conditions) > 0:
+            separator = _AND.match(filter_query, position)
+            if separator is None:
+                raise ValueError(f'Unsupported filter query: {filter_query}')
+            position = separator.end()
+
+        expression = _EXPRESSION.match(filter_query, position)
+        if expression is None:
+            raise ValueError(f'Unsupported filter query: {filter_query}')
+        position = expression.end()
+
+        column = expression.group('column')
+        if column not in columns:
+            raise ValueError(f'Unknown column: {column}')
+        folded = (casefolded or {}).get(column)
+        condition, values = _condition(f'"{column}"', columns[column], expression,
+                                       f'"{folded}"' if folded else f'casefold(CAST("{column}" AS TEXT))')
+        conditions.append(condition)
+        params.extend(values)
+
+    if len(conditions) == 0:
+        return '1', []
+    return ' AND '.join(f'({c})' for c in conditions), params
+
+
+def _condition(column: str, column_type: str, expression: re.Match, casefolded: str) -> Tuple[str, List]:
+    if expression.group('unary') is not None:
+        return f"{column} IS NULL OR {column} = ''", []
+
+    operator = expression.group('operator').lower()
+    value = _value(expression.group('value'))
+    if operator == 'contains':
+        return f'instr({casefolded}, ?) > 0', [value.casefold()]
+    if operator == 'datestartswith':
+        return f'substr({column}, 1, ?) = ?', [len(value), value]
+
+    if column_type == 'numeric':
+        try:
+            value = float(value)
+        except ValueError:
+            raise ValueError(f'Not a number: {value}')
+    return f'{column} {_RELATIONAL[operator]} ?', [value]
+
+
+def _value(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'`':
+        return _ESCAPE.sub(r'\1', value[1:-1])
+    return value
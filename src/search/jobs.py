@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+import uuid
+from typing import Callable, List, Optional
+
+from .storage import create_parent_dir, sqlite_connection
+
+# Jobs not updated for this many seconds are treated as failed, e.g. when the worker running them died
+STALE_AFTER = 120
+# Finished jobs are removed after this many seconds
+JOB_TTL = 3600
+
+
+class JobState:
+    def __init__(self, status: str, done: int, total: int, payloads: List):
+        # 'running', 'done', 'cancelled' or 'failed'
+        self.status = status
+        # Number of rows processed so far
+        self.done = done
+        self.total = total
+        # Results of the processed chunks, in order
+        self.payloads = payloads
+
+    @property
+    def finished(self) -> bool:
+        return self.status != 'running'
+
+
+class SearchJobs:
+    """
+    Runs searches of large tables in background threads, chunk by chunk. The
+    progress, the results of finished chunks and cancellation requests are
+    kept in a SQLite file, so that any worker process can report on a job
+    started by another one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        create_parent_dir(path)
+        with sqlite_connection(self.path) as con:
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS Jobs (id TEXT PRIMARY KEY, status TEXT, done INTEGER, total INTEGER, '
+                'cancelled INTEGER, updated REAL)'
+            )
+            con.execute('CREATE TABLE IF NOT EXISTS JobChunks (job_id TEXT, chunk INTEGER, payload TEXT, '
+                        'PRIMARY KEY (job_id, chunk))')
+
+    def start(self, rows: list, process: Callable[[list, int], object], chunk_size: int) -> str:
+        """
+        :param rows: rows to process
+        :param process: function processing a chunk of rows, given the chunk and the index of its
+        first row, its result has to be JSON serializable
+        :param chunk_size: number of rows processed at once
+        :return: id of the job
+        """
+        self.__remove_old()
+        job_id = uuid.uuid4().hex
+        with sqlite_connection(self.path) as con:
+            con.execute('INSERT INTO Jobs VALUES (?, ?, ?, ?, ?, ?)', (job_id, 'running', 0, len(rows), 0, time.time()))
+        threading.Thread(target=self.__run, args=(job_id, rows, process, chunk_size), daemon=True).start()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[JobState]:
+        """
+        :return: state of the job, None if there is no such job
+        """
+        with sqlite_connection(self.path) as con:
+            job = con.execute('SELECT status, done, total, updated FROM Jobs WHERE id = ?', (job_id,)).fetchone()
+            if job is None:
+                return None
+            payloads = [json.loads(p) for p, in con.execute(
+                'SELECT payload FROM JobChunks WHERE job_id = ? ORDER BY chunk', (job_id,)
+            )]
+        status, done, total, updated = job
+        if status == 'running' and time.time() - updated > STALE_AFTER:
+            status = 'failed'
+        return JobState(status, done, total, payloads)
+
+    def cancel(self, job_id: str):
+        """
+        Stops the job after the chunk being processed, results of finished chunks are kept.
+        """
+        with sqlite_connection(self.path) as con:
+            con.execute('UPDATE Jobs SET cancelled = 1 WHERE id = ?', (job_id,))
+
+    def __run(self, job_id: str, rows: list, process: Callable[[list, int], object], chunk_size: int):
+        try:
+            for chunk, start in enumerate(range(0, len(rows), chunk_size)):
+                with sqlite_connection(self.path) as con:
+                    cancelled, = con.execute('SELECT cancelled FROM Jobs WHERE id = ?', (job_id,)).fetchone()
+                if cancelled:
+                    self.__set_status(job_id, 'cancelled')
+                    return
+
+                payload = json.dumps(process(rows[start:start + chunk_size], start))
+                with sqlite_connection(self.path) as con:
+                    con.execute('INSERT INTO JobChunks VALUES (?, ?, ?)', (job_id, chunk, payload))
+                    con.execute('UPDATE Jobs SET done = ?, updated = ? WHERE id = ?',
+                                (min(start + chunk_size, len(rows)), time.time(), job_id))
+            self.__set_status(job_id, 'done')
+        except Exception:
+            self.__set_status(job_id, 'failed')
+            raise
+
+    def __set_status(self, job_id: str, status: str):
+        with sqlite_connection(self.path) as con:
+            con.execute('UPDATE Jobs SET status = ?, updated = ? WHERE id = ?', (status, time.time(), job_id))
+
+    def __remove_old(self):
+        with sqlite_connection(self.path) as con:
+            old = [job_id for job_id, in con.execute('SELECT id FROM Jobs WHERE updated < ?', (time.time() - JOB_TTL,))]
+            con.executemany('DELETE FROM JobChunks WHERE job_id = ?', [(job_id,) for job_id in old])
+            con.executemany('DELETE FROM Jobs WHERE id = ?', [(job_id,) for job_id in old])
@@ -0,0 +1,197 @@
+import json
+import time
+import uuid
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .filter_query import filter_query_to_sql
+from .storage import create_parent_dir, sqlite_connection
+
+# Columns of a stored row, as used by the results table. Lists are stored as JSON.
+ROW_COLUMNS = ['Title', 'Date', 'Points', 'Similarity', 'PointsHistory', 'QueryTitle', 'Suggestions',
+               'TitleTooltip', 'PointsTooltip']
+_JSON_COLUMNS = {'PointsHistory', 'Suggestions'}
+# Columns the results can be sorted and filtered by, with their DataTable types
+QUERY_COLUMNS = {'Title': 'text', 'Date': 'datetime', 'Points': 'numeric', 'Similarity': 'numeric'}
+# Casefolded titles are stored too, so that filtering by a part of the title doesn't call Python for every row
+_CASEFOLDED = {'Title': 'TitleCasefolded'}
+
+
+class ResultStore:
+    """
+    Search results kept on the server under a result id, so that only the
+    id and the visible columns are sent to the browser. Results live in a
+    SQLite file shared by all worker processes and are evicted after a while.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400):
+        """
+        :param path: SQLite file, created if missing
+        :param ttl: number of seconds after which results are evicted
+        """
+        self.path = path
+        self.ttl = ttl
+        create_parent_dir(path)
+        with sqlite_connection(path) as con:
+            con.execute('PRAGMA journal_mode=WAL')
+            layout = [c for _, c, *_ in con.execute('PRAGMA table_info(ResultRows)')]
+            if layout and layout != ['result_id', 'row'] + ROW_COLUMNS + ['TitleCasefolded', 'deleted']:
+                # Results are only kept for a while, those stored by an older version are dropped
+                con.execute('DROP TABLE ResultRows')
+                con.execute('DROP TABLE IF EXISTS Results')
+            con.execute('CREATE TABLE IF NOT EXISTS Results (id TEXT PRIMARY KEY, publication_type TEXT, '
+                        'domains TEXT, created REAL)')
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS ResultRows (result_id TEXT, row INTEGER, '
+                + ', '.join(f'"{c}"' for c in ROW_COLUMNS)
+                + ', TitleCasefolded TEXT, deleted INTEGER DEFAULT 0, PRIMARY KEY (result_id, row))'
+            )
+            # Rows are counted, filtered and sorted using only these indexes, full rows are read only for a page
+            query_columns = ', '.join(f'"{c}"' for c in list(QUERY_COLUMNS) + list(_CASEFOLDED.values()))
+            con.execute(f'CREATE INDEX IF NOT EXISTS ResultRows_query ON ResultRows (result_id, deleted, row, '
+                        f'{query_columns})')
+            for c in ('Points', 'Similarity'):
+                con.execute(f'CREATE INDEX IF NOT EXISTS ResultRows_{c} ON ResultRows (result_id, deleted, "{c}", row)')
+
+    def create(self, publication_type: str, domains: List[str]) -> str:
+        """
+        Evicts old results and registers a new one.
+        :return: id of the new result
+        """
+        result_id = uuid.uuid4().hex
+        with sqlite_connection(self.path) as con:
+            old = [(i,) for i, in con.execute('SELECT id FROM Results WHERE created < ?', (time.time() - self.ttl,))]
+            con.executemany('DELETE FROM ResultRows WHERE result_id = ?', old)
+            con.executemany('DELETE FROM Results WHERE id = ?', old)
+            con.execute('INSERT INTO Results VALUES (?, ?, ?, ?)',
+                        (result_id, publication_type, json.dumps(domains or []), time.time()))
+        return result_id
+
+    def add_rows(self, result_id: str, start: int, rows: List[dict]):
+        """
+        :param start: number of the first row
+        :param rows: dicts with values of ROW_COLUMNS
+        """
+        with sqlite_connection(self.path) as con:
+            con.executemany(
+                f'INSERT INTO ResultRows VALUES (?, ?, {", ".join("?" for _ in ROW_COLUMNS)}, ?, 0)',
+                [
+                    (result_id, start + i) + tuple(
+                        json.dumps(row[c]) if c in _JSON_COLUMNS else row[c] for c in ROW_COLUMNS
+                    ) + (row['Title'].casefold(),)
+                    for i, row in enumerate(rows)
+                ]
+            )
+
+    def get_info(self, result_id: str) -> Optional[dict]:
+        """
+        :return: dict with the publication type and domains of the search, None if the result was evicted
+        """
+        with sqlite_connection(self.path) as con:
+            info = con.execute('SELECT publication_type, domains FROM Results WHERE id = ?', (result_id,)).fetchone()
+        if info is None:
+            return None
+        return {'type': info[0], 'domains': json.loads(info[1])}
+
+    def get_row(self, result_id: str, row: int) -> Optional[dict]:
+        """
+        :return: dict with values of ROW_COLUMNS, None if there is no such row
+        """
+        rows = self.get_rows(result_id, [row])
+        return rows[0] if len(rows) > 0 else None
+
+    def get_rows(self, result_id: str, rows: Optional[Iterable[int]] = None) -> List[dict]:
+        """
+        :param rows: numbers of rows to return, None for all of them
+        :return: dicts with the row number ('id') and values of ROW_COLUMNS, ordered by row number
+        """
+        columns = ', '.join(f'"{c}"' for c in ROW_COLUMNS)
+        query = f'SELECT row, {columns} FROM ResultRows WHERE result_id = ?'
+        with sqlite_connection(self.path) as con:
+            if rows is None:
+                records = con.execute(query + ' ORDER BY row', (result_id,)).fetchall()
+            else:
+                # A temporary table avoids the limit on the number of bound parameters
+                con.execute('CREATE TEMP TABLE SelectedRows (row INTEGER PRIMARY KEY)')
+                con.executemany('INSERT OR IGNORE INTO SelectedRows VALUES (?)', ((int(r),) for r in rows))
+                records = con.execute(
+                    query + ' AND row IN (SELECT row FROM SelectedRows) ORDER BY row', (result_id,)
+                ).fetchall()
+        return [self.__to_dict(record) for record in records]
+
+    def delete_rows(self, result_id: str, rows: Iterable[int]):
+        """
+        Marks rows deleted by the user, they are no longer returned by query_rows.
+        """
+        with sqlite_connection(self.path) as con:
+            con.executemany('UPDATE ResultRows SET deleted = 1 WHERE result_id = ? AND row = ?',
+                            ((result_id, int(r)) for r in rows))
+
+    def query_rows(self, result_id: str, sort_by: Optional[List[dict]] = None, filter_query: str = '',
+                   offset: int = 0, limit: Optional[int] = None) -> Tuple[List[dict], int]:
+        """
+        Rows which are not deleted, sorted and filtered like in a DataTable with
+        sort_action and filter_action set to 'custom'.
+        :param sort_by: sort_by of the DataTable, dicts with 'column_id' and 'direction' ('asc' or 'desc'),
+        ties are kept in the order of rows
+        :param filter_query: filter_query of the DataTable, see filter_query_to_sql
+        :param offset: number of matching rows to skip
+        :param limit: maximum number of rows to return, None for all of them
+        :return: dicts with the row number ('id') and values of ROW_COLUMNS, and the number of all matching rows
+        :raise ValueError: if the filter query or sorting is not supported
+        """
+        where, params, order = self.__where_and_order(result_id, sort_by, filter_query)
+        with sqlite_connection(self.path) as con:
+            con.create_function('casefold', 1, self.__casefold, deterministic=True)
+            page = [r for r, in con.execute(
+                f'SELECT row FROM ResultRows {where} ORDER BY {order} LIMIT ? OFFSET ?',
+                params + [-1 if limit is None else limit, offset],
+            )]
+            if (limit is None or len(page) < limit) and (len(page) > 0 or offset == 0):
+                # The last page, no need to count the rows
+                count = offset + len(page)
+            else:
+                count, = con.execute(f'SELECT COUNT(*) FROM ResultRows {where}', params).fetchone()
+        rows = {row['id']: row for row in self.get_rows(result_id, page)}
+        return [rows[r] for r in page], count
+
+    def iter_rows(self, result_id: str, columns: List[str], sort_by: Optional[List[dict]] = None,
+                  filter_query: str = '') -> Iterator[tuple]:
+        """
+        Like query_rows, but reads the rows one by one instead of loading all of them,
+        for exporting large results.
+        :param columns: columns of ROW_COLUMNS to return, JSON columns are returned as they are stored
+        :return: tuples with values of the columns
+        :raise ValueError: if the filter query or sorting is not supported
+        """
+        if any(c not in ROW_COLUMNS for c in columns):
+            raise ValueError(f'Unknown columns: {columns}')
+        where, params, order = self.__where_and_order(result_id, sort_by, filter_query)
+        selected = ', '.join(f'"{c}"' for c in columns)
+        return self.__read(f'SELECT {selected} FROM ResultRows {where} ORDER BY {order}', params)
+
+    def __read(self, query: str, params: list) -> Iterator[tuple]:
+        with sqlite_connection(self.path) as con:
+            con.create_function('casefold', 1, self.__casefold, deterministic=True)
+            yield from con.execute(query, params)
+
+    @staticmethod
+    def __where_and_order(result_id: str, sort_by: Optional[List[dict]], filter_query: str) -> Tuple[str, List, str]:
+        condition, params = filter_query_to_sql(filter_query, QUERY_COLUMNS, _CASEFOLDED)
+        order = []
+        for s in sort_by or []:
+            if s['column_id'] not in QUERY_COLUMNS or s['direction'] not in ('asc', 'desc'):
+                raise ValueError(f'Unsupported sorting: {s}')
+            order.append(f'"{s["column_id"]}" {s["direction"].upper()}')
+        order.append('row')
+        return f'WHERE result_id = ? AND deleted = 0 AND ({condition})', [result_id] + params, ', '.join(order)
+
+    @staticmethod
+    def __casefold(value):
+        return value.casefold() if isinstance(value, str) else value
+
+    @staticmethod
+    def __to_dict(record: tuple) -> dict:
+        row = {'id': record[0]}
+        for c, value in zip(ROW_COLUMNS, record[1:]):
+            row[c] = json.loads(value) if c in _JSON_COLUMNS else value
+        return row
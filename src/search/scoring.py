@@ -0,0 +1,84 @@
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from .batch_search import BatchSearch
+
+PUBLICATION_TYPES = ('czasopisma', 'konferencje', 'monografie')
+# Number of items resolved at once
+CHUNK_SIZE = 1000
+
+
+def score_items(batch_search: BatchSearch, items: Iterable, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Scores publications chunk by chunk, so that items can be read from a
+    stream and results written before all of them are read.
+    :param items: dicts with 'title', 'date' (YYYY or YYYY-MM-DD, optional),
+    'type' (one of PUBLICATION_TYPES) and 'domains' (optional)
+    :param chunk_size: number of items resolved at once
+    :return: results in the order of items, see score_chunk
+    """
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield from score_chunk(batch_search, chunk)
+
+
+def score_chunk(batch_search: BatchSearch, items: List) -> List[dict]:
+    """
+    Scores publications like the search of the app. Items of the same
+    publication type and domains are resolved in one batch.
+    :param items: see score_items
+    :return: for each item, in order, a dict with 'title', 'type', 'date' (the date points are
+    given for), 'name' (of the best match, None if there's none), 'similarity', 'points',
+    'domains_match', 'statement_date' (of the statement points are taken from) and 'history'
+    (dicts with 'date' and 'points' of every statement, newest first), or with 'error' if the item is invalid
+    """
+    results = [None] * len(items)
+    groups = {}
+    for i, item in enumerate(items):
+        error = _validate(item)
+        if error is not None:
+            results[i] = {'error': error}
+            continue
+        domains = tuple(item.get('domains') or [])
+        groups.setdefault((item['type'], domains), []).append(i)
+
+    store = batch_search.store
+    for (publication_type, domains), indices in groups.items():
+        rows = [{'Title': items[i]['title'], 'Date': items[i].get('date') or ''} for i in indices]
+        for i, result in zip(indices, batch_search.search(rows, publication_type, list(domains))):
+            results[i] = {
+                'title': result.query_title,
+                'type': publication_type,
+                'date': result.date,
+                'name': result.name or None,
+                'similarity': result.similarity,
+                'points': result.points,
+                'domains_match': result.domains_match,
+                'statement_date': result.last_date if result.name else None,
+                'history': [
+                    {'date': store.statement_date_strings[s], 'points': points}
+                    for s, points in result.points_history
+                ],
+            }
+    return results
+
+
+def _validate(item) -> Optional[str]:
+    """
+    :return: description of the problem, None if the item is valid
+    """
+    if not isinstance(item, dict):
+        return 'Item is not a JSON object'
+    if not isinstance(item.get('title'), str) or item['title'].strip() == '':
+        return 'Missing title'
+    if item.get('type') not in PUBLICATION_TYPES:
+        return f"Type must be one of: {', '.join(PUBLICATION_TYPES)}"
+    if item.get('date') is not None and not isinstance(item['date'], str):
+        return 'Date must be a string, YYYY or YYYY-MM-DD'
+    domains = item.get('domains')
+    if domains is not None and (not isinstance(domains, list) or not all(isinstance(d, str) for d in domains)):
+        return 'Domains must be a list of strings'
+    return None
@@ -0,0 +1,22 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+
+def create_parent_dir(path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+
+@contextmanager
+def sqlite_connection(path: str) -> Iterator[sqlite3.Connection]:
+    """
+    A new connection for every operation, so that threads don't share them.
+    Commits on success and closes the connection.
+    """
+    con = sqlite3.connect(path, timeout=30)
+    try:
+        with con:
+            yield con
+    finally:
+        con.close()
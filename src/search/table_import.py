@@ -0,0 +1,213 @@
+import base64
+import codecs
+import csv
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Number of characters the dialect and the header are guessed from
+SAMPLE_SIZE = 64 * 1024
+# Number of lines shown in the import preview
+PREVIEW_LINES = 20
+# Number of base64 characters decoded at once, a multiple of 4
+_DECODE_CHUNK = 4 * 64 * 1024
+_DELIMITERS = ',;\t'
+_DATE = re.compile(r'^\d{4}(-\d\d-\d\d)?$')
+# Headers of tables exported by the app
+_EXPORTED_HEADERS = ['Title;Points', 'Title,Points', 'Title\tPoints']
+
+
+class TableImport:
+    def __init__(self, records: List[Tuple[int, str, str]], errors: List[Tuple[int, str]], header: bool,
+                 truncated: bool, preview: str):
+        # (line number, title, date) of every record with a title, including a possible header
+        self.records = records
+        # (line number, message), records with errors preventing the import are not in records
+        self.errors = errors
+        # Whether the first record looks like a header
+        self.header = header
+        # Whether rows over the limit were left out
+        self.truncated = truncated
+        # The first lines of the imported text
+        self.preview = preview
+
+    @property
+    def preview_complete(self) -> bool:
+        """
+        :return: whether the preview shows all records and errors
+        """
+        lines = self.preview.count('\n') + (0 if self.preview.endswith('\n') or self.preview == '' else 1)
+        last = max([line for line, *_ in self.records[-1:] + self.errors[-1:]], default=0)
+        return last <= lines
+
+    def rows(self, header: bool) -> List[dict]:
+        """
+        :param header: whether the first record is a header and is left out
+        :return: rows of the search table, dicts with 'Title' and 'Date'
+        """
+        records = self.records[1:] if header else self.records
+        return [{'Title': title, 'Date': date} for _, title, date in records]
+
+    def row_errors(self, header: bool) -> List[Tuple[int, str]]:
+        """
+        :param header: whether the first record is a header, its errors are left out
+        :return: (line number, message) of rows which were not imported or have an invalid date
+        """
+        if header and len(self.records) > 0:
+            return [(line, message) for line, message in self.errors if line != self.records[0][0]]
+        return self.errors
+
+
+def decode_upload(contents: str) -> Iterator[str]:
+    """
+    Decodes the contents of a dcc.Upload chunk by chunk, without holding
+    the whole decoded file in memory.
+    :param contents: data URL, e.g. 'data:text/csv;base64,...'
+    :return: chunks of text, UTF-8 with an optional BOM
+    """
+    _, data = contents.split(',', 1)
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    for start in range(0, len(data), _DECODE_CHUNK):
+        yield decoder.decode(base64.b64decode(data[start:start + _DECODE_CHUNK]))
+    yield decoder.decode(b'', final=True)
+
+
+class TableFormatError(Exception):
+    def __init__(self, line: int, message: str):
+        super().__init__(message)
+        # Number of the line the reader stopped at
+        self.line = line
+
+
+def open_table(chunks: Iterable[str]) -> Tuple[bool, str, Iterator[Tuple[int, Optional[str], str, Optional[str]]]]:
+    """
+    Starts parsing an imported search table. Only the first SAMPLE_SIZE
+    characters are read up front, the dialect and the header are guessed
+    from them, the rest is parsed as records are taken from the iterator.
+    The first column is the title, the second one the date, other columns are ignored.
+    :param chunks: chunks of the imported text, e.g. from decode_upload
+    :return: whether the first record looks like a header, the preview of the first lines, and
+    (line number, title, date, error) of every non-blank record, the title is None if the record
+    can't be imported, the error is None if there's no problem. The iterator raises TableFormatError
+    if the reader can't recover, e.g. from an unterminated quote spanning the rest of the file
+    """
+    chunks = iter(chunks)
+    sample = ''
+    for chunk in chunks:
+        sample += chunk
+        if len(sample) >= SAMPLE_SIZE:
+            break
+    sample = sample.lstrip('\ufeff')
+    sniffed = sample[:SAMPLE_SIZE]
+    if len(sample) > SAMPLE_SIZE and '\n' in sniffed:
+        # Only complete lines are sniffed
+        sniffed = sniffed[:sniffed.rindex('\n')]
+    dialect = _sniff(sniffed)
+    preview = ''.join(_lines([sample], PREVIEW_LINES))
+    return _has_header(sniffed, dialect), preview, _records(csv.reader(_lines(_prepend(sample, chunks)), dialect))
+
+
+def read_table(chunks: Iterable[str], max_rows: Optional[int] = None) -> TableImport:
+    """
+    Parses an imported search table incrementally, see open_table.
+    :param chunks: chunks of the imported text, e.g. from decode_upload
+    :param max_rows: maximum number of records, None for no limit
+    :return: parsed records with row-level errors
+    """
+    header, preview, entries = open_table(chunks)
+    records = []
+    errors = []
+    truncated = False
+    try:
+        for line, title, date, error in entries:
+            if max_rows is not None and len(records) >= max_rows:
+                errors.append((line, f'Przekroczono limit {max_rows} wierszy, pozostałe wiersze pominięto.'))
+                truncated = True
+                break
+            if error is not None:
+                errors.append((line, error))
+            if title is not None:
+                records.append((line, title, date))
+    except TableFormatError as e:
+        errors.append((e.line, str(e)))
+        truncated = True
+    return TableImport(records, errors, header, truncated, preview)
+
+
+def _records(reader) -> Iterator[Tuple[int, Optional[str], str, Optional[str]]]:
+    line = 0
+    while True:
+        try:
+            fields = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            raise TableFormatError(line + 1, f'Błąd formatu pliku: {e}')
+        first_line, line = line + 1, reader.line_num
+        if all(f.strip() == '' for f in fields):
+            continue
+
+        title = fields[0]
+        date = fields[1].strip() if len(fields) > 1 else ''
+        if title.strip() == '':
+            yield first_line, None, date, 'Brak nazwy, wiersz pominięto.'
+        elif '\n' in title or '\n' in date:
+            yield first_line, None, date, (f'Wiersze {first_line}-{line} tworzą jeden rekord, prawdopodobnie '
+                                           f'brakuje cudzysłowu zamykającego. Rekord pominięto.')
+        elif date != '' and _DATE.match(date) is None:
+            yield first_line, title, date, f'Nieprawidłowa data „{date[:20]}”, zostanie użyta dzisiejsza.'
+        else:
+            yield first_line, title, date, None
+
+
+def _sniff(sample: str) -> type:
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=_DELIMITERS)
+    except csv.Error:
+        pass
+
+    # E.g. a single line, take the delimiter which occurs most often in it
+    first_line = sample.split('\n', 1)[0]
+    delimiter = max(_DELIMITERS, key=first_line.count)
+
+    class Dialect(csv.excel):
+        pass
+    Dialect.delimiter = delimiter if first_line.count(delimiter) > 0 else ','
+    return Dialect
+
+
+def _has_header(sample: str, dialect: type) -> bool:
+    lines = sample.strip().split('\n')
+    if len(lines) < 2 or len(lines[0]) < 3:
+        return False
+    if lines[0][:len(_EXPORTED_HEADERS[0])] in _EXPORTED_HEADERS:
+        # Probably a reimport of exported data
+        return True
+
+    header = next(csv.reader([lines[0]], dialect), [])
+    # The second column has a name, which doesn't look like a date
+    return len(header) >= 2 and header[1].strip() != '' and not re.search(r'\d\d', header[1])
+
+
+def _prepend(first: str, chunks: Iterator[str]) -> Iterator[str]:
+    yield first
+    yield from chunks
+
+
+def _lines(chunks: Iterable[str], limit: Optional[int] = None) -> Iterator[str]:
+    """
+    Splits chunks of text into lines, keeping line endings as the csv module expects.
+    """
+    count = 0
+    rest = ''
+    for chunk in chunks:
+        # Not str.splitlines, which also splits at characters the csv module doesn't treat as line breaks
+        lines = (rest + chunk).split('\n')
+        # The last line may continue in the next chunk
+        rest = lines.pop()
+        for line in lines:
+            if limit is not None and count >= limit:
+                return
+            count += 1
+            yield line + '\n'
+    if rest != '' and (limit is None or count < limit):
+        yield rest
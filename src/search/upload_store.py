@@ -0,0 +1,53 @@
+import json
+import time
+import uuid
+from typing import Optional
+
+from .storage import create_parent_dir, sqlite_connection
+from .table_import import TableImport
+
+# Uploads not imported within this many seconds are removed
+UPLOAD_TTL = 3600
+
+
+class UploadStore:
+    """
+    Uploaded search tables, parsed on the server and kept until the user
+    imports them, so that only a preview is sent to the browser. Uploads
+    live in a SQLite file shared by all worker processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        create_parent_dir(path)
+        with sqlite_connection(path) as con:
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('CREATE TABLE IF NOT EXISTS Uploads (id TEXT PRIMARY KEY, records TEXT, errors TEXT, '
+                        'header INTEGER, truncated INTEGER, preview TEXT, created REAL)')
+
+    def add(self, table: TableImport) -> str:
+        """
+        Removes old uploads and stores a new one.
+        :return: id of the upload
+        """
+        upload_id = uuid.uuid4().hex
+        with sqlite_connection(self.path) as con:
+            con.execute('DELETE FROM Uploads WHERE created < ?', (time.time() - UPLOAD_TTL,))
+            con.execute('INSERT INTO Uploads VALUES (?, ?, ?, ?, ?, ?, ?)', (
+                upload_id, json.dumps(table.records), json.dumps(table.errors), table.header, table.truncated,
+                table.preview, time.time(),
+            ))
+        return upload_id
+
+    def get(self, upload_id: str) -> Optional[TableImport]:
+        """
+        :return: the parsed table, None if the upload was removed
+        """
+        with sqlite_connection(self.path) as con:
+            upload = con.execute('SELECT records, errors, header, truncated, preview FROM Uploads WHERE id = ?',
+                                 (upload_id,)).fetchone()
+        if upload is None:
+            return None
+        records, errors, header, truncated, preview = upload
+        return TableImport([tuple(r) for r in json.loads(records)], [tuple(e) for e in json.loads(errors)],
+                           bool(header), bool(truncated), preview)
@@ -1 +1,3 @@
 from .text_index import IndexBuilder, IndexReader
+from .normalization import normalize_name
+from .results import SearchHit, hits_to_frame
@@ -0,0 +1,279 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from whoosh.index import Index
+from whoosh.qparser import QueryParser
+from whoosh.query import Query
+from whoosh.searching import Searcher
+
+from .cache import LRUCache
+from .normalization import normalize_name
+from .tfidf import TfidfIndex
+
+# (id, name, lowercased name, domains) of an entry found for a query
+Candidate = Tuple[int, str, str, FrozenSet[str]]
+
+
+def _split_domains(domains: Optional[str]) -> FrozenSet[str]:
+    return frozenset((domains or '').split(',')) - {''}
+
+
+def _key_map(entries: Iterable[Tuple[Optional[str], Candidate]]) -> Dict[str, Optional[Candidate]]:
+    """
+    :param entries: (normalized key, candidate) of all entries, keys missing
+    in indexes built before keys were stored are computed from names
+    :return: candidate by key, None for keys shared by several entries
+    """
+    keys = {}
+    for key, candidate in entries:
+        key = key if key is not None else normalize_name(candidate[1])
+        if key != '':
+            keys[key] = None if key in keys else candidate
+    return keys
+
+
+class SearchView(ABC):
+    """
+    One version of the index of a backend. Searches of several threads can
+    run on the same view, without the lock of the reader.
+    """
+
+    def __init__(self, keys: Dict[str, Optional[Candidate]], generation: Optional[int]):
+        # Candidate by normalized key, None for ambiguous keys
+        self.keys = keys
+        # Generation of the index, None if unknown
+        self.generation = generation
+        # Number of searches running on the view
+        self.users = 0
+
+    @abstractmethod
+    def candidates(self, texts: List[str], limit: int) -> List[List[Candidate]]:
+        """
+        :param texts: lowercased names to search for
+        :param limit: maximum number of candidates per text
+        :return: candidates for every text
+        """
+
+    def exact(self, key: str) -> Optional[Candidate]:
+        """
+        :param key: normalized name
+        :return: the only entry with this key, None if there is none or there are several
+        """
+        return self.keys.get(key)
+
+    def close(self):
+        pass
+
+
+class SearchBackend(ABC):
+    """
+    Finds candidate entries in the index of one publication type. Candidates
+    are scored and ranked by IndexReader, backends only have to find them.
+    A refresh replaces the current view, views still used by searches are
+    closed when the last of them releases it. refresh, acquire and release
+    are called under the lock of the reader.
+    """
+
+    def __init__(self):
+        self.view: Optional[SearchView] = None
+
+    @abstractmethod
+    def refresh(self) -> bool:
+        """
+        Picks up changes of the index on disk.
+        :return: whether the index changed since the last call
+        """
+
+    def acquire(self) -> SearchView:
+        """
+        :return: the current view, kept open until it is released
+        """
+        self.view.users += 1
+        return self.view
+
+    def release(self, view: SearchView):
+        view.users -= 1
+        if view.users == 0 and view is not self.view:
+            view.close()
+
+    def reopen(self):
+        """
+        Opens its own files of the index, e.g. in a process forked after the
+        backend was created, which must not share open files with the parent.
+        """
+        pass
+
+    def close(self):
+        self._replace_view(None)
+
+    def _replace_view(self, view: SearchView):
+        old, self.view = self.view, view
+        if old is not None and old.users == 0:
+            old.close()
+
+
+class WhooshView(SearchView):
+    def __init__(self, searcher: Searcher, generation: int, lower_names: Dict[str, str],
+                 keys: Dict[str, Optional[Candidate]], parse: Callable[[str], Query]):
+        super().__init__(keys, generation)
+        self.searcher = searcher
+        # Lowercased name by id as stored
+        self.lower_names = lower_names
+        self.parse = parse
+        # Readers of a searcher share open files, so only one query runs on it at a time
+        self.lock = threading.Lock()
+
+    def candidates(self, texts: List[str], limit: int) -> List[List[Candidate]]:
+        results = []
+        for text in texts:
+            with self.lock:
+                hits = [(hit['id'], hit['name'], hit.get('domains'))
+                        for hit in self.searcher.search(self.parse(text), limit=limit)]
+            results.append([
+                (int(entry_id), name, self.lower_names[entry_id], _split_domains(domains))
+                for entry_id, name, domains in hits
+            ])
+        return results
+
+    def close(self):
+        # None once the searcher was handed over to a refreshed view
+        if self.searcher is not None:
+            self.searcher.close()
+
+
+class WhooshBackend(SearchBackend):
+    """
+    N-gram full-text search with Whoosh, one query per text. The searcher is
+    kept open for the lifetime of the backend and only refreshed when the
+    index changes on disk.
+    """
+
+    def __init__(self, index: Index, parser: QueryParser, query_cache: LRUCache):
+        super().__init__()
+        self.index = index
+        self.parser = parser
+        self.query_cache = query_cache
+        self.version = self.__get_version()
+        # (id, key, candidate) of every document by segment, including deleted ones,
+        # None for documents without a name
+        self.__segments: Dict[str, List[Tuple[str, Optional[str], Candidate]]] = {}
+        self._replace_view(self.__view(index.searcher(), self.version[0]))
+
+    def refresh(self) -> bool:
+        version = self.__get_version()
+        if version == self.version:
+            return False
+        old = self.view
+        if version[0] > self.version[0] and old.users == 0:
+            # New segments were committed, unchanged segment readers are reused.
+            # Refreshing closes readers of the old searcher, so only a searcher
+            # nobody searches with is refreshed
+            searcher = old.searcher.refresh()
+            old.searcher = None
+        else:
+            # The index was recreated from scratch, or the old searcher is in use
+            searcher = self.index.searcher()
+        self._replace_view(self.__view(searcher, version[0]))
+        self.version = version
+        return True
+
+    def reopen(self):
+        # Names and keys don't change, they stay shared with the parent process
+        self.view.searcher = self.index.searcher()
+
+    def __get_version(self) -> Tuple[int, Optional[float]]:
+        """
+        A full rebuild starts again from the same generation, so the
+        modification time of the table of contents is compared as well.
+        """
+        generation = self.index.latest_generation()
+        toc = f'_{self.index.indexname}_{generation}.toc'
+        storage = self.index.storage
+        return generation, storage.file_modified(toc) if storage.file_exists(toc) else None
+
+    def __view(self, searcher: Searcher, generation: int) -> WhooshView:
+        """
+        Reads lowercased names of all entries by id, and the normalized keys.
+        Stored fields are decoded only for segments which weren't read
+        before, so a refresh after an update reads only the new segments.
+        """
+        segments = {}
+        entries = []
+        for reader, _ in searcher.reader().leaf_readers():
+            segment = reader.segment()
+            if segment is None:
+                # Empty index
+                continue
+            segment_entries = self.__segments.get(segment.segment_id())
+            if segment_entries is None:
+                segment_entries = [self.__entry(reader.stored_fields(d)) for d in range(reader.doc_count_all())]
+            segments[segment.segment_id()] = segment_entries
+            if reader.has_deletions():
+                entries.extend(e for d, e in enumerate(segment_entries) if e is not None and not reader.is_deleted(d))
+            else:
+                entries.extend(e for e in segment_entries if e is not None)
+        self.__segments = segments
+        lower_names = {entry_id: candidate[2] for entry_id, _, candidate in entries}
+        keys = _key_map((key, candidate) for _, key, candidate in entries)
+        return WhooshView(searcher, generation, lower_names, keys, self.__parse)
+
+    @staticmethod
+    def __entry(f: dict) -> Optional[Tuple[str, Optional[str], Candidate]]:
+        """
+        :param f: stored fields of a document
+        :return: id as stored, normalized key and candidate of the entry,
+        None for entries without a name, which no search can find
+        """
+        if 'name' not in f:
+            return None
+        return f['id'], f.get('key'), (int(f['id']), f['name'], f['name'].lower(), _split_domains(f.get('domains')))
+
+    def __parse(self, text: str) -> Query:
+        q = self.query_cache.get(text)
+        if q is None:
+            q = self.parser.parse(text)
+            self.query_cache.put(text, q)
+        return q
+
+
+class TfidfView(SearchView):
+    def __init__(self, index: TfidfIndex):
+        self.index = index
+        self.ids = index.ids.tolist()
+        self.lower_names = [name.lower() for name in index.names]
+        self.domains = [_split_domains(domains) for domains in index.domains]
+        super().__init__(_key_map(
+            (key, (i, name, lower_name, domains))
+            for i, name, lower_name, key, domains in zip(
+                self.ids, index.names, self.lower_names, index.keys, self.domains
+            )
+        ), index.generation)
+
+    def candidates(self, texts: List[str], limit: int) -> List[List[Candidate]]:
+        return [
+            [(self.ids[p], self.index.names[p], self.lower_names[p], self.domains[p]) for p in positions.tolist()]
+            for positions in self.index.search(texts, limit)
+        ]
+
+
+class TfidfBackend(SearchBackend):
+    """
+    Character trigram TF-IDF search, a whole batch of texts is answered with
+    one sparse matrix product. Reloaded when the index is rebuilt on disk.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.version = None
+        self.refresh()
+
+    def refresh(self) -> bool:
+        version = os.path.getmtime(os.path.join(self.path, 'matrix.npz'))
+        if version == self.version:
+            return False
+        self._replace_view(TfidfView(TfidfIndex.load(self.path)))
+        self.version = version
+        return True
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache with optional expiry of entries.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        """
+        :param maxsize: maximum number of entries, 0 disables caching
+        :param ttl: number of seconds after which an entry expires, None for no expiry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.__lock:
+            entry = self.__data.get(key)
+            if entry is not None and self.ttl is not None and entry[0] + self.ttl < time.monotonic():
+                del self.__data[key]
+                self.evictions += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self.__data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self.__lock:
+            self.__data[key] = (time.monotonic(), value)
+            self.__data.move_to_end(key)
+            while len(self.__data) > self.maxsize:
+                self.__data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+
+    def remove_if(self, predicate: Callable[[Hashable], bool]):
+        """
+        Removes the entries whose keys match the predicate.
+        """
+        with self.__lock:
+            for key in [key for key in self.__data if predicate(key)]:
+                del self.__data[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: hit/miss/eviction counters and the current size
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.__data),
+        }
@@ -0,0 +1,68 @@
+import re
+import unicodedata
+from typing import Optional
+
+# Cleanup of titles, also applied to conference titles by build_db:
+# additional data in square brackets (present in 2021 data)
+BRACKETED_SUFFIX = r'((^[^\[]*$)|(.*(?=\s\[)))'
+# additional data in trailing parentheses, e.g. "(Online)"
+PARENTHESIZED_SUFFIX = r'((^.*[^\)\s]\s*$)|(.*(?=\([^\)]*\)\s?$)))'
+# trailing spaces
+TRAILING_SPACES = r'(.*[^\s](?=\s*$))'
+
+# ISSN or e-ISSN, with or without the hyphen
+ISSN_PATTERN = re.compile(r'^\d{4}-?\d{3}[\dX]$')
+
+# Line breaks in titles of journals
+NEWLINES = str.maketrans({'\n': ' ', '\r': None})
+
+_CLEANUP = [re.compile(p) for p in (BRACKETED_SUFFIX, PARENTHESIZED_SUFFIX, TRAILING_SPACES)]
+_PUNCTUATION = re.compile(r'[\W_]+')
+# Letters that don't decompose into a base letter and a diacritic
+_LETTERS = str.maketrans({'ł': 'l', 'đ': 'd', 'ø': 'o', 'ħ': 'h', 'ı': 'i', 'ŀ': 'l', 'æ': 'ae', 'œ': 'oe'})
+
+
+def normalize_name(name: str) -> str:
+    """
+    Key under which names differing only in case, diacritics, punctuation
+    or additional data in brackets are equal.
+    :param name: title of a journal/conference or publisher name
+    :return: normalized key, empty if nothing is left of the name
+    """
+    name = name or ''
+    for pattern in _CLEANUP:
+        # Like str.extract, names the pattern doesn't match are left as they are
+        match = pattern.search(name)
+        if match is not None:
+            name = match.group(1)
+    name = unicodedata.normalize('NFKD', name.casefold().translate(_LETTERS))
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return ' '.join(_PUNCTUATION.sub(' ', name).split())
+
+
+def clean_title(title: str) -> Optional[str]:
+    """
+    Removes additional data in brackets and trailing spaces, like successive
+    str.extract calls with the cleanup patterns.
+    :param title: title of a conference
+    :return: cleaned title, None if a pattern doesn't match
+    """
+    for pattern in _CLEANUP:
+        match = pattern.search(title)
+        if match is None:
+            return None
+        title = match.group(1)
+    return title
+
+
+def normalize_issn(value: str) -> Optional[str]:
+    """
+    :param value: ISSN or e-ISSN, as entered by the user or found in the ministry spreadsheets
+    :return: ISSN in the NNNN-NNNC format, None if the value isn't an ISSN
+    """
+    if not isinstance(value, str):
+        return None
+    value = value.strip().upper()
+    if ISSN_PATTERN.match(value) is None:
+        return None
+    return value[:4] + '-' + value[-4:]
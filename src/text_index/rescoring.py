@@ -0,0 +1,22 @@
+from typing import Dict, List, Sequence, Tuple
+
+import jellyfish
+
+
+def jaro_winkler_scores(pairs: Sequence[Tuple[str, str]]) -> List[float]:
+    """
+    Scores all (query, candidate) pairs of a batch. This is not a vectorized
+    scorer: each distinct pair is scored once with jellyfish's C
+    implementation, so only repeated pairs are saved. A numpy version is
+    slower, see benchmarks/jaro_winkler.py.
+    :param pairs: (query, candidate) pairs, both already lowercased
+    :return: Jaro-Winkler similarity of every pair
+    """
+    unique: Dict[Tuple[str, str], int] = {}
+    positions = [unique.setdefault(pair, len(unique)) for pair in pairs]
+    if len(unique) == 0:
+        return []
+
+    names, texts = zip(*((candidate, query) for query, candidate in unique))
+    scores = list(map(jellyfish.jaro_winkler_similarity, names, texts))
+    return [scores[i] for i in positions]
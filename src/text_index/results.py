@@ -0,0 +1,34 @@
+from typing import FrozenSet, Sequence
+
+import pandas as pd
+
+
+class SearchHit:
+    """
+    A single search result.
+    """
+    __slots__ = ('id', 'name', 'score', 'domains')
+
+    def __init__(self, id: int, name: str, score: float, domains: FrozenSet[str] = frozenset()):
+        # Identifier of the entry in the respective DB table
+        self.id = id
+        self.name = name
+        # Similarity to the searched text, boosted for matching domains
+        self.score = score
+        self.domains = domains
+
+    def __repr__(self):
+        return f'SearchHit({self.id}, "{self.name}", {self.score:.3f})'
+
+
+def hits_to_frame(hits: Sequence[SearchHit]) -> pd.DataFrame:
+    """
+    :param hits: search results
+    :return: DataFrame with id, name, score and domains columns, empty if there are no results
+    """
+    if len(hits) == 0:
+        return pd.DataFrame()
+    return pd.DataFrame.from_records(
+        [(h.id, h.name, h.score, ','.join(sorted(h.domains))) for h in hits],
+        columns=['id', 'name', 'score', 'domains'],
+    )
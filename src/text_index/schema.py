@@ -2,10 +2,13 @@ from whoosh import fields
 
 
 schema = fields.Schema(
-    # Identifier of this entry in the respective DB table
-    id=fields.ID(stored=True),
+    # Identifier of this entry in the respective DB table, documents are
+    # updated by it
+    id=fields.ID(stored=True, unique=True),
     # Name (or names) of this journal/conference/publisher
     name=fields.NGRAMWORDS(queryor=True, stored=True),
+    # Name normalized for exact matching, see normalize_name
+    key=fields.ID(stored=True),
     # Names of science domains for this entry
     domains=fields.KEYWORD(commas=True, stored=True),
 )
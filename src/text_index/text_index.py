@@ -1,67 +1,146 @@
 import os
-from typing import Iterable, Set, Tuple
+import threading
+from collections import Counter
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
 
-import jellyfish
 import pandas as pd
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import func
 import whoosh
+from whoosh import writing
 from whoosh.filedb.filestore import FileStorage
-from whoosh.index import Index
 from whoosh.qparser import QueryParser, OrGroup
 
 from .. import Config
+from .backends import Candidate, TfidfBackend, WhooshBackend
+from .cache import LRUCache
+from .normalization import normalize_name
+from .rescoring import jaro_winkler_scores
+from .results import SearchHit, hits_to_frame
 from .schema import *
+from .tfidf import TfidfIndex
 from .. import orm
+from ..utils import chunks
+
+# Index directory of every publication type
+INDEX_TYPES = {'monografie': 'monographs', 'czasopisma': 'journals', 'konferencje': 'conferences'}
+# Segments merged when the index is updated: none, small segments into bigger ones, or all into one
+MERGE_POLICIES = {'none': writing.NO_MERGE, 'small': writing.MERGE_SMALL, 'optimize': writing.OPTIMIZE}
+# Number of ids queried at once, below the SQLite limit of query parameters
+QUERY_IDS = 500
 
 
 class IndexBuilder:
     def __init__(self, config: Config, session: Session):
         self.index_dir = config['search']['index_path']
+        self.engine = config['search'].get('engine', 'whoosh')
+        self.merge_policy = config['search'].get('merge_policy', 'small')
+        if self.merge_policy not in MERGE_POLICIES:
+            raise RuntimeError(f'Unknown merge policy: {self.merge_policy}')
         self.session = session
 
-    def build_index(self):
+    def build_index(self) -> Dict[str, int]:
         """
         Recreates and builds the text index for all types of entries.
+        :return: generation of the built index, by publication type
         """
-        # Monographs
-        index = self.__create_index('monographs')
-        self.__add_documents(index, map(
-            lambda r: {
-                'id': str(r.id),
-                'name': r.publisher_name,
-            },
-            self.session.query(orm.Monographs)
-        ))
+        return {
+            publication_type: self.__add_documents(i_type, self.__documents(i_type))
+            for publication_type, i_type in INDEX_TYPES.items()
+        }
 
-        # Journals
-        index = self.__create_index('journals')
-        self.__add_documents(index, map(
-            lambda r: {
-                'id': str(r[0]),
-                'name': r[1],
-                'domains': r[2],
-            },
-            self.session.query(
+    def update_index(self, changed_ids: Dict[str, Iterable[int]]) -> Dict[str, int]:
+        """
+        Replaces documents of the given entries in the built text index,
+        instead of recreating it. Entries which are no longer indexed, e.g.
+        journals without domains, are only deleted. Segments are merged
+        according to the merge policy in the config.
+        :param changed_ids: ids of added, changed or removed entries by publication type
+        :return: generation of the index after the update, by updated publication type
+        """
+        generations = {}
+        for publication_type, ids in changed_ids.items():
+            i_type = INDEX_TYPES[publication_type]
+            ids = sorted({int(i) for i in ids})
+            if len(ids) == 0:
+                continue
+            index = self.__open_index(i_type)
+            writer = index.writer()
+            try:
+                # Like update_document, but with one searcher for all deletions,
+                # update_document opens a reader of every segment for each document
+                with writer.searcher() as searcher:
+                    for entry_id in ids:
+                        writer.delete_by_term('id', str(entry_id), searcher=searcher)
+                for chunk in chunks(ids, QUERY_IDS):
+                    for doc in self.__documents(i_type, chunk):
+                        writer.add_document(**doc)
+                writer.commit(mergetype=MERGE_POLICIES[self.merge_policy])
+            except BaseException:
+                writer.cancel()
+                print('Failed to update the index')
+                raise
+
+            generation = index.latest_generation()
+            if self.engine == 'tfidf':
+                with index.searcher() as searcher:
+                    TfidfIndex.build(searcher.all_stored_fields(), generation).save(
+                        os.path.join(self.index_dir, 'tfidf', i_type))
+            generations[publication_type] = generation
+        return generations
+
+    def __documents(self, i_type: str, ids: Optional[List[int]] = None) -> Iterator[dict]:
+        """
+        :param ids: ids of entries to read, None for all
+        :return: documents of entries of the index
+        """
+        if i_type == 'monographs':
+            query = self.session.query(orm.Monographs)
+            if ids is not None:
+                query = query.filter(orm.Monographs.id.in_(ids))
+            return map(
+                lambda r: {
+                    'id': str(r.id),
+                    'name': r.publisher_name,
+                    'key': r.name_key,
+                },
+                query
+            )
+
+        if i_type == 'journals':
+            query = self.session.query(
                 orm.Journals.id,
                 orm.Journals.title,
+                orm.Journals.name_key,
                 func.group_concat(orm.Domains.name, ',')
-            ).
-            select_from(orm.Journals).
-            join(orm.JournalDomains).
-            join(orm.Domains).
-            group_by(orm.Journals.id)
-        ))
-
-        # Conferences
-        index = self.__create_index('conferences')
-        self.__add_documents(index, map(
+            ).\
+                select_from(orm.Journals).\
+                join(orm.JournalDomains).\
+                join(orm.Domains).\
+                group_by(orm.Journals.id)
+            if ids is not None:
+                query = query.filter(orm.Journals.id.in_(ids))
+            return map(
+                lambda r: {
+                    'id': str(r[0]),
+                    'name': r[1],
+                    'key': r[2],
+                    'domains': r[3],
+                },
+                query
+            )
+
+        query = self.session.query(orm.Conferences)
+        if ids is not None:
+            query = query.filter(orm.Conferences.id.in_(ids))
+        return map(
             lambda r: {
                 'id': str(r.id),
                 'name': r.title,
+                'key': r.name_key,
             },
-            self.session.query(orm.Conferences)
-        ))
+            query
+        )
 
     def __create_index(self, i_type: str):
         index_dir = os.path.join(self.index_dir, i_type)
@@ -69,42 +148,77 @@ class IndexBuilder:
         storage = FileStorage(index_dir)
         return storage.create_index(schema)
 
-    @staticmethod
-    def __add_documents(index: Index, docs: Iterable[dict]):
+    def __open_index(self, i_type: str):
+        index_dir = os.path.join(self.index_dir, i_type)
+        if not whoosh.index.exists_in(index_dir):
+            raise RuntimeError(f'No text index in {index_dir}, build it first')
+        return FileStorage(index_dir).open_index()
+
+    def __add_documents(self, i_type: str, docs: Iterable[dict]) -> int:
+        """
+        :return: generation of the created index
+        """
+        index = self.__create_index(i_type)
         writer = index.writer()
-        written = 0
+        written = []
 
         try:
             for doc in docs:
                 writer.add_document(**doc)
-                written += 1
+                written.append(doc)
             writer.commit()
         except BaseException:
             writer.cancel()
             print('Failed to index documents')
             raise
 
+        generation = index.latest_generation()
+        if self.engine == 'tfidf':
+            TfidfIndex.build(written, generation).save(os.path.join(self.index_dir, 'tfidf', i_type))
+        return generation
+
 
 class IndexReader:
     def __init__(self, config: Config):
-        self.index_m = whoosh.index.open_dir(
-            os.path.join(config['search']['index_path'], 'monographs')
-        )
-        self.index_j = whoosh.index.open_dir(
-            os.path.join(config['search']['index_path'], 'journals')
-        )
-        self.index_c = whoosh.index.open_dir(
-            os.path.join(config['search']['index_path'], 'conferences')
-        )
+        index_path = config['search']['index_path']
+        self.engine = config['search'].get('engine', 'whoosh')
         self.matching_domains_boost = config['search']['matching_domains_boost']
         self.name_parser = QueryParser('name', schema, plugins=[], group=OrGroup)
+        self.cache = LRUCache(config['search'].get('cache_size', 0), config['search'].get('cache_ttl'))
+        self.query_cache = LRUCache(config['search'].get('cache_size', 0))
+
+        if self.engine == 'whoosh':
+            self.__backends = {
+                publication_type: WhooshBackend(
+                    whoosh.index.open_dir(os.path.join(index_path, i_type)), self.name_parser, self.query_cache
+                )
+                for publication_type, i_type in INDEX_TYPES.items()
+            }
+        elif self.engine == 'tfidf':
+            self.__backends = {
+                publication_type: TfidfBackend(os.path.join(index_path, 'tfidf', i_type))
+                for publication_type, i_type in INDEX_TYPES.items()
+            }
+        else:
+            raise RuntimeError(f'Unknown search engine: {self.engine}')
+        self.__locks = {t: threading.Lock() for t in self.__backends}
+        self.__fast_path_stats = {t: Counter() for t in self.__backends}
+
+    def reopen(self):
+        """
+        Opens its own files of the indexes in a process forked after the
+        reader was created. Everything loaded into memory stays shared with
+        the parent process, copy-on-write.
+        """
+        for backend in self.__backends.values():
+            backend.reopen()
 
     def query_monographs(self, text: str) -> pd.DataFrame:
         """
         :param text: publisher name to search for
         :return: DataFrame with results
         """
-        return self.__query(self.index_m, text, set())
+        return hits_to_frame(self.search('monografie', text))
 
     def query_journals(self, text: str, domains: [str]) -> pd.DataFrame:
         """
@@ -113,40 +227,138 @@ class IndexReader:
         help boost relevant journals
         :return: DataFrame with results
         """
-        return self.__query(self.index_j, text, set(domains))
+        return hits_to_frame(self.search('czasopisma', text, domains))
 
     def query_conferences(self, text: str) -> pd.DataFrame:
         """
         :param text: conference name to search for
         :return: DataFrame with results
         """
-        return self.__query(self.index_c, text, set())
+        return hits_to_frame(self.search('konferencje', text))
+
+    def search(self, publication_type: str, text: str, domains: [str] = ()) -> Tuple[SearchHit, ...]:
+        """
+        :param publication_type: one of 'czasopisma', 'konferencje', 'monografie'
+        :param text: name to search for
+        :param domains: list of domains the user is interested in, only used for journals
+        :return: results sorted by score, best first
+        """
+        return self.search_many(publication_type, [text], domains)[0]
+
+    def search_many(self, publication_type: str, texts: Iterable[str],
+                    domains: [str] = ()) -> List[Tuple[SearchHit, ...]]:
+        """
+        Runs a batch of queries against a single index. Results are cached,
+        texts seen before are not searched for again until the index changes.
+        :param publication_type: one of 'czasopisma', 'konferencje', 'monografie'
+        :param texts: names to search for
+        :param domains: list of domains the user is interested in, only used for journals
+        :return: results sorted by score, best first, one tuple per text
+        """
+        if publication_type not in self.__backends:
+            raise RuntimeError(f'Unknown publication type: {publication_type}')
+        domains = frozenset(domains or []) if publication_type == 'czasopisma' else frozenset()
+        texts = list(texts)
+
+        lock = self.__locks[publication_type]
+        backend = self.__backends[publication_type]
+        # Only the refresh and taking the current view hold the lock, searches
+        # of the same type run in parallel on the view
+        with lock:
+            if backend.refresh():
+                self.cache.remove_if(lambda key: key[0] == publication_type)
+                print(f'Text index of {publication_type} changed, searching generation {backend.view.generation}')
+            view = backend.acquire()
+        try:
+            # Both the search and the similarity are case-insensitive
+            keys = [(publication_type, text.lower(), domains) for text in texts]
+            results = [self.cache.get(key) for key in keys]
+            missing = list({key: None for key, result in zip(keys, results) if result is None})
+
+            # Names equal after normalization don't need the full-text search
+            found = {}
+            fuzzy = []
+            for key in missing:
+                candidate = view.exact(normalize_name(key[1]))
+                if candidate is not None:
+                    found[key] = (self.__hit(candidate, 1.0, domains),)
+                else:
+                    fuzzy.append(key)
+            exact = len(found)
+
+            found.update(self.__rescore(fuzzy, view.candidates([key[1] for key in fuzzy], limit=6), domains))
+        except BaseException:
+            with lock:
+                backend.release(view)
+            raise
+
+        with lock:
+            self.__fast_path_stats[publication_type].update(hits=exact, misses=len(fuzzy))
+            # Results of a view replaced in the meantime are not cached
+            if view is backend.view:
+                for key, hits in found.items():
+                    self.cache.put(key, hits)
+            backend.release(view)
+        return [result if result is not None else found[key] for key, result in zip(keys, results)]
+
+    def query_many(self, publication_type: str, texts: Iterable[str], domains: [str] = ()) -> List[pd.DataFrame]:
+        """
+        Same as search_many, with results as DataFrames.
+        """
+        return [hits_to_frame(hits) for hits in self.search_many(publication_type, texts, domains)]
 
-    def __query(self, index: Index, text: str, domains: Set[str]) -> pd.DataFrame:
-        q = self.name_parser.parse(text)
+    def cache_stats(self) -> dict:
+        """
+        :return: hit/miss/eviction counters of the query cache
+        """
+        return self.cache.stats()
 
-        with index.searcher() as s:
-            results = []
-            for hit in s.search(q, limit=6):
-                ds = set((hit.get('domains') or '').split(','))
-                results.append({
-                    'raw_score': hit.score,
-                    'id': hit['id'],
-                    'name': hit['name'],
-                    'domains_boost': self.matching_domains_boost if len(ds & domains) > 0 else 1
-                })
+    def generations(self) -> Dict[str, Optional[int]]:
+        """
+        :return: generation of the index searches run on, by publication type, as
+        picked up by the last search of the type. None for TF-IDF indexes saved
+        before generations were recorded
+        """
+        generations = {}
+        for publication_type, backend in self.__backends.items():
+            with self.__locks[publication_type]:
+                generations[publication_type] = backend.view.generation
+        return generations
 
-        if len(results) == 0:
-            return pd.DataFrame()
+    def fast_path_stats(self) -> dict:
+        """
+        :return: number of searched names found by their normalized key (hits)
+        and of names that needed the full-text search (misses)
+        """
+        stats = sum(self.__fast_path_stats.values(), Counter())
+        hits, misses = stats['hits'], stats['misses']
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses > 0 else 0.0}
 
-        df = pd.DataFrame.from_records(results, index='id')
+    def close(self):
+        for publication_type, backend in self.__backends.items():
+            with self.__locks[publication_type]:
+                backend.close()
 
+    def __rescore(self, keys: List[Hashable], candidates: List[List[Candidate]],
+                  domains: Set[str]) -> Dict[Hashable, Tuple[SearchHit, ...]]:
+        """
+        Scores the candidates of all texts together.
+        :param keys: cache keys of the searched texts
+        :param candidates: candidates found for every text
+        :return: results by cache key
+        """
         # Compute accurate score based on string similarity (lowercased)
-        df['score'] = df['name'].apply(
-            # "Sharpen" the similarity to make it more intuitive
-            lambda name: jellyfish.jaro_winkler_similarity(name.lower(), text.lower()) ** 1.5
-        )
+        pairs = [(key[1], lower_name) for key, found in zip(keys, candidates) for _, _, lower_name, _ in found]
+        similarities = iter(jaro_winkler_scores(pairs))
+        results = {}
+        for key, found in zip(keys, candidates):
+            hits = [self.__hit(candidate, next(similarities), domains) for candidate in found]
+            results[key] = tuple(sorted(hits, key=lambda h: h.score, reverse=True))
+        return results
 
-        df['score'] = df['score'] * df['domains_boost'] / self.matching_domains_boost
-        df = df.sort_values(by='score', ascending=False)
-        return df.reset_index(drop=True)
+    def __hit(self, candidate: Candidate, similarity: float, domains: Set[str]) -> SearchHit:
+        entry_id, name, _, ds = candidate
+        domains_boost = self.matching_domains_boost if len(ds & domains) > 0 else 1
+        # "Sharpen" the similarity to make it more intuitive
+        score = similarity ** 1.5
+        return SearchHit(entry_id, name, score * domains_boost / self.matching_domains_boost, ds)
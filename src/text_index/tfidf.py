@@ -0,0 +1,98 @@
+import os
+import pickle
+from typing import Iterable, List, Optional
+
+import numpy as np
+import scipy.sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ..utils import chunks
+
+# Number of queries multiplied against the index at once, bounds the memory
+# used by the product of a batch
+QUERY_CHUNK_SIZE = 256
+
+
+class TfidfIndex:
+    """
+    Character trigram TF-IDF vectors of all names of one index. A whole
+    batch of queries is answered with a single sparse matrix product.
+    """
+
+    def __init__(self, vectorizer: TfidfVectorizer, matrix: scipy.sparse.csr_matrix,
+                 ids: np.ndarray, names: List[str], keys: List[Optional[str]], domains: List[str],
+                 generation: Optional[int] = None):
+        self.vectorizer = vectorizer
+        # One L2-normalized row per entry, so the product with a query is the cosine similarity
+        self.matrix = matrix
+        self.ids = ids
+        self.names = names
+        self.keys = keys
+        self.domains = domains
+        # Generation of the Whoosh index the documents were read from, None if unknown
+        self.generation = generation
+
+    @classmethod
+    def build(cls, docs: Iterable[dict], generation: Optional[int] = None) -> 'TfidfIndex':
+        """
+        :param docs: documents with 'id', 'name' and optional 'key' and 'domains' fields, like the Whoosh index,
+        documents without a name are left out
+        :param generation: generation of the Whoosh index with the documents
+        """
+        docs = [doc for doc in docs if doc.get('name') is not None]
+        names = [doc['name'] for doc in docs]
+        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 3), lowercase=True, dtype=np.float32)
+        matrix = vectorizer.fit_transform(names) if len(names) > 0 else scipy.sparse.csr_matrix((0, 0))
+        return cls(
+            vectorizer,
+            matrix.tocsr(),
+            np.array([int(doc['id']) for doc in docs], dtype=np.int64),
+            names,
+            [doc.get('key') for doc in docs],
+            [doc.get('domains') or '' for doc in docs],
+            generation,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'TfidfIndex':
+        """
+        :param path: directory the index was saved to
+        """
+        with open(os.path.join(path, 'entries.pickle'), 'rb') as file:
+            entries = pickle.load(file)
+        # Indexes saved before generations were recorded have none
+        vectorizer, ids, names, keys, domains, generation = entries if len(entries) == 6 else (*entries, None)
+        matrix = scipy.sparse.load_npz(os.path.join(path, 'matrix.npz')).tocsr()
+        return cls(vectorizer, matrix, ids, names, keys, domains, generation)
+
+    def save(self, path: str):
+        """
+        :param path: directory to save the index to, created if missing
+        """
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'entries.pickle'), 'wb') as file:
+            pickle.dump((self.vectorizer, self.ids, self.names, self.keys, self.domains, self.generation), file)
+        # Written last, readers watch this file for changes
+        scipy.sparse.save_npz(os.path.join(path, 'matrix.npz'), self.matrix)
+
+    def search(self, texts: List[str], limit: int) -> List[np.ndarray]:
+        """
+        :param texts: names to search for
+        :param limit: maximum number of results per text
+        :return: for every text, positions of the most similar entries, best first
+        """
+        results = []
+        if self.matrix.shape[0] == 0:
+            return [np.zeros(0, dtype=np.int64) for _ in texts]
+
+        for chunk in chunks(texts, QUERY_CHUNK_SIZE):
+            queries = self.vectorizer.transform(chunk)
+            scores = (queries @ self.matrix.T).tocsr()
+            for i in range(scores.shape[0]):
+                row = slice(scores.indptr[i], scores.indptr[i + 1])
+                data, indices = scores.data[row], scores.indices[row]
+                if len(data) > limit:
+                    top = np.argpartition(-data, limit - 1)[:limit]
+                    data, indices = data[top], indices[top]
+                results.append(indices[np.argsort(-data, kind='stable')].astype(np.int64))
+        return results
@@ -0,0 +1,9 @@
+from typing import Iterator, List
+
+
+def chunks(values: List, size: int) -> Iterator[List]:
+    """
+    :return: consecutive slices of the values with at most size elements
+    """
+    for i in range(0, len(values), size):
+        yield values[i:i + size]